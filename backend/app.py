@@ -1,13 +1,25 @@
 # backend/app.py - Versión corregida para SQLAlchemy 2.x
 import os
 import datetime
-from flask import Flask, send_from_directory, jsonify
+import click
+from flask import Flask, jsonify
 from routes.producto_routes import producto_bp
 from routes.auth_routes import auth_bp
-from routes.upload_routes import upload_bp
+from routes.upload_routes import upload_bp, archivos_bp
 from routes.estadisticas_routes import estadisticas_bp
+from routes.venta_routes import venta_bp
+from routes.pos_routes import pos_bp
+from routes.vencimiento_routes import vencimiento_bp
+from routes.stock_routes import stock_bp
+from routes.eventos_routes import eventos_bp
+from routes.analitica_routes import analitica_bp
+from routes.reposicion_routes import reposicion_bp
+from routes.metricas_routes import metricas_bp
 from utils.db import db, init_db
-from utils.auth import jwt, init_bcrypt
+from utils.auth import jwt, init_bcrypt, init_autorizacion
+from utils.logs import init_logging
+from utils.metricas import init_metricas
+from utils.replicas import init_replicas, HEADER_PRIMARIA
 from flask_cors import CORS
 from config import Config
 from sqlalchemy import text  # ← Importar text para SQLAlchemy 2.x
@@ -15,6 +27,7 @@ from sqlalchemy import text  # ← Importar text para SQLAlchemy 2.x
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_logging(app)
     
     # Configuración CORS para desarrollo y producción - ✅ CORREGIDA
     allowed_origins = [
@@ -37,24 +50,34 @@ def create_app():
     CORS(app, 
          resources={r"/api/*": {"origins": allowed_origins}}, 
          supports_credentials=True,
-         allow_headers=['Content-Type', 'Authorization', 'Access-Control-Allow-Credentials'],
+         allow_headers=['Content-Type', 'Authorization', 'Access-Control-Allow-Credentials',
+                        'Idempotency-Key',  # POS: reintentos de POST /api/ventas
+                        HEADER_PRIMARIA],  # read-your-writes con réplicas (utils/replicas.py)
+         expose_headers=[HEADER_PRIMARIA],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
     
     # Inicializar extensiones
     db.init_app(app)
     jwt.init_app(app)
+    init_autorizacion(app)
     init_bcrypt(app)
+    init_metricas(app, db)
+    init_replicas(app, db)
     
     # Registrar rutas
     app.register_blueprint(producto_bp, url_prefix='/api/productos')
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(upload_bp, url_prefix='/api')
     app.register_blueprint(estadisticas_bp)  # Ya tiene /api/estadisticas
-    
-    # Servir imágenes desde carpeta /uploads
-    @app.route('/uploads/<path:filename>')
-    def uploaded_file(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    app.register_blueprint(venta_bp, url_prefix='/api/ventas')
+    app.register_blueprint(pos_bp, url_prefix='/api/pos')
+    app.register_blueprint(vencimiento_bp, url_prefix='/api/vencimientos')
+    app.register_blueprint(stock_bp, url_prefix='/api/stock')
+    app.register_blueprint(eventos_bp, url_prefix='/api/eventos')
+    app.register_blueprint(analitica_bp, url_prefix='/api/analitica')
+    app.register_blueprint(reposicion_bp, url_prefix='/api/reposicion')
+    app.register_blueprint(metricas_bp)  # Ya tiene /api/metrics
+    app.register_blueprint(archivos_bp)  # Imágenes en /uploads con caché inmutable
     
     # Ruta raíz para verificar que el backend está activo
     @app.route("/")
@@ -66,9 +89,11 @@ def create_app():
             "environment": os.environ.get('ENVIRONMENT', 'development'),
             "endpoints": {
                 "health": "/api/health",
+                "metrics": "/api/metrics",
                 "auth": "/api/auth/",
                 "productos": "/api/productos/",
                 "estadisticas": "/api/estadisticas/",
+                "ventas": "/api/ventas/",
                 "uploads": "/api/upload/"
             }
         }
@@ -92,7 +117,55 @@ def create_app():
             "environment": os.environ.get('ENVIRONMENT', 'development')
         })
     
-    # Inicializar base de datos en el contexto de la app
+    # ✅ Esquema y datos iniciales: comando explícito, no en cada arranque de worker
+    #   flask --app app init-db
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Crear tablas, columnas e índices faltantes y el usuario admin"""
+        init_db()
+    
+    # ✅ Resumen de vencimientos: refresco incremental, pensado para cron nocturno
+    #   0 3 * * *  cd backend && flask --app app refrescar-vencimientos
+    @app.cli.command('refrescar-vencimientos')
+    @click.option('--completo', is_flag=True, help='Reconstruir el resumen entero')
+    def refrescar_vencimientos_command(completo):
+        """Volcar al resumen de vencimientos los productos modificados desde el último refresco"""
+        from utils.vencimientos import refrescar
+        print(f"✅ Vencimientos: {refrescar(completo=completo)}")
+    
+    # ✅ Snapshot del libro de stock: acota los movimientos a sumar en consultas históricas
+    #   0 * * * *  cd backend && flask --app app snapshot-stock
+    @app.cli.command('snapshot-stock')
+    def snapshot_stock_command():
+        """Guardar el stock de los productos con movimientos desde el último snapshot"""
+        from utils.movimientos import tomar_snapshot
+        print(f"✅ Snapshot de stock: {tomar_snapshot()}")
+    
+    # ✅ Agregados de ventas: solo hace falta después de cambiar VENTAS_ZONA_HORARIA
+    #   (init-db los construye la primera vez); correr con las cajas cerradas
+    @app.cli.command('reconstruir-analitica')
+    def reconstruir_analitica_command():
+        """Rehacer los agregados de ventas por hora / día / mes desde el historial"""
+        from utils.analitica import reconstruir
+        print(f"✅ Analítica de ventas: {reconstruir()}")
+    
+    # ✅ Sugerencias de reposición: recálculo en lote de todo el catálogo
+    #   30 3 * * *  cd backend && flask --app app calcular-reposicion
+    @app.cli.command('calcular-reposicion')
+    def calcular_reposicion_command():
+        """Recalcular demanda, stock de seguridad y punto de reorden de todos los productos"""
+        from utils.reposicion import calcular
+        print(f"✅ Reposición: {calcular()}")
+    
+    return app
+
+# Crear la aplicación (necesario para Railway/Render: `gunicorn app:app`).
+# No toca la base: el esquema lo pone al día gunicorn.conf.py al arrancar.
+# ✅ Producción: gunicorn -c gunicorn.conf.py wsgi:app (ver wsgi.py)
+app = create_app()
+
+if __name__ == '__main__':
+    # Servidor de desarrollo local
     with app.app_context():
         init_db()
         
@@ -102,13 +175,6 @@ def create_app():
             for rule in app.url_map.iter_rules():
                 print(f"  {rule.rule} -> {rule.endpoint}")
     
-    return app
-
-# Crear la aplicación (necesario para Railway/Render)
-app = create_app()
-
-if __name__ == '__main__':
-    # Puerto para desarrollo local o variable de entorno para producción
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('ENVIRONMENT', 'development') != 'production'
     
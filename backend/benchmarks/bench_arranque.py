@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# backend/benchmarks/bench_arranque.py - Tiempo de arranque en frío y memoria por worker
+#
+# Uso (desde backend/, Linux: lee /proc):
+#   python -m benchmarks.bench_arranque --workers 4
+#   python -m benchmarks.bench_arranque --workers 4 --sin-preload
+#
+# Mide:
+#   - import_wsgi: tiempo de `import wsgi` en un proceso nuevo (sin tocar la base)
+#   - init_db: tiempo del comando `flask --app app init-db` (se corre una vez por deploy)
+#   - gunicorn: tiempo hasta el primer 200 y memoria de cada worker después de calentar.
+#     PSS reparte las páginas compartidas entre procesos; USS es lo exclusivo del worker.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from benchmarks.common import BACKEND_DIR, preparar_entorno, emitir, metadatos
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Arranque en frío y memoria por worker')
+    parser.add_argument('--db', default='sqlite:////tmp/supermercado_bench_arranque.db')
+    parser.add_argument('--repeticiones', type=int, default=5, help='imports en frío a promediar')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--puerto', type=int, default=5099)
+    parser.add_argument('--requests', type=int, default=200, help='requests de calentamiento')
+    parser.add_argument('--sin-preload', action='store_true', help='cada worker importa la app')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    return parser.parse_args()
+
+def _medir_import(env):
+    codigo = 'import time; t = time.perf_counter(); import wsgi; print(time.perf_counter() - t)'
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(salida.strip().splitlines()[-1])
+
+def _memoria(pid):
+    """{'rss_mb', 'pss_mb', 'uss_mb'} desde /proc/<pid>/smaps_rollup"""
+    campos = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == 'kB':
+                campos[partes[0].rstrip(':')] = int(partes[1])
+    uss = campos.get('Private_Clean', 0) + campos.get('Private_Dirty', 0)
+    return {'rss_mb': round(campos['Rss'] / 1024, 1), 'pss_mb': round(campos['Pss'] / 1024, 1),
+            'uss_mb': round(uss / 1024, 1)}
+
+def _hijos(pid):
+    hijos = []
+    for entrada in os.listdir('/proc'):
+        if entrada.isdigit():
+            try:
+                with open(f'/proc/{entrada}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        hijos.append(int(entrada))
+            except (OSError, IndexError, ValueError):
+                continue
+    return hijos
+
+def _esperar(url, limite=30):
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as r:
+                if r.status == 200:
+                    return time.perf_counter() - inicio
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'{url} no respondió en {limite}s')
+
+def main():
+    args = parse_args()
+    preparar_entorno(args.db)
+    env = dict(os.environ)
+
+    imports = [_medir_import(env) for _ in range(args.repeticiones)]
+
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=BACKEND_DIR, env=env,
+                   capture_output=True, check=True)
+    init_db_s = time.perf_counter() - inicio
+
+    env_gunicorn = dict(env, PORT=str(args.puerto), WEB_CONCURRENCY=str(args.workers),
+                        GUNICORN_PRELOAD='false' if args.sin_preload else 'true',
+                        INIT_DB_AL_ARRANCAR='false')  # init-db ya se midió aparte
+    inicio = time.perf_counter()
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=BACKEND_DIR, env=env_gunicorn,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{args.puerto}'
+        primer_200 = _esperar(f'{base}/api/productos/?per_page=1')
+        for i in range(args.requests):
+            urllib.request.urlopen(f'{base}/api/productos/?per_page=20&page={i % 5 + 1}').read()
+        time.sleep(0.5)
+        workers = [_memoria(pid) for pid in _hijos(master.pid)]
+        memoria_master = _memoria(master.pid)
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+    resultado = {
+        'benchmark': 'arranque_y_memoria',
+        'parametros': vars(args),
+        'import_wsgi_s': {'media': round(statistics.fmean(imports), 3), 'min': round(min(imports), 3)},
+        'init_db_s': round(init_db_s, 3),
+        'gunicorn': {
+            'preload': not args.sin_preload,
+            'primer_200_s': round(primer_200, 3),
+            'master': memoria_master,
+            'workers': workers,
+            'pss_total_mb': round(memoria_master['pss_mb'] + sum(w['pss_mb'] for w in workers), 1),
+            'uss_medio_worker_mb': round(statistics.fmean(w['uss_mb'] for w in workers), 1) if workers else None
+        },
+        'entorno': metadatos()
+    }
+    emitir(resultado, args.salida)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# backend/benchmarks/bench_login.py - Benchmark de logins concurrentes (POST /api/auth/login)
+#
+# Uso (desde backend/):
+#   python -m benchmarks.bench_login --clientes 64 --logins 2000
+#   python -m benchmarks.bench_login --clientes 64 --workers 4 --cola 8 --rondas 10
+#
+# Simula un cambio de turno: muchos cajeros logueándose al mismo tiempo. Reporta
+# throughput y latencias de los logins aceptados y cuántos se rechazaron rápido
+# con 503 porque la cola de hashing estaba llena. También verifica que un hash
+# heredado de werkzeug se convierte a bcrypt en el primer login.
+import argparse
+import os
+import threading
+import time
+from benchmarks.common import preparar_entorno, resumen_latencias, emitir, metadatos
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark de logins concurrentes')
+    parser.add_argument('--db', default='sqlite:////tmp/supermercado_bench_login.db')
+    parser.add_argument('--usuarios', type=int, default=50, help='cajeros registrados')
+    parser.add_argument('--clientes', type=int, default=32, help='hilos logueándose a la vez')
+    parser.add_argument('--logins', type=int, default=1000, help='logins totales')
+    parser.add_argument('--rondas', type=int, default=12, help='BCRYPT_LOG_ROUNDS')
+    parser.add_argument('--workers', type=int, default=0, help='AUTH_HASH_WORKERS (0 = uno por CPU)')
+    parser.add_argument('--cola', type=int, default=32, help='AUTH_HASH_COLA')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # La configuración se lee al importar la app
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rondas)
+    os.environ['AUTH_HASH_WORKERS'] = str(args.workers)
+    os.environ['AUTH_HASH_COLA'] = str(args.cola)
+    preparar_entorno(args.db)
+
+    from app import create_app
+    from utils.db import db, init_db
+    from utils.auth import hashear_password
+    from models.usuario import Usuario
+    from werkzeug.security import generate_password_hash
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        Usuario.query.delete()
+        hash_comun = hashear_password('cajero123')
+        db.session.add_all([Usuario(f'cajero{i}', hash_comun) for i in range(args.usuarios)])
+        db.session.add(Usuario('heredado', generate_password_hash('cajero123')))
+        db.session.commit()
+
+    # Rehash transparente del hash heredado
+    client = app.test_client()
+    r = client.post('/api/auth/login', json={'username': 'heredado', 'password': 'cajero123'})
+    with app.app_context():
+        convertido = Usuario.query.filter_by(username='heredado').one().password.startswith('$2')
+
+    por_cliente = args.logins // args.clientes
+    latencias, rechazos, estados = [], [], {}
+    lock = threading.Lock()
+    barrera = threading.Barrier(args.clientes)
+
+    def cliente(n):
+        client = app.test_client()
+        locales, rechazados, codigos = [], [], {}
+        barrera.wait()
+        for i in range(por_cliente):
+            inicio = time.perf_counter()
+            r = client.post('/api/auth/login', json={
+                'username': f'cajero{(n + i) % args.usuarios}',
+                'password': 'cajero123'
+            })
+            (locales if r.status_code == 200 else rechazados).append(time.perf_counter() - inicio)
+            codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+        with lock:
+            latencias.extend(locales)
+            rechazos.extend(rechazados)
+            for codigo, cantidad in codigos.items():
+                estados[codigo] = estados.get(codigo, 0) + cantidad
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(args.clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    resultado = {
+        'benchmark': 'login_concurrente',
+        'db': args.db.split(':', 1)[0],
+        'parametros': vars(args),
+        'cpus': os.cpu_count(),
+        'aceptados': resumen_latencias(latencias, duracion),
+        'rechazados_503': resumen_latencias(rechazos, duracion) if rechazos else None,
+        'estados_http': {str(k): v for k, v in sorted(estados.items())},
+        'rehash_hash_heredado': {'login': r.status_code, 'convertido_a_bcrypt': convertido},
+        'entorno': metadatos()
+    }
+    emitir(resultado, args.salida)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# backend/benchmarks/common.py - Utilidades compartidas por los benchmarks
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MARCAS = ['La Serenísima', 'Ledesma', 'Arcor', 'Molinos', 'Cañuelas', 'Marolio', 'Quilmes', 'Sancor',
+          'Matarazzo', 'Knorr', 'Bagley', 'Natura', 'Cocinero', 'Chango', 'Hellmann\'s', 'Paladini']
+PRODUCTOS = ['Leche entera', 'Azúcar blanca', 'Café molido', 'Yerba mate', 'Jamón cocido', 'Fideos tirabuzón',
+             'Aceite de girasol', 'Harina leudante', 'Galletitas de limón', 'Dulce de leche', 'Té de manzanilla',
+             'Arroz largo fino', 'Queso rallado', 'Mayonesa', 'Puré de tomate', 'Lentejas', 'Garbanzos',
+             'Pan de molde', 'Manteca', 'Mermelada de durazno', 'Cerveza rubia', 'Gaseosa cola', 'Jugo de naranja']
+CATEGORIAS = ['Almacén', 'Lácteos', 'Bebidas', 'Fiambrería', 'Panadería', 'Limpieza', 'Perfumería']
+LOTE_SIEMBRA = 10_000
+
+def preparar_entorno(database_url):
+    """Configura las variables de entorno antes de importar la app"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('ENVIRONMENT', 'production')  # sin prints de rutas
+    os.environ.setdefault('UPLOAD_FOLDER', os.path.join(BACKEND_DIR, 'uploads'))
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+def sembrar_catalogo(db, Producto, cantidad, semilla=42):
+    """Recrea las tablas y carga `cantidad` productos sintéticos con nombres en español"""
+    from sqlalchemy import insert, text
+    from utils.db import init_db
+    if db.engine.dialect.name == 'sqlite':
+        # La tabla FTS no es parte del metadata: se reconstruye en init_db
+        db.session.execute(text('DROP TABLE IF EXISTS productos_fts'))
+        db.session.commit()
+    db.drop_all()
+    db.create_all()
+    rng = random.Random(semilla)
+    hoy = datetime.now(timezone.utc).date().toordinal()
+    lote = []
+    for i in range(cantidad):
+        base = rng.choice(PRODUCTOS)
+        marca = rng.choice(MARCAS)
+        lote.append({
+            'nombre': f'{base} {marca} {rng.randint(100, 2000)}g',
+            'descripcion': f'{base} marca {marca}, presentación {i}',
+            'precio': round(rng.uniform(100, 5000), 2),
+            'stock_minimo': rng.randint(5, 20),
+            'stock_actual': rng.randint(0, 200),
+            'categoria': rng.choice(CATEGORIAS),
+            'fecha_vencimiento': datetime.fromordinal(hoy + rng.randint(-30, 365)).date()
+        })
+        if len(lote) == LOTE_SIEMBRA:
+            db.session.execute(insert(Producto), lote)
+            lote = []
+    if lote:
+        db.session.execute(insert(Producto), lote)
+    db.session.commit()
+    init_db()  # índices de búsqueda y usuario admin
+
+def token_admin():
+    """Token JWT con los claims del usuario admin (lo crea init_db si no existe)"""
+    from flask_jwt_extended import create_access_token
+    from models.usuario import Usuario
+    from utils.auth import claims_usuario
+    from utils.db import init_db
+    admin = Usuario.query.filter_by(username='admin').first()
+    if admin is None:
+        init_db()
+        admin = Usuario.query.filter_by(username='admin').one()
+    return create_access_token(identity=str(admin.id), additional_claims=claims_usuario(admin))
+
+def metadatos():
+    """Contexto de la corrida para comparar resultados entre versiones"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'plataforma': platform.platform()
+    }
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, int(round(p / 100.0 * len(valores) + 0.5)) - 1))
+    return valores[k]
+
+def resumen_latencias(latencias, duracion):
+    """Throughput y percentiles (en milisegundos) de una serie de latencias en segundos"""
+    ordenadas = sorted(latencias)
+    return {
+        'requests': len(ordenadas),
+        'duracion_s': round(duracion, 3),
+        'throughput_rps': round(len(ordenadas) / duracion, 1) if duracion else 0.0,
+        'p50_ms': round(percentil(ordenadas, 50) * 1000, 2),
+        'p95_ms': round(percentil(ordenadas, 95) * 1000, 2),
+        'p99_ms': round(percentil(ordenadas, 99) * 1000, 2),
+        'media_ms': round(statistics.fmean(ordenadas) * 1000, 2) if ordenadas else 0.0
+    }
+
+def cronometrar(funcion):
+    """Ejecuta funcion() y retorna (resultado, segundos)"""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+def emitir(resultado, salida=None):
+    """Imprime el resultado como JSON y opcionalmente lo guarda en un archivo"""
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    print(texto)
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
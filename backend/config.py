@@ -25,25 +25,96 @@ class Config:
         'pool_recycle': 300,
         'pool_pre_ping': True,
         'pool_timeout': 20,
-        'max_overflow': 0
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 0))
     }
     
+    # ✅ Réplicas de lectura: DATABASE_REPLICA_URLS="postgresql://...,postgresql://..."
+    # Cada una es un bind "replica_N" con su propio pool
+    SQLALCHEMY_BINDS = {
+        f'replica_{i}': {
+            'url': url.strip().replace('postgres://', 'postgresql://', 1),
+            'pool_size': int(os.environ.get('DB_REPLICA_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_REPLICA_MAX_OVERFLOW', 5))
+        }
+        for i, url in enumerate(u for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip())
+    }
+    # Segundos que un cliente lee de la primaria después de escribir (read-your-writes)
+    REPLICA_SEGUNDOS_PRIMARIA = int(os.environ.get('REPLICA_SEGUNDOS_PRIMARIA', 5))
+    
     # ✅ JWT y seguridad
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', "tu_clave_secreta")
     SECRET_KEY = os.environ.get('SECRET_KEY', 'clave-secreta-para-flask-sessions')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Segundos que un worker puede tardar en ver una revocación de tokens (cambio de rol, logout-todos)
+    AUTH_REVOCACION_TTL = int(os.environ.get('AUTH_REVOCACION_TTL', 30))
+    # Costo de bcrypt: al cambiarlo, los hashes se actualizan en el próximo login de cada usuario
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Pool de hashing: hilos (por defecto, uno por CPU) y logins en espera antes de responder 503
+    AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS', 0)) or None
+    AUTH_HASH_COLA = int(os.environ.get('AUTH_HASH_COLA', 32))
     
     # ✅ Configuración para subir imágenes
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(BASE_DIR, 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB máximo
+    # Delegar el envío de /uploads al proxy (nginx X-Accel / Apache X-Sendfile)
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    # Variantes de imágenes: hilos de procesamiento y trabajos en espera como máximo
+    IMAGEN_WORKERS = int(os.environ.get('IMAGEN_WORKERS', 2))
+    IMAGEN_COLA = int(os.environ.get('IMAGEN_COLA', 64))
+    # Importación masiva de productos: el archivo se procesa en streaming
+    IMPORT_MAX_CONTENT_LENGTH = int(os.environ.get('IMPORT_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    IMPORT_TAMANO_LOTE = int(os.environ.get('IMPORT_TAMANO_LOTE', 5000))
+    
+    # Caché de respuestas del catálogo (por proceso, LRU)
+    CATALOGO_CACHE_ENTRADAS = int(os.environ.get('CATALOGO_CACHE_ENTRADAS', 512))
+    CATALOGO_CACHE_BYTES = int(os.environ.get('CATALOGO_CACHE_BYTES', 64 * 1024 * 1024))
+    # Atraso máximo del stock en el catálogo cacheado: las ventas lo renuevan una vez por ventana
+    CATALOGO_STOCK_SEGUNDOS = int(os.environ.get('CATALOGO_STOCK_SEGUNDOS', 5))
+    
+    # Resumen del dashboard: segundos de caché compartida y ventana de "por vencer"
+    ESTADISTICAS_TTL = int(os.environ.get('ESTADISTICAS_TTL', 30))
+    ESTADISTICAS_DIAS_VENCIMIENTO = int(os.environ.get('ESTADISTICAS_DIAS_VENCIMIENTO', 7))
+    
+    # Ventas cargadas sin conexión: máximo por lote y antigüedad aceptada de su fecha
+    VENTAS_LOTE_MAX = int(os.environ.get('VENTAS_LOTE_MAX', 500))
+    VENTAS_OFFLINE_MAX_DIAS = int(os.environ.get('VENTAS_OFFLINE_MAX_DIAS', 7))
+    # Zona de la tienda para los agregados de ventas (qué es "hoy", horas del mapa de calor).
+    # Cambiarla requiere `flask --app app reconstruir-analitica`
+    VENTAS_ZONA_HORARIA = os.environ.get('VENTAS_ZONA_HORARIA', 'UTC')
+    
+    # Reposición (utils/reposicion.py): días de historia, factor de suavizado exponencial,
+    # plazo de entrega del proveedor, días entre pedidos y nivel de servicio buscado
+    REPOSICION_DIAS_HISTORIA = int(os.environ.get('REPOSICION_DIAS_HISTORIA', 90))
+    REPOSICION_SUAVIZADO = float(os.environ.get('REPOSICION_SUAVIZADO', 0.1))
+    REPOSICION_PLAZO_DIAS = float(os.environ.get('REPOSICION_PLAZO_DIAS', 3))
+    REPOSICION_PERIODO_DIAS = float(os.environ.get('REPOSICION_PERIODO_DIAS', 7))
+    REPOSICION_NIVEL_SERVICIO = float(os.environ.get('REPOSICION_NIVEL_SERVICIO', 0.95))
+    
+    # Eventos en vivo (SSE): cada cuánto se revisan cambios, ventana para juntar ráfagas,
+    # latido para proxies, duración máxima de una conexión, conexiones por proceso (cada
+    # una con su hilo, ver gunicorn.conf.py) y vigencia del token para abrir el canal
+    EVENTOS_INTERVALO = float(os.environ.get('EVENTOS_INTERVALO', 1.0))
+    EVENTOS_VENTANA = float(os.environ.get('EVENTOS_VENTANA', 0.25))
+    EVENTOS_LATIDO = int(os.environ.get('EVENTOS_LATIDO', 15))
+    EVENTOS_DURACION_MAX = int(os.environ.get('EVENTOS_DURACION_MAX', 300))
+    EVENTOS_MAX_CLIENTES = int(os.environ.get('EVENTOS_MAX_CLIENTES', 64))
+    EVENTOS_TOKEN_SEGUNDOS = int(os.environ.get('EVENTOS_TOKEN_SEGUNDOS', 60))
     
     # ✅ Configuración de entorno
     ENVIRONMENT = os.environ.get('ENVIRONMENT', 'development')
     DEBUG = os.environ.get('ENVIRONMENT', 'development') != 'production'
     
+    # ✅ Logging estructurado (JSON, escrito por un hilo de fondo)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')  # Por módulo, ej: "productos=DEBUG,auth=WARNING"
+    LOG_DEBUG_SAMPLE = float(os.environ.get('LOG_DEBUG_SAMPLE', '0.01'))  # Fracción de eventos DEBUG
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+    LOG_FILE = os.environ.get('LOG_FILE')
+    
     @staticmethod
     def init_app(app):
         """Inicialización de la aplicación"""
@@ -1,5 +1,7 @@
 from utils.db import db
-from app import app  # Cambiado de "from backend.app" a "from app"
+from app import create_app  # Cambiado de "from backend.app" a "from app"
+
+app = create_app()
 
 with app.app_context():
     db.drop_all()
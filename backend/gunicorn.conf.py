@@ -0,0 +1,53 @@
+# backend/gunicorn.conf.py - Configuración de gunicorn para producción
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Variables de entorno: PORT, WEB_CONCURRENCY (workers), GUNICORN_THREADS,
+# EVENTOS_MAX_CLIENTES, GUNICORN_TIMEOUT, GUNICORN_PRELOAD, INIT_DB_AL_ARRANCAR.
+# Medir arranque y memoria con: python -m benchmarks.bench_arranque
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Hilos por worker: los requests esperan sobre todo a la base de datos
+worker_class = 'gthread'
+# ✅ Cada conexión de eventos (SSE, /api/eventos) retiene un hilo mientras está abierta:
+#   se suman hilos propios para esas conexiones a los GUNICORN_THREADS de la API, así
+#   las pantallas conectadas no le quitan capacidad. Esos hilos pasan casi todo el
+#   tiempo esperando sobre una Condition (poca CPU y memoria cada uno).
+#   Se fija antes de importar la app, que lee la configuración al importarse.
+eventos_clientes = int(os.environ.setdefault('EVENTOS_MAX_CLIENTES', '64'))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) + eventos_clientes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# ✅ La app se importa una vez en el master; los workers comparten esas páginas (copy-on-write)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+# Reciclar workers de a poco para acotar el crecimiento de memoria
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+def on_starting(server):
+    """
+    Esquema al día en cada deploy (columnas, tablas e índices nuevos, agregados
+    iniciales): una sola vez, en el master, antes de levantar los workers.
+    Con INIT_DB_AL_ARRANCAR=false se corre aparte: flask --app app init-db
+    """
+    if os.environ.get('INIT_DB_AL_ARRANCAR', 'true').lower() != 'true':
+        return
+    from app import app
+    from utils.db import db, init_db
+    with app.app_context():
+        init_db()
+        # Los workers abren sus propias conexiones
+        for engine in db.engines.values():
+            engine.dispose()
+
+def post_fork(server, worker):
+    """Cada worker abre sus propias conexiones: descartar las heredadas del master"""
+    if not server.cfg.preload_app:
+        return
+    from utils.db import db
+    app = server.app.wsgi()  # con preload_app es la app ya creada en el master
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# backend/importar_productos.py - Importación masiva de productos desde la línea de comandos
+#
+# Uso:
+#   python importar_productos.py catalogo.csv
+#   python importar_productos.py proveedor.ndjson --lote 10000
+import argparse
+import json
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description='Importar productos desde CSV o NDJSON (upsert por codigo)')
+    parser.add_argument('archivo', help="ruta del archivo, o '-' para leer de stdin")
+    parser.add_argument('--formato', choices=['csv', 'ndjson'], help='por defecto se detecta por la extensión')
+    parser.add_argument('--lote', type=int, default=5000, help='filas por commit')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+    from utils.importacion import importar_productos, detectar_formato, ImportacionError
+
+    try:
+        formato = args.formato or detectar_formato(args.archivo)
+        with app.app_context():
+            inicio = time.perf_counter()
+            if args.archivo == '-':
+                resumen = importar_productos(sys.stdin.buffer, formato, args.lote)
+            else:
+                with open(args.archivo, 'rb') as stream:
+                    resumen = importar_productos(stream, formato, args.lote)
+            resumen['duracion_s'] = round(time.perf_counter() - inicio, 2)
+    except ImportacionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    return 0 if not resumen['con_error'] else 2
+
+if __name__ == '__main__':
+    sys.exit(main())
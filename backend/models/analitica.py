@@ -0,0 +1,67 @@
+from utils.db import db
+
+# Tablas de agregados de ventas, mantenidas por utils/analitica.py en la misma
+# transacción que registra cada venta. Las horas se guardan en UTC (como
+# Venta.fecha); días y meses son de la zona VENTAS_ZONA_HORARIA.
+#
+# Las tablas por hora tienen una columna `shard`: todas las cajas suman en la
+# hora en curso, así que cada venta elige una de varias filas para esa hora y
+# las consultas suman los shards. Sin eso todas las ventas harían cola sobre
+# la misma fila hasta su commit.
+
+class VentasHora(db.Model):
+    """Totales de ticket por hora: ventas, unidades e importes"""
+    __tablename__ = 'ventas_hora'
+
+    hora = db.Column(db.DateTime, primary_key=True)  # UTC, truncada a la hora
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)
+    ventas = db.Column(db.Integer, nullable=False)
+    unidades = db.Column(db.Integer, nullable=False)
+    subtotal = db.Column(db.Numeric(14, 2), nullable=False)
+    total = db.Column(db.Numeric(14, 2), nullable=False)
+
+class VentasHoraCategoria(db.Model):
+    """Unidades e importe (sin impuestos) por hora y categoría"""
+    __tablename__ = 'ventas_hora_categoria'
+
+    hora = db.Column(db.DateTime, primary_key=True)
+    categoria = db.Column(db.String(50), primary_key=True)  # '' = sin categoría
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)
+    unidades = db.Column(db.Integer, nullable=False)
+    importe = db.Column(db.Numeric(14, 2), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_ventas_hora_categoria_categoria_hora', 'categoria', 'hora'),
+    )
+
+class VentasDiaProducto(db.Model):
+    """Unidades e importe por día y producto (la categoría es la que tenía al venderse)"""
+    __tablename__ = 'ventas_dia_producto'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    producto_id = db.Column(db.Integer, primary_key=True)
+    categoria = db.Column(db.String(50), nullable=False)
+    unidades = db.Column(db.Integer, nullable=False)
+    importe = db.Column(db.Numeric(14, 2), nullable=False)
+
+class VentasMesProducto(db.Model):
+    """Lo mismo por mes (fecha = día 1): los rangos largos leen meses en lugar de días"""
+    __tablename__ = 'ventas_mes_producto'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    producto_id = db.Column(db.Integer, primary_key=True)
+    categoria = db.Column(db.String(50), nullable=False)
+    unidades = db.Column(db.Integer, nullable=False)
+    importe = db.Column(db.Numeric(14, 2), nullable=False)
+
+class ClienteVentas(db.Model):
+    """Un registro por cliente identificado (teléfono, o nombre si no dejó teléfono)"""
+    __tablename__ = 'clientes_ventas'
+
+    clave = db.Column(db.String(150), primary_key=True)
+    nombre = db.Column(db.String(150))
+    telefono = db.Column(db.String(50))
+    primera_compra = db.Column(db.DateTime, nullable=False)
+    ultima_compra = db.Column(db.DateTime, nullable=False)
+    compras = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Numeric(14, 2), nullable=False)
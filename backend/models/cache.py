@@ -0,0 +1,9 @@
+from utils.db import db
+
+class CacheCompartido(db.Model):
+    """Valores calculados compartidos entre workers, con vencimiento (caché de TTL corto)"""
+    __tablename__ = 'cache_compartido'
+
+    clave = db.Column(db.String(50), primary_key=True)
+    datos = db.Column(db.Text, nullable=False)  # JSON
+    expira = db.Column(db.DateTime, nullable=False)
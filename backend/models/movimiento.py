@@ -0,0 +1,42 @@
+from datetime import datetime
+from utils.db import db
+
+# BIGINT en PostgreSQL; en SQLite el autoincremento solo funciona con INTEGER
+ID_GRANDE = db.BigInteger().with_variant(db.Integer, 'sqlite')
+
+class MovimientoStock(db.Model):
+    """
+    Libro de movimientos de stock, solo se agregan filas. La cantidad tiene
+    signo: ventas, mermas y bajas restan; ingresos suman; ajustes según el conteo.
+    """
+    __tablename__ = 'movimientos_stock'
+    __table_args__ = (db.Index('ix_movimientos_stock_producto_fecha', 'producto_id', 'fecha'),)
+
+    id = db.Column(ID_GRANDE, primary_key=True)
+    # Sin FK: el historial sobrevive a la baja del producto
+    producto_id = db.Column(db.Integer, nullable=False)
+    # Momento en que se registró (UTC); las ventas offline se registran al sincronizar
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    tipo = db.Column(db.String(20), nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False)
+    referencia = db.Column(db.String(64))  # ej. 'venta:123'
+    usuario_id = db.Column(db.Integer)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'fecha': self.fecha.isoformat(),
+            'tipo': self.tipo,
+            'cantidad': self.cantidad,
+            'referencia': self.referencia,
+            'usuario_id': self.usuario_id
+        }
+
+class SnapshotStock(db.Model):
+    """Stock de un producto al cierre `fecha`: punto de partida de las consultas históricas"""
+    __tablename__ = 'snapshots_stock'
+
+    producto_id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
@@ -1,19 +1,33 @@
+from sqlalchemy import event, inspect
 from utils.db import db
+from utils.busqueda import texto_busqueda
+
+def _busqueda_por_defecto(context):
+    """Default a nivel Core: también cubre inserts masivos (executemany)"""
+    params = context.get_current_parameters()
+    return texto_busqueda(params.get('nombre'), params.get('descripcion'))
 
 class Producto(db.Model):
     __tablename__ = 'productos'
 
     id = db.Column(db.Integer, primary_key=True)
+    codigo = db.Column(db.String(64), unique=True, index=True)  # SKU / código de barras del proveedor
     nombre = db.Column(db.String(150), nullable=False)
     descripcion = db.Column(db.String(255))
     precio = db.Column(db.Numeric(10, 2), nullable=False)
     stock_minimo = db.Column(db.Integer, nullable=False)
     stock_actual = db.Column(db.Integer, nullable=False)
-    fecha_vencimiento = db.Column(db.Date)
+    fecha_vencimiento = db.Column(db.Date, index=True)  # rangos de vencimiento (utils/vencimientos.py)
     categoria = db.Column(db.String(50))
     imagen_url = db.Column(db.Text)  # ✅ nuevo campo para imágenes
+    # Variantes redimensionadas + WebP, generadas en segundo plano (None mientras se procesan)
+    imagenes = db.Column(db.JSON)
+    # Nombre + descripción sin acentos y en minúsculas, indexado para búsqueda
+    busqueda_normalizada = db.Column(db.Text, default=_busqueda_por_defecto)
+    # Versión de sincronización del POS del último cambio (ver utils/sync_pos.py)
+    version_sync = db.Column(db.BigInteger, index=True)
 
-    def __init__(self, nombre, descripcion, precio, stock_minimo, stock_actual, fecha_vencimiento=None, categoria="Otros", imagen_url=None):
+    def __init__(self, nombre, descripcion, precio, stock_minimo, stock_actual, fecha_vencimiento=None, categoria="Otros", imagen_url=None, codigo=None):
         self.nombre = nombre
         self.descripcion = descripcion
         self.precio = precio
@@ -22,10 +36,12 @@ class Producto(db.Model):
         self.fecha_vencimiento = fecha_vencimiento
         self.categoria = categoria
         self.imagen_url = imagen_url  # ✅ constructor actualizado
+        self.codigo = codigo
 
     def to_dict(self):
         return {
             'id': self.id,
+            'codigo': self.codigo,
             'nombre': self.nombre,
             'descripcion': self.descripcion,
             'precio': float(self.precio),
@@ -33,5 +49,20 @@ class Producto(db.Model):
             'stock_actual': self.stock_actual,
             'fecha_vencimiento': str(self.fecha_vencimiento) if self.fecha_vencimiento else None,
             'categoria': self.categoria,
-            'imagen_url': self.imagen_url  # ✅ devolvemos la imagen
+            'imagen_url': self.imagen_url,  # ✅ devolvemos la imagen
+            'imagenes': self.imagenes
         }
+
+class ProductoEliminado(db.Model):
+    """Baja de un producto, para que las cajas la reciban en el próximo delta"""
+    __tablename__ = 'productos_eliminados'
+
+    producto_id = db.Column(db.Integer, primary_key=True)
+    version_sync = db.Column(db.BigInteger, nullable=False, index=True)
+
+@event.listens_for(Producto, 'before_update')
+def _actualizar_busqueda(mapper, connection, target):
+    """Mantener la columna de búsqueda al editar nombre o descripción"""
+    estado = inspect(target)
+    if estado.attrs.nombre.history.has_changes() or estado.attrs.descripcion.history.has_changes():
+        target.busqueda_normalizada = texto_busqueda(target.nombre, target.descripcion)
@@ -0,0 +1,17 @@
+from utils.db import db
+
+class SugerenciaReposicion(db.Model):
+    """
+    Parámetros de reposición de cada producto, calculados en lote por
+    utils/reposicion.py. La cantidad a pedir se obtiene al consultar, contra
+    el stock del momento.
+    """
+    __tablename__ = 'sugerencias_reposicion'
+
+    producto_id = db.Column(db.Integer, primary_key=True)
+    demanda_diaria = db.Column(db.Float, nullable=False)  # unidades/día, suavizada
+    desvio_diario = db.Column(db.Float, nullable=False)
+    dias_con_ventas = db.Column(db.Integer, nullable=False)  # en la ventana de historia
+    stock_seguridad = db.Column(db.Integer, nullable=False)
+    punto_reorden = db.Column(db.Integer, nullable=False)  # pedir con stock_actual <= esto
+    stock_objetivo = db.Column(db.Integer, nullable=False)  # hasta dónde pedir
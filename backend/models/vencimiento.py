@@ -0,0 +1,22 @@
+from utils.db import db
+
+class ResumenVencimiento(db.Model):
+    """
+    Vista precalculada: productos por fecha de vencimiento y categoría.
+    La mantiene utils/vencimientos.py (refresco incremental nocturno).
+    """
+    __tablename__ = 'resumen_vencimientos'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    categoria = db.Column(db.String(50), primary_key=True)  # '' = sin categoría
+    productos = db.Column(db.Integer, nullable=False)
+    con_stock = db.Column(db.Integer, nullable=False)
+    unidades = db.Column(db.Integer, nullable=False)
+    valor = db.Column(db.Numeric(14, 2), nullable=False)  # precio * stock
+
+class VencimientoProducto(db.Model):
+    """Fecha con la que cada producto entró al resumen: al cambiarla se sabe qué día recalcular"""
+    __tablename__ = 'vencimientos_producto'
+
+    producto_id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
@@ -0,0 +1,58 @@
+from utils.db import db
+from datetime import datetime
+
+class Venta(db.Model):
+    __tablename__ = 'ventas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    cliente = db.Column(db.String(150))
+    telefono = db.Column(db.String(50))
+    metodo_pago = db.Column(db.String(20), nullable=False, default='efectivo')
+    subtotal = db.Column(db.Numeric(12, 2), nullable=False)
+    impuestos = db.Column(db.Numeric(12, 2), nullable=False)
+    total = db.Column(db.Numeric(12, 2), nullable=False)
+    monto_recibido = db.Column(db.Numeric(12, 2))
+    cambio = db.Column(db.Numeric(12, 2))
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+    # Generada por la caja: reintentar el envío de la misma venta no la duplica
+    clave_idempotencia = db.Column(db.String(64), unique=True, index=True)
+
+    items = db.relationship('VentaItem', backref='venta', lazy='selectin', cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'cliente': self.cliente,
+            'telefono': self.telefono,
+            'metodo_pago': self.metodo_pago,
+            'subtotal': float(self.subtotal),
+            'impuestos': float(self.impuestos),
+            'total': float(self.total),
+            'monto_recibido': float(self.monto_recibido) if self.monto_recibido is not None else None,
+            'cambio': float(self.cambio) if self.cambio is not None else None,
+            'usuario_id': self.usuario_id,
+            'clave_idempotencia': self.clave_idempotencia,
+            'items': [item.to_dict() for item in self.items]
+        }
+
+class VentaItem(db.Model):
+    __tablename__ = 'venta_items'
+
+    id = db.Column(db.Integer, primary_key=True)
+    venta_id = db.Column(db.Integer, db.ForeignKey('ventas.id', ondelete='CASCADE'), nullable=False, index=True)
+    # Sin FK a productos (como movimientos_stock): el historial de ventas sobrevive a la baja
+    producto_id = db.Column(db.Integer, nullable=False, index=True)
+    cantidad = db.Column(db.Integer, nullable=False)
+    precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
+    subtotal = db.Column(db.Numeric(12, 2), nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'cantidad': self.cantidad,
+            'precio_unitario': float(self.precio_unitario),
+            'subtotal': float(self.subtotal)
+        }
@@ -0,0 +1,8 @@
+from utils.db import db
+
+class VersionCatalogo(db.Model):
+    """Contadores de versión compartidos entre workers (uno por clave de caché)"""
+    __tablename__ = 'versiones_catalogo'
+
+    clave = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
@@ -0,0 +1,128 @@
+# backend/routes/analitica_routes.py - Analítica de ventas sobre los agregados por hora / día / mes
+from datetime import date, datetime, timedelta
+from flask import Blueprint, request, jsonify
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils import analitica
+from utils.serializacion import respuesta_json
+from utils.db import db
+from utils.logs import get_logger
+
+analitica_bp = Blueprint('analitica', __name__)
+log = get_logger('analitica')
+
+DIAS_POR_DEFECTO = 30
+LIMITE_MAXIMO = 100
+
+class ParametroInvalidoError(ValueError):
+    """Parámetro de consulta inválido (400)"""
+
+def _fecha(nombre, defecto=None):
+    valor = request.args.get(nombre)
+    if not valor:
+        return defecto
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ParametroInvalidoError(f'{nombre} debe tener el formato YYYY-MM-DD')
+
+def _periodo():
+    """?desde= / ?hasta= (días locales, inclusive); por defecto los últimos 30 días"""
+    hasta = _fecha('hasta') or datetime.now(analitica.zona()).date()
+    desde = _fecha('desde') or hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+    if desde > hasta:
+        raise ParametroInvalidoError('desde no puede ser posterior a hasta')
+    return desde, hasta
+
+def _opcion(nombre, validas, defecto):
+    valor = request.args.get(nombre, defecto)
+    if valor not in validas:
+        raise ParametroInvalidoError(f'{nombre} debe ser uno de {sorted(validas)}')
+    return valor
+
+@analitica_bp.route('/hoy', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin', 'cajero')
+def get_hoy():
+    """Total de hoy, ventas por hora y el mismo día de la semana pasada hasta la misma hora"""
+    try:
+        return respuesta_json(analitica.hoy())
+    except Exception as e:
+        log.exception('Error en ventas de hoy')
+        return jsonify({'error': str(e)}), 500
+
+@analitica_bp.route('/top-productos', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin')
+def get_top_productos():
+    """?desde=&hasta=&categoria=&orden=unidades|importe&limite="""
+    try:
+        desde, hasta = _periodo()
+        orden = _opcion('orden', analitica.ORDENES, 'unidades')
+        limite = max(1, min(request.args.get('limite', 10, type=int), LIMITE_MAXIMO))
+        productos = analitica.top_productos(desde, hasta, request.args.get('categoria'), orden, limite)
+        return respuesta_json({
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'orden': orden,
+            'productos': productos
+        })
+    except ParametroInvalidoError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error en productos más vendidos')
+        return jsonify({'error': str(e)}), 500
+
+@analitica_bp.route('/mapa-calor', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin')
+def get_mapa_calor():
+    """
+    Día de la semana × hora local. ?medida=total|ventas|unidades sin categoría;
+    con ?categoria=, medida=importe|unidades.
+    """
+    try:
+        desde, hasta = _periodo()
+        categoria = request.args.get('categoria')
+        if categoria is None:
+            medida = _opcion('medida', analitica.MEDIDAS, 'total')
+        else:
+            medida = _opcion('medida', analitica.MEDIDAS_CATEGORIA, 'importe')
+        return respuesta_json(analitica.mapa_calor(desde, hasta, categoria, medida))
+    except ParametroInvalidoError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error en mapa de calor de ventas')
+        return jsonify({'error': str(e)}), 500
+
+@analitica_bp.route('/comparar', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin')
+def get_comparar():
+    """?desde=&hasta= contra ?contra_desde=&contra_hasta= (por defecto, el período anterior)"""
+    try:
+        desde, hasta = _periodo()
+        contra_desde, contra_hasta = _fecha('contra_desde'), _fecha('contra_hasta')
+        if (contra_desde is None) != (contra_hasta is None):
+            raise ParametroInvalidoError('contra_desde y contra_hasta van juntos')
+        if contra_desde is not None and contra_desde > contra_hasta:
+            raise ParametroInvalidoError('contra_desde no puede ser posterior a contra_hasta')
+        return respuesta_json(analitica.comparar(desde, hasta, contra_desde, contra_hasta))
+    except ParametroInvalidoError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error comparando períodos de ventas')
+        return jsonify({'error': str(e)}), 500
+
+@analitica_bp.route('/reconstruir', methods=['POST'])
+@rol_requerido('admin')
+def post_reconstruir():
+    """Rehace los agregados desde las ventas (con las cajas cerradas; ver utils/analitica.py)"""
+    try:
+        resultado = analitica.reconstruir()
+        log.info('Agregados de ventas reconstruidos', extra={'datos': resultado})
+        return jsonify(resultado)
+    except Exception as e:
+        log.exception('Error reconstruyendo agregados de ventas')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
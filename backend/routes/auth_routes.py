@@ -1,26 +1,47 @@
 from flask import Blueprint, request, jsonify
-from utils.auth import bcrypt
-from flask_jwt_extended import create_access_token
-from models.usuario import Usuario
+from sqlalchemy import select
+from utils.auth import (hashear_password, verificar_password, HashingSaturadoError,
+                        claims_usuario, revocar_tokens, rol_requerido)
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from models.usuario import Usuario, ROLES
 from utils.db import db
+from utils.logs import get_logger
 
 auth_bp = Blueprint('auth', __name__)
+log = get_logger('auth')
+
+# bcrypt solo usa los primeros 72 bytes (y bcrypt>=5 rechaza el resto)
+MAX_BYTES_PASSWORD = 72
+
+def _saturado(e):
+    respuesta = jsonify({"error": str(e)})
+    respuesta.headers['Retry-After'] = '1'
+    return respuesta, 503
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.json
     username = data['username']
-    password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
 
     # ❌ Bloquear registros como admin desde cualquier fuente
     if data.get('rol') == 'admin':
         return jsonify({"error": "No podés registrarte como admin"}), 403
 
+    if len(data['password'].encode('utf-8')) > MAX_BYTES_PASSWORD:
+        return jsonify({"error": f"La contraseña no puede superar {MAX_BYTES_PASSWORD} bytes"}), 400
+
     # ✅ Si no se especifica rol, se asigna 'cajero' por defecto
     rol = data.get('rol', 'cajero')
 
     if Usuario.query.filter_by(username=username).first():
         return jsonify({"error": "Usuario ya existe"}), 400
+    db.session.commit()  # liberar la conexión mientras se hashea
+
+    # ✅ El hash (lo caro) recién después de las validaciones baratas
+    try:
+        password = hashear_password(data['password'])
+    except HashingSaturadoError as e:
+        return _saturado(e)
 
     nuevo = Usuario(username=username, password=password, rol=rol)
     db.session.add(nuevo)
@@ -34,18 +55,68 @@ def login():
     password = data['password']
 
     usuario = Usuario.query.filter_by(username=username).first()
+    hash_actual = usuario.password if usuario else None
+    # ✅ Liberar la conexión antes del hash: no retenerla del pool durante ~100ms de CPU
+    db.session.commit()
 
-    print("🟡 Username recibido:", username)
-    print("🟡 Password recibido:", password)
-    if usuario:
-        print("🟢 Usuario encontrado:", usuario.username)
-        print("🔐 Hash guardado:", usuario.password)
-        print("✅ ¿Password coincide?:", bcrypt.check_password_hash(usuario.password, password))
-    else:
-        print("🔴 Usuario no encontrado")
+    try:
+        valida, necesita_rehash = verificar_password(hash_actual, password) if usuario else (False, False)
+    except HashingSaturadoError as e:
+        log.warning('Login rechazado: hashing saturado', extra={'datos': {'username': username}})
+        return _saturado(e)
 
-    if not usuario or not bcrypt.check_password_hash(usuario.password, password):
+    # ✅ Nunca registrar la contraseña ni el hash
+    if not valida:
+        log.warning('Login fallido', extra={'datos': {'username': username, 'usuario_existe': usuario is not None}})
         return jsonify({"error": "Credenciales incorrectas"}), 401
 
-    token = create_access_token(identity=str(usuario.id))
+    # ✅ Hash heredado o con otro costo: se actualiza con la contraseña que acaba de validarse
+    if necesita_rehash:
+        try:
+            usuario.password = hashear_password(password)
+            db.session.commit()
+            log.info('Hash de contraseña actualizado', extra={'datos': {'usuario_id': usuario.id}})
+        except HashingSaturadoError:
+            pass  # Se reintenta en el próximo login
+
+    log.info('Login exitoso', extra={'datos': {'usuario_id': usuario.id}})
+    # ✅ Rol y versión firmados en el token: las rutas autorizan sin consultar la base
+    token = create_access_token(identity=str(usuario.id), additional_claims=claims_usuario(usuario))
     return jsonify({"access_token": token, "rol": usuario.rol})
+
+@auth_bp.route('/logout-todos', methods=['POST'])
+@jwt_required()
+def logout_todos():
+    """Cerrar todas las sesiones del usuario (invalida todos sus tokens)"""
+    usuario_id = int(get_jwt_identity())
+    revocar_tokens(usuario_id)
+    log.info('Tokens revocados', extra={'datos': {'usuario_id': usuario_id}})
+    return jsonify({"mensaje": "Sesiones cerradas"})
+
+@auth_bp.route('/usuarios/<int:usuario_id>/rol', methods=['PUT'])
+@rol_requerido('admin')
+def cambiar_rol(usuario_id):
+    """Cambiar el rol de un usuario; sus tokens anteriores dejan de valer"""
+    rol = (request.json or {}).get('rol')
+    if not rol:
+        return jsonify({"error": "rol es requerido"}), 400
+    if rol not in ROLES:
+        return jsonify({"error": f"rol debe ser uno de {list(ROLES)}"}), 400
+
+    # Admins bloqueados: dos cambios simultáneos no pueden dejar el sistema sin ninguno
+    admins = db.session.execute(
+        select(Usuario.id).where(Usuario.rol == 'admin').order_by(Usuario.id).with_for_update()
+    ).scalars().all()
+    usuario = db.session.get(Usuario, usuario_id)
+    if not usuario:
+        db.session.rollback()
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    if rol != 'admin' and admins == [usuario_id]:
+        db.session.rollback()
+        return jsonify({"error": "No se puede quitar el rol al último admin"}), 409
+
+    usuario.rol = rol
+    db.session.commit()
+    revocar_tokens(usuario_id)
+    log.info('Rol actualizado', extra={'datos': {'usuario_id': usuario_id, 'rol': rol}})
+    return jsonify({"mensaje": "Rol actualizado", "usuario": usuario.to_dict()})
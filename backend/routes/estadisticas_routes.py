@@ -1,110 +1,107 @@
 # backend/routes/estadisticas_routes.py
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify, current_app
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
 from utils.db import db  # ✅ Corregido: db está en utils
 from models.producto import Producto  # ✅ Corregido: Producto está en models/producto
-from datetime import datetime, date
-from sqlalchemy import func
+from utils.estadisticas import calcular_resumen
+from utils.cache_compartido import obtener_compartido
+from utils.logs import get_logger
+from datetime import date
 
 estadisticas_bp = Blueprint('estadisticas', __name__)
+log = get_logger('estadisticas')
+
+def resumen_cacheado():
+    """Resumen del dashboard, recalculado como mucho una vez por TTL entre todos los workers"""
+    dias = current_app.config.get('ESTADISTICAS_DIAS_VENCIMIENTO', 7)
+    return obtener_compartido(
+        f'estadisticas_resumen_{dias}',
+        current_app.config.get('ESTADISTICAS_TTL', 30),
+        lambda: calcular_resumen(dias)
+    )
 
 @estadisticas_bp.route('/api/estadisticas/ventas-hoy', methods=['GET'])
-@jwt_required()
+@solo_lectura
+@rol_requerido('admin', 'cajero')
 def ventas_hoy():
-    """Obtener total de ventas del día actual - Por ahora retorna 0"""
+    """Obtener total de ventas del día actual"""
     try:
-        # Por ahora retornamos 0 hasta implementar la tabla de ventas
         return jsonify({
-            'total': 0.0,
-            'fecha': date.today().isoformat(),
-            'mensaje': 'Sistema de ventas en desarrollo'
+            'total': resumen_cacheado()['ventas_hoy'],
+            'fecha': date.today().isoformat()
         }), 200
         
     except Exception as e:
+        log.exception('Error obteniendo ventas del día')
         return jsonify({'error': str(e)}), 500
 
 @estadisticas_bp.route('/api/estadisticas/productos', methods=['GET'])
-@jwt_required()
+@solo_lectura
+@rol_requerido('admin', 'cajero')
 def total_productos():
     """Obtener total de productos en inventario"""
     try:
-        total = db.session.query(func.count(Producto.id)).scalar()
-        
         return jsonify({
-            'total': total or 0
+            'total': resumen_cacheado()['total_productos']
         }), 200
         
     except Exception as e:
+        log.exception('Error contando productos')
         return jsonify({'error': str(e)}), 500
 
 @estadisticas_bp.route('/api/estadisticas/stock-bajo', methods=['GET'])
-@jwt_required()
+@solo_lectura
+@rol_requerido('admin', 'cajero')
 def stock_bajo():
-    """Obtener cantidad de productos con stock bajo (menos de 10 unidades)"""
+    """Productos con stock bajo: stock actual en o por debajo de su stock mínimo"""
     try:
-        # Definir umbral de stock bajo
-        umbral_stock_bajo = 10
-        
-        total = db.session.query(func.count(Producto.id)).filter(
-            Producto.stock < umbral_stock_bajo
-        ).scalar()
-        
-        # También obtener la lista de productos con stock bajo
-        productos_stock_bajo = db.session.query(Producto).filter(
-            Producto.stock < umbral_stock_bajo
-        ).all()
+        # ✅ Una sola consulta, solo las columnas necesarias
+        filas = db.session.query(
+            Producto.id, Producto.nombre, Producto.stock_actual, Producto.stock_minimo
+        ).filter(
+            Producto.stock_actual <= Producto.stock_minimo
+        ).order_by(Producto.stock_actual, Producto.id).all()
         
         productos_lista = [{
-            'id': p.id,
-            'nombre': p.nombre,
-            'stock': p.stock
-        } for p in productos_stock_bajo]
+            'id': id_,
+            'nombre': nombre,
+            'stock': stock_actual,
+            'stock_minimo': stock_minimo
+        } for id_, nombre, stock_actual, stock_minimo in filas]
         
         return jsonify({
-            'total': total or 0,
-            'umbral': umbral_stock_bajo,
+            'total': len(productos_lista),
             'productos': productos_lista
         }), 200
         
     except Exception as e:
+        log.exception('Error listando stock bajo')
         return jsonify({'error': str(e)}), 500
 
 @estadisticas_bp.route('/api/estadisticas/clientes', methods=['GET'])
-@jwt_required()
+@solo_lectura
+@rol_requerido('admin', 'cajero')
 def total_clientes():
-    """Obtener total de clientes registrados - Por ahora retorna 0"""
+    """Clientes identificados en las ventas (por teléfono o nombre, ver utils/analitica.py)"""
     try:
-        # Por ahora retornamos 0 hasta implementar la tabla de clientes
         return jsonify({
-            'total': 0,
-            'mensaje': 'Sistema de clientes en desarrollo'
+            'total': resumen_cacheado()['total_clientes']
         }), 200
         
     except Exception as e:
+        log.exception('Error contando clientes')
         return jsonify({'error': str(e)}), 500
 
 @estadisticas_bp.route('/api/estadisticas/resumen', methods=['GET'])
-@jwt_required()
+@solo_lectura
+@rol_requerido('admin', 'cajero')
 def resumen_completo():
-    """Obtener todas las estadísticas en una sola consulta"""
+    """Obtener todas las estadísticas del dashboard en una sola consulta (cacheada unos segundos)"""
     try:
-        umbral_stock_bajo = 10
-        
-        # Total productos
-        total_productos = db.session.query(func.count(Producto.id)).scalar() or 0
-        
-        # Stock bajo
-        stock_bajo = db.session.query(func.count(Producto.id)).filter(
-            Producto.stock < umbral_stock_bajo
-        ).scalar() or 0
-        
-        return jsonify({
-            'ventas_hoy': 0.0,  # Temporal
-            'total_productos': total_productos,
-            'stock_bajo': stock_bajo,
-            'total_clientes': 0,  # Temporal
-            'fecha_actualizacion': datetime.now().isoformat()
-        }), 200
+        return jsonify(resumen_cacheado()), 200
         
     except Exception as e:
+        log.exception('Error en resumen de estadísticas')
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
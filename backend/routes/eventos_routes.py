@@ -0,0 +1,52 @@
+# backend/routes/eventos_routes.py - Canal de eventos en vivo (Server-Sent Events)
+from datetime import timedelta
+from flask import Blueprint, Response, jsonify, current_app
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from utils.auth import rol_requerido
+from utils.eventos import suscribir, desuscribir, flujo
+
+eventos_bp = Blueprint('eventos', __name__)
+
+# Claim 'uso' de los tokens del canal: no sirven para el resto de la API
+USO_EVENTOS = 'eventos'
+
+@eventos_bp.route('/token', methods=['POST'])
+@rol_requerido('admin', 'cajero')
+def token_eventos():
+    """
+    Token corto y de un solo propósito para abrir el canal. EventSource no permite
+    headers y el token viaja en la URL (queda en los logs de acceso y de los proxies):
+    por eso no es el token de sesión, vence en EVENTOS_TOKEN_SEGUNDOS y solo abre
+    /api/eventos. Conserva rol y versión: revocar la sesión también lo invalida.
+    """
+    claims = get_jwt()
+    segundos = current_app.config['EVENTOS_TOKEN_SEGUNDOS']
+    token = create_access_token(
+        identity=get_jwt_identity(),
+        additional_claims={'rol': claims['rol'], 'username': claims.get('username'),
+                           'tv': claims['tv'], 'uso': USO_EVENTOS},
+        expires_delta=timedelta(seconds=segundos)
+    )
+    return jsonify({'token': token, 'expira_en': segundos})
+
+@eventos_bp.route('', methods=['GET'])
+@rol_requerido('admin', 'cajero', ubicaciones=('query_string',), uso=USO_EVENTOS)
+def stream_eventos():
+    """
+    text/event-stream con eventos 'productos', 'ventas', 'estadisticas' y 'resync'.
+    El token va en ?jwt= porque EventSource no permite headers, y es el de
+    POST /api/eventos/token (se verifica solo al conectar). Cada conexión
+    ocupa un hilo del worker: el máximo por proceso es EVENTOS_MAX_CLIENTES.
+    """
+    config = current_app.config
+    posicion = suscribir(current_app._get_current_object())
+    if posicion is None:
+        return jsonify({'error': 'Demasiadas conexiones de eventos, reintente más tarde'}), 503
+
+    respuesta = Response(
+        flujo(posicion, config['EVENTOS_LATIDO'], config['EVENTOS_DURACION_MAX']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    respuesta.call_on_close(desuscribir)
+    return respuesta
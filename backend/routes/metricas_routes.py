@@ -0,0 +1,10 @@
+# backend/routes/metricas_routes.py - Exposición de métricas para Prometheus
+from flask import Blueprint, Response
+from utils.metricas import render_prometheus
+
+metricas_bp = Blueprint('metricas', __name__)
+
+@metricas_bp.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Métricas de latencia, SQL y pool de conexiones (formato texto de Prometheus)"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
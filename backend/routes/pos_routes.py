@@ -0,0 +1,33 @@
+# backend/routes/pos_routes.py - Catálogo para las cajas (snapshot + deltas)
+from flask import Blueprint, request, jsonify, Response
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils.sync_pos import feed_catalogo
+from utils.logs import get_logger
+
+pos_bp = Blueprint('pos', __name__)
+log = get_logger('pos')
+
+@pos_bp.route('/catalogo', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin', 'cajero')
+def catalogo():
+    """
+    Catálogo de venta en formato columnar.
+    - Sin parámetros: snapshot completo
+    - ?since=<version>: solo cambios y bajas posteriores a esa versión
+    La caja guarda el 'version' de cada respuesta y lo manda en el siguiente pedido.
+    """
+    try:
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({'error': 'since debe ser un número de versión'}), 400
+        response = Response(feed_catalogo(since), mimetype='application/json')
+        response.cache_control.no_store = True
+        return response
+    except Exception as e:
+        log.exception('Error generando el catálogo del POS')
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,32 @@
 # backend/routes/producto_routes.py - Versión corregida
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 from werkzeug.utils import secure_filename
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from models.producto import Producto
 from utils.db import db
+from utils.paginacion import paginar_keyset, decodificar_cursor, contar, MODOS_CONTEO, CursorInvalidoError
+from utils.busqueda import aplicar_busqueda
+from utils.categorias import obtener_categorias, conteos_por_categoria, invalidar_categorias
+from utils.cache_catalogo import cache_catalogo, invalidar_catalogo
+from utils.sync_pos import marcar_modificados, registrar_baja
+from utils.movimientos import registrar_movimientos
+from utils.eventos import notificar
+from utils.logs import get_logger
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils.importacion import importar_productos, detectar_formato, ImportacionError
+from utils import exportacion
+from utils.serializacion import parsear_campos, proyectar, filas_a_dicts, respuesta_json, CamposInvalidosError
+from utils.imagenes import encolar_variantes, eliminar_imagen
+import io
 import os
 import uuid
 from datetime import datetime
 
 producto_bp = Blueprint('productos', __name__)
+log = get_logger('productos')
 
 # Extensiones permitidas para imágenes
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -32,58 +50,85 @@ def save_image(file):
         return f"/uploads/{unique_filename}"
     return None
 
+def filtrar_productos(categoria=None, busqueda=None, ordenar=True):
+    """Consulta base de productos con los filtros de categoría y búsqueda"""
+    query = Producto.query
+    
+    if categoria and categoria != 'todos':
+        query = query.filter(Producto.categoria == categoria)
+    
+    if busqueda:
+        # ✅ Indexada, sin acentos ni mayúsculas; ranking por relevancia opcional
+        query = aplicar_busqueda(query, busqueda, ordenar=ordenar)
+    
+    return query
+
 @producto_bp.route('/', methods=['GET'])
+@solo_lectura
+@cache_catalogo
 def get_productos():
-    """Obtener todos los productos con filtros opcionales - CORREGIDO"""
+    """
+    Obtener productos con filtros opcionales.
+    - Modo página (por defecto): ?page=&per_page= (tabla del admin)
+    - Modo cursor: ?after=<id> o ?cursor=<token>, sin OFFSET; ?count=exact|estimated|none
+    - ?fields=nombre,precio,...: solo esas columnas (el id siempre viene)
+    """
     try:
         # Parámetros de consulta
         categoria = request.args.get('categoria')
         busqueda = request.args.get('busqueda')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
-        
-        print(f"🔍 GET /productos - página: {page}, por_página: {per_page}")
-        print(f"📊 Filtros - categoría: {categoria}, búsqueda: {busqueda}")
-        
-        # Construir consulta
-        query = Producto.query
-        
-        if categoria and categoria != 'todos':
-            query = query.filter(Producto.categoria == categoria)
-            print(f"🏷️ Filtrando por categoría: {categoria}")
-        
-        if busqueda:
-            query = query.filter(
-                Producto.nombre.contains(busqueda) | 
-                Producto.descripcion.contains(busqueda)
-            )
-            print(f"🔍 Filtrando por búsqueda: {busqueda}")
-        
-        # Contar total antes de paginación
-        total_productos = query.count()
-        print(f"📈 Total de productos encontrados: {total_productos}")
-        
-        # Aplicar paginación
-        productos_paginados = query.paginate(
+        after = request.args.get('after', type=int)
+        cursor = request.args.get('cursor')
+        modo_cursor = after is not None or cursor is not None
+        campos = parsear_campos(request.args.get('fields'))
+        
+        log.debug('get_productos', extra={'datos': {
+            'page': page, 'per_page': per_page, 'categoria': categoria,
+            'busqueda': busqueda, 'modo_cursor': modo_cursor
+        }})
+        
+        # Construir consulta (sin ranking en modo cursor: el orden es por id)
+        query = filtrar_productos(categoria, busqueda, ordenar=not modo_cursor)
+        # ✅ Solo las columnas pedidas, como tuplas (sin entidades del ORM ni to_dict por fila)
+        query = proyectar(query, campos)
+        
+        # Obtener categorías únicas para filtros (caché por versión, sin DISTINCT)
+        categorias = obtener_categorias()
+        
+        if modo_cursor:
+            # ✅ Keyset: búsqueda por índice sobre id, el costo no crece con la profundidad
+            if cursor is not None:
+                after = decodificar_cursor(cursor)
+            modo_conteo = request.args.get('count', 'none')
+            if modo_conteo not in MODOS_CONTEO:
+                return jsonify({'error': f'count debe ser uno de {sorted(MODOS_CONTEO)}'}), 400
+            
+            items, next_cursor = paginar_keyset(query, Producto.id, after, per_page)
+            filtrado = bool((categoria and categoria != 'todos') or busqueda)
+            total = contar(query, modo_conteo, filtrado=filtrado)
+            
+            response_data = {
+                'productos': filas_a_dicts(items, campos),
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+                'total': total,
+                'total_tipo': modo_conteo,
+                'categorias': categorias
+            }
+            return respuesta_json(response_data)
+        
+        # Aplicar paginación (un único COUNT dentro de paginate, orden estable por id)
+        productos_paginados = query.order_by(Producto.id).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
         )
         
-        print(f"📄 Productos en esta página: {len(productos_paginados.items)}")
-        
-        # Obtener categorías únicas para filtros
-        categorias_query = db.session.query(Producto.categoria).distinct()
-        categorias = [cat[0] for cat in categorias_query.all() if cat[0]]
-        
-        print(f"🏷️ Categorías encontradas: {categorias}")
-        
-        # Convertir productos a diccionarios
-        productos_dict = []
-        for producto in productos_paginados.items:
-            producto_dict = producto.to_dict()
-            productos_dict.append(producto_dict)
-            print(f"📦 Producto: {producto_dict['nombre']} - {producto_dict['categoria']}")
+        # Convertir filas a diccionarios
+        productos_dict = filas_a_dicts(productos_paginados.items, campos)
         
         # ✅ DEVOLVER ESTRUCTURA CORRECTA
         response_data = {
@@ -95,11 +140,12 @@ def get_productos():
             'categorias': categorias
         }
         
-        print(f"✅ Devolviendo {len(productos_dict)} productos en la respuesta")
-        return jsonify(response_data)
+        return respuesta_json(response_data)
         
+    except (CursorInvalidoError, CamposInvalidosError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"❌ Error en get_productos: {str(e)}")
+        log.exception('Error en get_productos')
         return jsonify({
             'error': str(e),
             'productos': [],
@@ -110,13 +156,12 @@ def get_productos():
         }), 500
 
 @producto_bp.route('/', methods=['POST'])
-@jwt_required()
+@rol_requerido('admin')
 def create_producto():
     """Crear nuevo producto con imagen opcional"""
     try:
         # Datos del formulario
         data = request.form.to_dict()
-        print(f"📝 Creando producto: {data.get('nombre')}")
         
         # Validaciones básicas
         if not data.get('nombre') or not data.get('precio'):
@@ -140,14 +185,27 @@ def create_producto():
             stock_actual=int(data.get('stock_actual', 0)),
             categoria=data.get('categoria', 'general'),
             imagen_url=imagen_url,
+            codigo=data.get('codigo') or None,
             fecha_vencimiento=datetime.strptime(data['fecha_vencimiento'], '%Y-%m-%d').date() 
                              if data.get('fecha_vencimiento') else None
         )
         
         db.session.add(nuevo_producto)
+        db.session.flush()
+        # ✅ El stock de alta es el primer movimiento del libro
+        registrar_movimientos([{'producto_id': nuevo_producto.id, 'tipo': 'inicial',
+                                'cantidad': nuevo_producto.stock_actual}], int(get_jwt_identity()))
+        invalidar_categorias()
+        marcar_modificados(Producto.id == nuevo_producto.id)
+        invalidar_catalogo()
         db.session.commit()
+        notificar()
+        
+        log.info('Producto creado', extra={'datos': {'producto_id': nuevo_producto.id}})
         
-        print(f"✅ Producto creado: {nuevo_producto.nombre}")
+        # ✅ Miniaturas y WebP fuera del request
+        if imagen_url:
+            encolar_variantes(current_app._get_current_object(), nuevo_producto.id, imagen_url)
         
         return jsonify({
             'message': 'Producto creado exitosamente',
@@ -155,21 +213,22 @@ def create_producto():
         }), 201
         
     except Exception as e:
-        print(f"❌ Error creando producto: {str(e)}")
+        log.exception('Error creando producto')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @producto_bp.route('/<int:producto_id>', methods=['PUT'])
-@jwt_required()
+@rol_requerido('admin')
 def update_producto(producto_id):
     """Actualizar producto existente"""
     try:
-        producto = Producto.query.get_or_404(producto_id)
+        # Fila bloqueada: una venta que confirme en el medio no pisa ni es pisada por la edición
+        producto = Producto.query.filter_by(id=producto_id).with_for_update().first_or_404()
         data = request.form.to_dict()
         
-        print(f"📝 Actualizando producto ID {producto_id}: {producto.nombre}")
-        
         # Actualizar campos
+        if 'codigo' in data:
+            producto.codigo = data['codigo'] or None
         if 'nombre' in data:
             producto.nombre = data['nombre']
         if 'descripcion' in data:
@@ -179,34 +238,50 @@ def update_producto(producto_id):
         if 'stock_minimo' in data:
             producto.stock_minimo = int(data['stock_minimo'])
         if 'stock_actual' in data:
-            producto.stock_actual = int(data['stock_actual'])
-        if 'categoria' in data:
+            ajuste = int(data['stock_actual']) - producto.stock_actual
+            # ✅ Editar el stock a mano queda como ajuste en el libro, aplicado como delta
+            #   (igual que aplicar_movimiento): el libro y stock_actual siempre suman lo mismo
+            registrar_movimientos([{'producto_id': producto_id, 'tipo': 'ajuste',
+                                    'cantidad': ajuste, 'referencia': 'edicion'}], int(get_jwt_identity()))
+            if ajuste:
+                db.session.execute(
+                    update(Producto).where(Producto.id == producto_id)
+                    .values(stock_actual=Producto.stock_actual + ajuste)
+                    .execution_options(synchronize_session=False)
+                )
+        if 'categoria' in data and data['categoria'] != producto.categoria:
             producto.categoria = data['categoria']
+            invalidar_categorias()
         if 'fecha_vencimiento' in data and data['fecha_vencimiento']:
             producto.fecha_vencimiento = datetime.strptime(data['fecha_vencimiento'], '%Y-%m-%d').date()
         
         # Manejar imagen nueva
+        nueva_imagen_url = None
         if 'imagen' in request.files:
             file = request.files['imagen']
             if file.filename != '':
-                # Eliminar imagen anterior si existe
+                # Eliminar imagen anterior y sus variantes si existe
                 if producto.imagen_url:
-                    old_file = producto.imagen_url.split('/')[-1]
-                    old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], old_file)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
+                    eliminar_imagen(current_app.config['UPLOAD_FOLDER'], producto.imagen_url, producto.imagenes)
                 
                 # Guardar nueva imagen
                 nueva_imagen_url = save_image(file)
                 if nueva_imagen_url:
                     producto.imagen_url = nueva_imagen_url
+                    producto.imagenes = None
                 else:
                     return jsonify({'error': 'Formato de imagen no válido'}), 400
         
-        producto.fecha_actualizacion = datetime.utcnow()
+        # ✅ Las cajas reciben el cambio en su próximo delta (GET /api/pos/catalogo?since=)
+        marcar_modificados(Producto.id == producto_id)
+        invalidar_catalogo()
         db.session.commit()
+        notificar()
+        
+        log.info('Producto actualizado', extra={'datos': {'producto_id': producto_id}})
         
-        print(f"✅ Producto actualizado: {producto.nombre}")
+        if nueva_imagen_url:
+            encolar_variantes(current_app._get_current_object(), producto_id, nueva_imagen_url)
         
         return jsonify({
             'message': 'Producto actualizado exitosamente',
@@ -214,62 +289,137 @@ def update_producto(producto_id):
         })
         
     except Exception as e:
-        print(f"❌ Error actualizando producto: {str(e)}")
+        log.exception('Error actualizando producto')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @producto_bp.route('/<int:producto_id>', methods=['DELETE'])
-@jwt_required()
+@rol_requerido('admin')
 def delete_producto(producto_id):
     """Eliminar producto"""
     try:
-        producto = Producto.query.get_or_404(producto_id)
+        # Bloqueada: la 'baja' del libro lleva el stock que realmente tenía al borrarse
+        producto = Producto.query.filter_by(id=producto_id).with_for_update().first_or_404()
         nombre_producto = producto.nombre
+        imagen_url, imagenes = producto.imagen_url, producto.imagenes
         
-        print(f"🗑️ Eliminando producto ID {producto_id}: {nombre_producto}")
-        
-        # Eliminar imagen del disco si existe
-        if producto.imagen_url:
-            filename = producto.imagen_url.split('/')[-1]
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        
+        registrar_movimientos([{'producto_id': producto_id, 'tipo': 'baja',
+                                'cantidad': -producto.stock_actual}], int(get_jwt_identity()))
         db.session.delete(producto)
+        invalidar_categorias()
+        registrar_baja(producto_id)
+        invalidar_catalogo()
         db.session.commit()
+        notificar()
         
-        print(f"✅ Producto eliminado: {nombre_producto}")
+        # ✅ Imagen y variantes se borran del disco recién con la baja confirmada
+        if imagen_url:
+            eliminar_imagen(current_app.config['UPLOAD_FOLDER'], imagen_url, imagenes)
+        
+        log.info('Producto eliminado', extra={'datos': {'producto_id': producto_id, 'nombre': nombre_producto}})
         
         return jsonify({'message': 'Producto eliminado exitosamente'})
         
+    except IntegrityError:
+        # Una FK que la base todavía tiene (ver FK_OBSOLETAS en utils/db.py)
+        log.exception('Producto con registros asociados')
+        db.session.rollback()
+        return jsonify({'error': 'El producto tiene registros asociados y no se puede eliminar'}), 409
     except Exception as e:
-        print(f"❌ Error eliminando producto: {str(e)}")
+        log.exception('Error eliminando producto')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @producto_bp.route('/<int:producto_id>', methods=['GET'])
+@solo_lectura
+@cache_catalogo
 def get_producto(producto_id):
-    """Obtener un producto específico"""
+    """Obtener un producto específico (acepta ?fields= igual que el listado)"""
     try:
-        producto = Producto.query.get_or_404(producto_id)
-        print(f"📦 Obteniendo producto ID {producto_id}: {producto.nombre}")
-        return jsonify(producto.to_dict())
+        campos = parsear_campos(request.args.get('fields'))
+        fila = proyectar(Producto.query.filter(Producto.id == producto_id), campos).first()
+        if fila is None:
+            return jsonify({'error': 'Producto no encontrado'}), 404
+        return respuesta_json(filas_a_dicts([fila], campos)[0])
+    except CamposInvalidosError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"❌ Error obteniendo producto: {str(e)}")
+        log.exception('Error obteniendo producto')
         return jsonify({'error': str(e)}), 500
 
+@producto_bp.route('/importar', methods=['POST'])
+@rol_requerido('admin')
+def importar():
+    """
+    Importación masiva desde CSV o NDJSON (upsert por `codigo`, commit por lotes).
+    Acepta multipart con el campo 'archivo' o el archivo como cuerpo crudo
+    (Content-Type: text/csv o application/x-ndjson).
+    """
+    try:
+        # El límite general de 16MB no aplica a catálogos completos
+        request.max_content_length = current_app.config['IMPORT_MAX_CONTENT_LENGTH']
+        
+        if request.mimetype == 'multipart/form-data':
+            if 'archivo' not in request.files:
+                return jsonify({'error': 'No se envió ningún archivo'}), 400
+            archivo = request.files['archivo']
+            formato = request.args.get('formato') or detectar_formato(archivo.filename, archivo.mimetype)
+            stream = archivo.stream
+        else:
+            formato = request.args.get('formato') or detectar_formato(content_type=request.mimetype)
+            stream = io.BufferedReader(request.stream)
+        
+        resumen = importar_productos(stream, formato, current_app.config['IMPORT_TAMANO_LOTE'],
+                                     usuario_id=int(get_jwt_identity()))
+        return jsonify(resumen), 200
+        
+    except ImportacionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error importando productos')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@producto_bp.route('/categorias', methods=['GET'])
+@solo_lectura
+def get_categorias():
+    """Categorías con su cantidad de productos (desde la caché de categorías)"""
+    try:
+        conteos = conteos_por_categoria()
+        return jsonify({
+            'categorias': [{'categoria': nombre, 'total': total} for nombre, total in conteos.items()]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ✅ EXPORTACIÓN EN STREAMING
+@producto_bp.route('/exportar', methods=['GET'])
+@rol_requerido('admin')
+def exportar():
+    """
+    Exportar el catálogo en streaming: ?formato=ndjson|csv con los mismos filtros
+    que el listado (categoria, busqueda). Memoria constante, el primer byte sale enseguida.
+    """
+    formato = request.args.get('formato', 'ndjson')
+    if formato not in exportacion.FORMATOS:
+        return jsonify({'error': f'formato debe ser uno de {sorted(exportacion.FORMATOS)}'}), 400
+    
+    query = filtrar_productos(request.args.get('categoria'), request.args.get('busqueda'), ordenar=False)
+    generador = exportacion.generar_csv(query) if formato == 'csv' else exportacion.generar_ndjson(query)
+    
+    return Response(
+        stream_with_context(generador),
+        mimetype=exportacion.FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename=productos.{formato}'}
+    )
+
 # ✅ RUTA ADICIONAL PARA DEBUGGING
 @producto_bp.route('/debug', methods=['GET'])
 def debug_productos():
-    """Ruta de debugging para ver todos los productos sin paginación"""
+    """Ruta de debugging para ver todos los productos sin paginación (en streaming)"""
     try:
-        productos = Producto.query.all()
-        productos_dict = [producto.to_dict() for producto in productos]
-        
-        return jsonify({
-            'total_en_db': len(productos_dict),
-            'productos': productos_dict,
-            'categorias': list(set([p.categoria for p in productos if p.categoria]))
-        })
+        extra = {'categorias': obtener_categorias()}
+        generador = exportacion.generar_documento_json(Producto.query, extra)
+        return Response(stream_with_context(generador), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
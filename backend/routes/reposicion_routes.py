@@ -0,0 +1,50 @@
+# backend/routes/reposicion_routes.py - Sugerencias de reposición (cálculo en lote en utils/reposicion.py)
+from flask import Blueprint, request, jsonify
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils import reposicion
+from utils.serializacion import respuesta_json
+from utils.db import db
+from utils.logs import get_logger
+
+reposicion_bp = Blueprint('reposicion', __name__)
+log = get_logger('reposicion')
+
+LIMITE_MAXIMO = 1000
+
+@reposicion_bp.route('', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin')
+def get_sugerencias():
+    """?categoria=&todos=true (también los que no hace falta pedir)&limite="""
+    try:
+        limite = max(1, min(request.args.get('limite', 200, type=int), LIMITE_MAXIMO))
+        sugerencias = reposicion.listar(
+            categoria=request.args.get('categoria'),
+            solo_pedir=request.args.get('todos', 'false').lower() != 'true',
+            limite=limite
+        )
+        return respuesta_json({
+            'calculado': reposicion.calculado(),
+            'sugerencias': sugerencias,
+            'cantidad': len(sugerencias)
+        })
+    except Exception as e:
+        log.exception('Error listando sugerencias de reposición')
+        return jsonify({'error': str(e)}), 500
+
+@reposicion_bp.route('/calcular', methods=['POST'])
+@rol_requerido('admin')
+def post_calcular():
+    """Recálculo manual (normalmente lo corre el cron: flask --app app calcular-reposicion)"""
+    try:
+        resultado = reposicion.calcular()
+        log.info('Sugerencias de reposición calculadas', extra={'datos': resultado})
+        return jsonify(resultado)
+    except reposicion.ParametrosReposicionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error calculando sugerencias de reposición')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,124 @@
+# backend/routes/stock_routes.py - Libro de movimientos de stock y stock histórico
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils.movimientos import (aplicar_movimiento, listar_movimientos, stock_en, tomar_snapshot,
+                               MovimientoError, StockNegativoError)
+from utils.serializacion import respuesta_json
+from utils.db import db
+from utils.logs import get_logger
+
+stock_bp = Blueprint('stock', __name__)
+log = get_logger('stock')
+
+LIMITE_MAXIMO = 1000
+
+class FechaInvalidaError(ValueError):
+    """Parámetro de fecha que no es ISO 8601"""
+
+def _fecha(nombre):
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise FechaInvalidaError(f'{nombre} debe ser una fecha ISO 8601 (UTC)')
+
+@stock_bp.route('/movimientos', methods=['POST'])
+@rol_requerido('admin')
+def post_movimiento():
+    """
+    Ingreso de mercadería, merma o ajuste manual:
+    {producto_id, tipo: ingreso|merma|ajuste, cantidad | stock_contado (solo ajuste), referencia?}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data.get('producto_id'), int):
+            return jsonify({'error': 'producto_id es requerido'}), 400
+        for campo in ('cantidad', 'stock_contado'):
+            if data.get(campo) is not None and not isinstance(data[campo], int):
+                return jsonify({'error': f'{campo} debe ser un entero'}), 400
+
+        movimiento, stock = aplicar_movimiento(
+            data['producto_id'], data.get('tipo'),
+            cantidad=data.get('cantidad'),
+            stock_contado=data.get('stock_contado'),
+            referencia=(data.get('referencia') or None),
+            usuario_id=int(get_jwt_identity())
+        )
+        if movimiento is None:
+            # Conteo que coincide con el stock: no hay nada que registrar
+            return jsonify({'movimiento': None, 'stock_actual': stock}), 200
+        log.info('Movimiento de stock', extra={'datos': movimiento})
+        return jsonify({'movimiento': movimiento, 'stock_actual': stock}), 201
+
+    except StockNegativoError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except MovimientoError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error registrando movimiento de stock')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@stock_bp.route('/movimientos', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin', 'cajero')
+def get_movimientos():
+    """?producto_id=, ?desde=, ?hasta= (ISO, UTC), ?limite=. Los más recientes primero"""
+    try:
+        limite = min(request.args.get('limite', 200, type=int), LIMITE_MAXIMO)
+        movimientos = listar_movimientos(
+            producto_id=request.args.get('producto_id', type=int),
+            desde=_fecha('desde'),
+            hasta=_fecha('hasta'),
+            limite=limite
+        )
+        return respuesta_json({'movimientos': movimientos, 'cantidad': len(movimientos)})
+    except FechaInvalidaError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error listando movimientos de stock')
+        return jsonify({'error': str(e)}), 500
+
+@stock_bp.route('/historico', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin')
+def get_stock_historico():
+    """
+    Stock de cada producto a ?fecha= (ISO, UTC); ?producto_id= para uno solo.
+    Lee el último snapshot y suma solo los movimientos posteriores.
+    """
+    try:
+        momento = _fecha('fecha')
+        if momento is None:
+            return jsonify({'error': 'fecha es requerida'}), 400
+        producto_id = request.args.get('producto_id', type=int)
+        stock = stock_en(momento, [producto_id] if producto_id is not None else None)
+        return respuesta_json({
+            'fecha': momento.isoformat(),
+            'stock': [{'producto_id': id_, 'stock': cantidad} for id_, cantidad in sorted(stock.items())]
+        })
+    except FechaInvalidaError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error calculando stock histórico')
+        return jsonify({'error': str(e)}), 500
+
+@stock_bp.route('/snapshots', methods=['POST'])
+@rol_requerido('admin')
+def post_snapshot():
+    """Snapshot manual (normalmente lo corre el cron: flask --app app snapshot-stock)"""
+    try:
+        resultado = tomar_snapshot()
+        log.info('Snapshot de stock', extra={'datos': resultado})
+        return jsonify(resultado), 201
+    except Exception as e:
+        log.exception('Error tomando snapshot de stock')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
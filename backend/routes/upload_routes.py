@@ -1,8 +1,20 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+# backend/routes/upload_routes.py - Subida de archivos y servicio de /uploads
+from flask import Blueprint, request, jsonify, current_app, send_file, abort
+import mimetypes
 import os
+import uuid
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
 upload_bp = Blueprint('upload_bp', __name__)
+# ✅ Archivos subidos servidos en /uploads (sin prefijo /api)
+archivos_bp = Blueprint('archivos', __name__)
+
+UN_ANIO = 365 * 24 * 3600
+# Versiones precomprimidas (archivo + sufijo), en orden de preferencia
+PRECOMPRIMIDOS = (('br', '.br'), ('gzip', '.gz'))
+# Formatos con una alternativa .webp al lado (variantes generadas por utils/imagenes.py)
+CON_WEBP = {'.jpg', '.jpeg', '.png'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
@@ -17,7 +29,9 @@ def upload_file():
         return jsonify({'error': 'Nombre de archivo vacío'}), 400
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+        # Nombre único: un archivo subido nunca se sobrescribe (se sirve como inmutable)
+        ext = os.path.splitext(secure_filename(file.filename))[1]
+        filename = f"{uuid.uuid4().hex}{ext}"
         filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         url = f"http://localhost:5000/uploads/{filename}"
@@ -25,6 +39,62 @@ def upload_file():
 
     return jsonify({'error': 'Formato de archivo no permitido'}), 400
 
-@upload_bp.route('/uploads/<path:filename>')
+def _elegir_archivo(carpeta, filename):
+    """
+    Resuelve qué archivo enviar: WebP si el navegador lo acepta y existe,
+    o una versión precomprimida para formatos de texto (svg, etc.).
+    Retorna (ruta, mimetype, content_encoding, vary).
+    """
+    ruta = safe_join(carpeta, filename)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+
+    vary = []
+    base, ext = os.path.splitext(ruta)
+    if ext.lower() in CON_WEBP:
+        vary.append('Accept')
+        webp = base + '.webp'
+        if 'image/webp' in request.headers.get('Accept', '') and os.path.isfile(webp):
+            ruta = webp
+
+    mimetype = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+    encoding = None
+    # Las imágenes raster ya vienen comprimidas
+    if not mimetype.startswith('image/') or mimetype == 'image/svg+xml':
+        vary.append('Accept-Encoding')
+        for nombre, sufijo in PRECOMPRIMIDOS:
+            if request.accept_encodings[nombre] and os.path.isfile(ruta + sufijo):
+                ruta, encoding = ruta + sufijo, nombre
+                break
+
+    return ruta, mimetype, encoding, vary
+
+@archivos_bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    """
+    Servir archivos subidos. Los nombres son únicos (uuid), así que el contenido
+    de una URL nunca cambia: ETag fuerte, caché de un año con `immutable`,
+    304 con If-None-Match y Range. Con USE_X_SENDFILE el envío lo hace el proxy;
+    si no, el servidor WSGI usa su file_wrapper (sendfile).
+    """
+    ruta, mimetype, encoding, vary = _elegir_archivo(current_app.config['UPLOAD_FOLDER'], filename)
+    stat = os.stat(ruta)
+
+    # Nombre + tamaño en lugar de mtime: el mismo ETag en todas las instancias
+    response = send_file(
+        ruta,
+        mimetype=mimetype,
+        etag=f'{os.path.basename(ruta)}-{stat.st_size}',
+        last_modified=stat.st_mtime,
+        max_age=UN_ANIO,
+        conditional=True
+    )
+    response.cache_control.immutable = True
+    if encoding:
+        response.content_encoding = encoding
+    if vary:
+        response.vary.update(vary)
+    return response
+
+# Ruta histórica /api/uploads/<archivo>: misma lógica
+upload_bp.add_url_rule('/uploads/<path:filename>', 'uploaded_file', uploaded_file)
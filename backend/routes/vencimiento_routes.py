@@ -0,0 +1,64 @@
+# backend/routes/vencimiento_routes.py - Productos vencidos / por vencer y resumen para el dashboard
+from flask import Blueprint, request, jsonify, current_app
+from utils.auth import rol_requerido
+from utils.replicas import solo_lectura
+from utils.vencimientos import listar, resumen, refrescar, ESTADOS
+from utils.serializacion import respuesta_json
+from utils.logs import get_logger
+
+vencimiento_bp = Blueprint('vencimientos', __name__)
+log = get_logger('vencimientos')
+
+LIMITE_MAXIMO = 1000
+
+def _dias():
+    dias = request.args.get('dias', current_app.config.get('ESTADISTICAS_DIAS_VENCIMIENTO', 7), type=int)
+    return max(0, min(dias, 365))
+
+@vencimiento_bp.route('/productos', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin', 'cajero')
+def get_productos_vencimiento():
+    """
+    ?estado=por_vencer (dentro de ?dias=) | vencidos, ?categoria=, ?limite=,
+    ?incluir_sin_stock=true. Ordenados por fecha de vencimiento (rango sobre el índice).
+    """
+    try:
+        estado = request.args.get('estado', 'por_vencer')
+        if estado not in ESTADOS:
+            return jsonify({'error': f'estado debe ser uno de {sorted(ESTADOS)}'}), 400
+        limite = min(request.args.get('limite', 200, type=int), LIMITE_MAXIMO)
+        productos = listar(
+            estado=estado,
+            dias=_dias(),
+            categoria=request.args.get('categoria'),
+            limite=limite,
+            con_stock=request.args.get('incluir_sin_stock', 'false').lower() != 'true'
+        )
+        return respuesta_json({'estado': estado, 'productos': productos, 'cantidad': len(productos)})
+    except Exception as e:
+        log.exception('Error listando vencimientos')
+        return jsonify({'error': str(e)}), 500
+
+@vencimiento_bp.route('/resumen', methods=['GET'])
+@solo_lectura
+@rol_requerido('admin', 'cajero')
+def get_resumen_vencimientos():
+    """Totales de vencidos / por vencer, por categoría y por día (del resumen precalculado)"""
+    try:
+        return respuesta_json(resumen(_dias()))
+    except Exception as e:
+        log.exception('Error en resumen de vencimientos')
+        return jsonify({'error': str(e)}), 500
+
+@vencimiento_bp.route('/refrescar', methods=['POST'])
+@rol_requerido('admin')
+def post_refrescar():
+    """Refresco manual del resumen (normalmente lo corre el cron nocturno); ?completo=true lo reconstruye"""
+    try:
+        resultado = refrescar(completo=request.args.get('completo', 'false').lower() == 'true')
+        log.info('Resumen de vencimientos refrescado', extra={'datos': resultado})
+        return jsonify(resultado)
+    except Exception as e:
+        log.exception('Error refrescando vencimientos')
+        return jsonify({'error': str(e)}), 500
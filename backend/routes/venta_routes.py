@@ -0,0 +1,89 @@
+# backend/routes/venta_routes.py - Ventas del punto de venta (POS)
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from models.venta import Venta
+from utils.db import db
+from utils.ventas import registrar_venta, registrar_lote, VentaError, VentaDuplicadaError, StockInsuficienteError
+from utils.logs import get_logger
+from utils.auth import rol_requerido
+
+venta_bp = Blueprint('ventas', __name__)
+log = get_logger('ventas')
+
+@venta_bp.route('/', methods=['POST'], strict_slashes=False)
+@rol_requerido('admin', 'cajero')
+def create_venta():
+    """
+    Registrar una venta: descuenta el stock de todo el carrito en una transacción.
+    Con el header Idempotency-Key, reenviar la misma venta devuelve la ya registrada (200).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        venta = registrar_venta(data, usuario_id=int(get_jwt_identity()),
+                                clave=request.headers.get('Idempotency-Key'))
+        log.info('Venta registrada', extra={'datos': {'venta_id': venta['id'], 'total': venta['total']}})
+
+        return jsonify({
+            'message': 'Venta registrada exitosamente',
+            'venta': venta
+        }), 201
+
+    except VentaDuplicadaError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e), 'venta': e.venta}), 200
+    except StockInsuficienteError as e:
+        db.session.rollback()
+        log.warning('Venta rechazada por stock', extra={'datos': {'faltantes': e.faltantes}})
+        return jsonify({'error': str(e), 'faltantes': e.faltantes}), 409
+    except VentaError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log.exception('Error registrando venta')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@venta_bp.route('/lote', methods=['POST'])
+@rol_requerido('admin', 'cajero')
+def create_lote():
+    """
+    Ventas que la caja guardó sin conexión: {"ventas": [{"clave": uuid, "fecha": ISO, ...}, ...]}.
+    Un resultado por venta (registrada / duplicada / rechazada): la caja descarta
+    las registradas y duplicadas, y reenviar el mismo lote nunca descuenta stock dos veces.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        lote = data.get('ventas')
+        if not isinstance(lote, list) or not lote:
+            return jsonify({'error': 'Se espera una lista "ventas" no vacía'}), 400
+        maximo = current_app.config.get('VENTAS_LOTE_MAX', 500)
+        if len(lote) > maximo:
+            return jsonify({'error': f'Máximo {maximo} ventas por lote'}), 413
+
+        resultados = registrar_lote(
+            lote,
+            usuario_id=int(get_jwt_identity()),
+            max_dias=current_app.config.get('VENTAS_OFFLINE_MAX_DIAS', 7)
+        )
+        resumen = {estado: sum(1 for r in resultados if r['estado'] == estado)
+                   for estado in ('registrada', 'duplicada', 'rechazada')}
+        log.info('Lote de ventas offline', extra={'datos': resumen})
+
+        return jsonify({'resultados': resultados, 'resumen': resumen}), 200
+
+    except Exception as e:
+        log.exception('Error registrando lote de ventas')
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@venta_bp.route('/<int:venta_id>', methods=['GET'])
+@rol_requerido('admin', 'cajero')
+def get_venta(venta_id):
+    """Obtener una venta con sus items"""
+    try:
+        venta = db.session.get(Venta, venta_id)
+        if not venta:
+            return jsonify({'error': 'Venta no encontrada'}), 404
+        return jsonify(venta.to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
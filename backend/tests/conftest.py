@@ -0,0 +1,65 @@
+# backend/tests/conftest.py - App de prueba sobre una base SQLite temporal
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# ✅ La configuración se lee al importar la app: el entorno va antes de cualquier import
+_TMP = tempfile.mkdtemp(prefix='supermercado-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP, 'tests.db')}"
+os.environ['ENVIRONMENT'] = 'production'
+os.environ['UPLOAD_FOLDER'] = os.path.join(_TMP, 'uploads')
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as aplicacion
+    from utils.db import init_db
+    with aplicacion.app_context():
+        init_db()
+    return aplicacion
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture(scope='session')
+def auth(app):
+    """Headers del admin sembrado por init_db, con un login real"""
+    respuesta = app.test_client().post('/api/auth/login',
+                                       json={'username': 'admin', 'password': 'admin123'})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return {'Authorization': f"Bearer {respuesta.get_json()['access_token']}"}
+
+@pytest.fixture
+def crear_producto(client, auth):
+    """Alta por la API (libro 'inicial' y versión de sync incluidos); devuelve el id"""
+    def crear(stock=10, precio=100):
+        respuesta = client.post('/api/productos/', headers=auth, data={
+            'nombre': f'Producto {uuid.uuid4().hex[:8]}',
+            'precio': str(precio),
+            'stock_actual': str(stock),
+            'categoria': 'pruebas'
+        })
+        assert respuesta.status_code == 201, respuesta.get_json()
+        return respuesta.get_json()['producto']['id']
+    return crear
+
+@pytest.fixture
+def stock_de(app):
+    def stock(producto_id):
+        from models.producto import Producto
+        from utils.db import db
+        with app.app_context():
+            return db.session.get(Producto, producto_id).stock_actual
+    return stock
+
+def venta(producto_id, cantidad, monto=100000, **extra):
+    """Cuerpo de POST /api/ventas para un solo producto"""
+    return {'productos': [{'id': producto_id, 'cantidad': cantidad}],
+            'metodoPago': 'efectivo', 'montoRecibido': monto, **extra}
@@ -0,0 +1,71 @@
+# backend/tests/test_gunicorn.py - Login contra gunicorn real (preload + workers forkeados)
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tests.conftest import BACKEND_DIR
+
+pytest.importorskip('gunicorn')
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _esperar_health(url, proceso, segundos=30):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        assert proceso.poll() is None, 'gunicorn terminó al arrancar'
+        try:
+            with urllib.request.urlopen(f'{url}/api/health', timeout=2) as respuesta:
+                if respuesta.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    pytest.fail('gunicorn no respondió /api/health')
+
+def test_login_en_workers_forkeados(tmp_path):
+    """
+    El master sembró al admin (init_db) antes de forkear: un pool de hilos creado ahí
+    no existe en los workers y el login quedaba colgado hasta el timeout.
+    """
+    puerto = _puerto_libre()
+    url = f'http://127.0.0.1:{puerto}'
+    entorno = {**os.environ,
+               'DATABASE_URL': f"sqlite:///{tmp_path / 'gunicorn.db'}",
+               'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+               'PORT': str(puerto),
+               'WEB_CONCURRENCY': '2',
+               'GUNICORN_THREADS': '2',
+               'EVENTOS_MAX_CLIENTES': '2'}
+    proceso = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=BACKEND_DIR, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        _esperar_health(url, proceso)
+        cuerpo = json.dumps({'username': 'admin', 'password': 'admin123'}).encode()
+        # Varios intentos: con dos workers, alguno cae en cada uno
+        for _ in range(4):
+            pedido = urllib.request.Request(f'{url}/api/auth/login', data=cuerpo,
+                                            headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(pedido, timeout=10) as respuesta:
+                assert respuesta.status == 200
+                assert json.loads(respuesta.read())['access_token']
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            # Workers colgados no terminan el apagado ordenado: matar al grupo entero
+            os.killpg(proceso.pid, signal.SIGKILL)
+            proceso.wait()
@@ -0,0 +1,45 @@
+# backend/tests/test_movimientos.py - Libro de movimientos y snapshots
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from tests.conftest import venta
+
+def test_stock_en_despues_de_un_snapshot(app, client, auth, crear_producto, stock_de):
+    from models.movimiento import MovimientoStock
+    from utils.db import db
+    from utils.movimientos import stock_en, tomar_snapshot
+
+    producto_id = crear_producto(stock=20)
+    assert client.post('/api/ventas', headers=auth, json=venta(producto_id, 5)).status_code == 201
+    time.sleep(0.01)
+    with app.app_context():
+        corte = datetime.utcnow()
+        assert tomar_snapshot(corte)['productos'] >= 1
+    time.sleep(0.01)
+    assert client.post('/api/ventas', headers=auth, json=venta(producto_id, 4)).status_code == 201
+
+    with app.app_context():
+        assert stock_en(corte, [producto_id]) == {producto_id: 15}
+        assert stock_en(datetime.utcnow(), [producto_id]) == {producto_id: 11}
+        libro = db.session.execute(
+            select(func.sum(MovimientoStock.cantidad)).where(MovimientoStock.producto_id == producto_id)
+        ).scalar()
+    assert libro == stock_de(producto_id) == 11
+
+def test_conteo_sin_diferencia_no_escribe_movimiento(app, client, auth, crear_producto):
+    from models.movimiento import MovimientoStock
+    from utils.db import db
+
+    producto_id = crear_producto(stock=7)
+
+    respuesta = client.post('/api/stock/movimientos', headers=auth,
+                            json={'producto_id': producto_id, 'tipo': 'ajuste', 'stock_contado': 7})
+
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {'movimiento': None, 'stock_actual': 7}
+    with app.app_context():
+        assert db.session.execute(
+            select(func.count()).where(MovimientoStock.producto_id == producto_id)
+        ).scalar() == 1
@@ -0,0 +1,29 @@
+# backend/tests/test_sync_pos.py - Deltas del catálogo del POS
+from tests.conftest import venta
+
+def _catalogo(client, auth, since=None):
+    query = {} if since is None else {'since': since}
+    respuesta = client.get('/api/pos/catalogo', headers=auth, query_string=query)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+def test_delta_con_ventas_y_bajas(client, auth, crear_producto):
+    vendido, borrado, quieto = crear_producto(stock=10), crear_producto(stock=10), crear_producto(stock=10)
+    completo = _catalogo(client, auth)
+    assert completo['completo'] is True
+    assert {vendido, borrado, quieto} <= set(completo['productos']['id'])
+
+    assert client.post('/api/ventas', headers=auth, json=venta(vendido, 3)).status_code == 201
+    assert client.delete(f'/api/productos/{borrado}', headers=auth).status_code == 200
+
+    delta = _catalogo(client, auth, since=completo['version'])
+    assert delta['completo'] is False
+    assert delta['version'] > completo['version']
+    productos = delta['productos']
+    assert productos['id'] == [vendido]
+    assert productos['stock_actual'] == [7]
+    assert delta['eliminados'] == [borrado]
+
+    vacio = _catalogo(client, auth, since=delta['version'])
+    assert vacio['productos']['id'] == []
+    assert vacio['eliminados'] == []
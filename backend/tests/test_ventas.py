@@ -0,0 +1,62 @@
+# backend/tests/test_ventas.py - Stock y claves de idempotencia en ventas
+import uuid
+
+from tests.conftest import venta
+
+def test_sobreventa_rechazada(client, auth, crear_producto, stock_de):
+    producto_id = crear_producto(stock=3)
+
+    respuesta = client.post('/api/ventas', headers=auth, json=venta(producto_id, 5))
+
+    assert respuesta.status_code == 409
+    faltantes = respuesta.get_json()['faltantes']
+    assert [f['id'] for f in faltantes] == [producto_id]
+    assert stock_de(producto_id) == 3
+
+def test_venta_descuenta_stock(client, auth, crear_producto, stock_de):
+    producto_id = crear_producto(stock=3)
+
+    respuesta = client.post('/api/ventas', headers=auth, json=venta(producto_id, 3))
+
+    assert respuesta.status_code == 201
+    assert stock_de(producto_id) == 0
+    assert client.post('/api/ventas', headers=auth, json=venta(producto_id, 1)).status_code == 409
+
+def test_reintento_con_la_misma_clave(client, auth, crear_producto, stock_de):
+    producto_id = crear_producto(stock=10)
+    headers = {**auth, 'Idempotency-Key': uuid.uuid4().hex}
+
+    primera = client.post('/api/ventas', headers=headers, json=venta(producto_id, 2))
+    segunda = client.post('/api/ventas', headers=headers, json=venta(producto_id, 2))
+
+    assert primera.status_code == 201
+    assert segunda.status_code == 200
+    assert segunda.get_json()['venta']['id'] == primera.get_json()['venta']['id']
+    assert stock_de(producto_id) == 8
+
+def test_lote_reenviado(client, auth, crear_producto, stock_de):
+    producto_id = crear_producto(stock=10)
+    claves = [uuid.uuid4().hex for _ in range(2)]
+    lote = {'ventas': [dict(venta(producto_id, 1), clave=clave) for clave in claves]}
+
+    primera = client.post('/api/ventas/lote', headers=auth, json=lote)
+    segunda = client.post('/api/ventas/lote', headers=auth, json=lote)
+
+    assert primera.status_code == 200
+    registradas = primera.get_json()['resultados']
+    assert [r['estado'] for r in registradas] == ['registrada', 'registrada']
+    duplicadas = segunda.get_json()['resultados']
+    assert [r['estado'] for r in duplicadas] == ['duplicada', 'duplicada']
+    assert [r['venta_id'] for r in duplicadas] == [r['venta_id'] for r in registradas]
+    assert stock_de(producto_id) == 8
+
+def test_clave_repetida_dentro_del_lote(client, auth, crear_producto, stock_de):
+    producto_id = crear_producto(stock=10)
+    clave = uuid.uuid4().hex
+    lote = {'ventas': [dict(venta(producto_id, 1), clave=clave) for _ in range(2)]}
+
+    resultados = client.post('/api/ventas/lote', headers=auth, json=lote).get_json()['resultados']
+
+    assert [r['estado'] for r in resultados] == ['registrada', 'duplicada']
+    assert resultados[1]['venta_id'] == resultados[0]['venta_id']
+    assert stock_de(producto_id) == 9
@@ -0,0 +1,400 @@
+# backend/utils/analitica.py - Cubo de ventas: agregados por hora / día / mes × producto / categoría
+#
+# Cada venta suma sus cifras a las tablas de models/analitica.py en la misma
+# transacción que la registra (upserts aditivos, uno por tabla). Las consultas
+# leen esos agregados: nunca un GROUP BY sobre las líneas de venta.
+import random
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+from flask import current_app
+from sqlalchemy import select, delete, func, case, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from utils.db import db
+from models.producto import Producto
+from models.venta import Venta, VentaItem
+from models.version import VersionCatalogo
+from models.analitica import VentasHora, VentasHoraCategoria, VentasDiaProducto, VentasMesProducto, ClienteVentas
+
+# Fila de versiones_catalogo: existe una vez construidos los agregados (versión = última venta incluida)
+CLAVE_ESTADO = 'analitica_ventas'
+CLIENTE_GENERAL = 'Cliente General'
+ORDENES = {'unidades', 'importe'}
+MEDIDAS = {'total', 'ventas', 'unidades'}
+MEDIDAS_CATEGORIA = {'importe', 'unidades'}
+LOTE_RECONSTRUCCION = 5000  # ventas por tanda al reconstruir
+SHARDS_HORA = 8  # filas por hora (y por hora y categoría) entre las que se reparten las ventas
+
+def zona():
+    """Zona de la tienda: define qué es 'hoy' y a qué hora local cae cada venta"""
+    return ZoneInfo(current_app.config.get('VENTAS_ZONA_HORARIA', 'UTC'))
+
+def _hora(fecha):
+    return fecha.replace(minute=0, second=0, microsecond=0)
+
+def _local(fecha_utc, tz):
+    return fecha_utc.replace(tzinfo=timezone.utc).astimezone(tz)
+
+def _a_utc(fecha, tz):
+    """Medianoche local de `fecha` -> datetime UTC naive (el formato de Venta.fecha)"""
+    return datetime.combine(fecha, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+def _clave_cliente(nombre, telefono):
+    telefono = (telefono or '').strip()
+    if telefono:
+        return f'tel:{telefono}'[:150]
+    nombre = (nombre or '').strip()
+    if nombre and nombre != CLIENTE_GENERAL:
+        return f'nombre:{nombre.lower()}'[:150]
+    return None
+
+class _Acumulador:
+    """Suma ventas en memoria y las vuelca con un upsert por tabla"""
+
+    def __init__(self, tz, shard=0):
+        self.tz = tz
+        self.shard = shard
+        self.horas = {}
+        self.horas_categoria = {}
+        self.dias = {}
+        self.meses = {}
+        self.clientes = {}
+
+    def agregar(self, fecha, subtotal, total, cliente, telefono, lineas):
+        """`lineas`: [(producto_id, categoria, cantidad, importe)]"""
+        hora = _hora(fecha)
+        dia = _local(fecha, self.tz).date()
+        mes = dia.replace(day=1)
+
+        fila = self.horas.setdefault(hora, [0, 0, Decimal('0'), Decimal('0')])
+        fila[0] += 1
+        fila[2] += subtotal
+        fila[3] += total
+        for producto_id, categoria, cantidad, importe in lineas:
+            fila[1] += cantidad
+            suma = self.horas_categoria.setdefault((hora, categoria), [0, Decimal('0')])
+            suma[0] += cantidad
+            suma[1] += importe
+            for destino, clave in ((self.dias, (dia, producto_id)), (self.meses, (mes, producto_id))):
+                suma = destino.setdefault(clave, [categoria, 0, Decimal('0')])
+                suma[1] += cantidad
+                suma[2] += importe
+
+        clave = _clave_cliente(cliente, telefono)
+        if clave is not None:
+            # El último nombre real que dejó el cliente (no 'Cliente General')
+            nombre = cliente.strip() if cliente and cliente.strip() != CLIENTE_GENERAL else None
+            datos = self.clientes.get(clave)
+            if datos is None:
+                self.clientes[clave] = [nombre, telefono or None, fecha, fecha, 1, total]
+            else:
+                datos[0] = nombre or datos[0]
+                datos[2] = min(datos[2], fecha)
+                datos[3] = max(datos[3], fecha)
+                datos[4] += 1
+                datos[5] += total
+
+    def volcar(self):
+        # Claves ordenadas: dos transacciones toman las mismas filas en el mismo orden
+        _upsert(VentasHora, ['hora', 'shard'], ['ventas', 'unidades', 'subtotal', 'total'], [
+            {'hora': hora, 'shard': self.shard, 'ventas': v, 'unidades': u, 'subtotal': s, 'total': t}
+            for hora, (v, u, s, t) in sorted(self.horas.items())
+        ])
+        _upsert(VentasHoraCategoria, ['hora', 'categoria', 'shard'], ['unidades', 'importe'], [
+            {'hora': hora, 'categoria': categoria, 'shard': self.shard, 'unidades': u, 'importe': i}
+            for (hora, categoria), (u, i) in sorted(self.horas_categoria.items())
+        ])
+        for modelo, filas in ((VentasDiaProducto, self.dias), (VentasMesProducto, self.meses)):
+            _upsert(modelo, ['fecha', 'producto_id'], ['unidades', 'importe'], [
+                {'fecha': fecha, 'producto_id': producto_id, 'categoria': c, 'unidades': u, 'importe': i}
+                for (fecha, producto_id), (c, u, i) in sorted(filas.items())
+            ])
+        _upsert_clientes([
+            {'clave': clave, 'nombre': n, 'telefono': tel, 'primera_compra': p, 'ultima_compra': ul,
+             'compras': c, 'total': t}
+            for clave, (n, tel, p, ul, c, t) in sorted(self.clientes.items())
+        ])
+
+# Sentencias de upsert ya armadas, por (dialecto, tabla): se ejecutan en cada venta
+_sentencias = {}
+
+def _insert(modelo):
+    """INSERT con ON CONFLICT (mismo soporte en SQLite y PostgreSQL)"""
+    return (postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert)(modelo)
+
+def _upsert(modelo, claves, sumas, filas):
+    if not filas:
+        return
+    clave = (db.engine.dialect.name, modelo)
+    stmt = _sentencias.get(clave)
+    if stmt is None:
+        stmt = _insert(modelo)
+        tabla = modelo.__table__
+        stmt = _sentencias[clave] = stmt.on_conflict_do_update(
+            index_elements=claves,
+            set_={campo: tabla.c[campo] + stmt.excluded[campo] for campo in sumas}
+        )
+    db.session.execute(stmt, filas)
+
+def _upsert_clientes(filas):
+    if not filas:
+        return
+    clave = (db.engine.dialect.name, ClienteVentas)
+    if clave not in _sentencias:
+        _sentencias[clave] = _sentencia_clientes()
+    db.session.execute(_sentencias[clave], filas)
+
+def _sentencia_clientes():
+    stmt = _insert(ClienteVentas)
+    tabla, nuevo = ClienteVentas.__table__, stmt.excluded
+    return stmt.on_conflict_do_update(index_elements=['clave'], set_={
+        'nombre': func.coalesce(nuevo.nombre, tabla.c.nombre),
+        'telefono': nuevo.telefono,
+        'primera_compra': case((nuevo.primera_compra < tabla.c.primera_compra, nuevo.primera_compra),
+                               else_=tabla.c.primera_compra),
+        'ultima_compra': case((nuevo.ultima_compra > tabla.c.ultima_compra, nuevo.ultima_compra),
+                              else_=tabla.c.ultima_compra),
+        'compras': tabla.c.compras + nuevo.compras,
+        'total': tabla.c.total + nuevo.total
+    })
+
+def registrar_ventas(ventas):
+    """
+    Suma `ventas` (ya con flush, con sus items) a los agregados. Llamar en la
+    transacción de la venta, después de descontar stock: las filas de productos
+    ya están bloqueadas y el orden de locks queda productos -> agregados -> versiones.
+    """
+    if not ventas:
+        return
+    ids = {item.producto_id for venta in ventas for item in venta.items}
+    categorias = dict(db.session.execute(
+        select(Producto.id, func.coalesce(Producto.categoria, '')).where(Producto.id.in_(sorted(ids)))
+    ).all())
+
+    # Shard al azar: dos cajas en la misma hora casi nunca esperan por la misma fila
+    acumulador = _Acumulador(zona(), random.randrange(SHARDS_HORA))
+    for venta in ventas:
+        acumulador.agregar(venta.fecha, venta.subtotal, venta.total, venta.cliente, venta.telefono, [
+            (item.producto_id, categorias.get(item.producto_id, ''), item.cantidad, item.subtotal)
+            for item in venta.items
+        ])
+    acumulador.volcar()
+
+def reconstruir():
+    """
+    Rehace los agregados desde las ventas, por tandas de id. Es para la carga
+    inicial o después de cambiar VENTAS_ZONA_HORARIA: correrlo con las cajas
+    cerradas (una venta confirmada durante la reconstrucción se contaría dos veces).
+    """
+    estado = db.session.execute(
+        select(VersionCatalogo).where(VersionCatalogo.clave == CLAVE_ESTADO).with_for_update()
+    ).scalar()
+    if estado is None:
+        estado = VersionCatalogo(clave=CLAVE_ESTADO, version=0)
+        db.session.add(estado)
+    for modelo in (VentasHora, VentasHoraCategoria, VentasDiaProducto, VentasMesProducto, ClienteVentas):
+        db.session.execute(delete(modelo))
+
+    tz, ultimo, total_ventas = zona(), 0, 0
+    while True:
+        ventas = db.session.execute(
+            select(Venta.id, Venta.fecha, Venta.subtotal, Venta.total, Venta.cliente, Venta.telefono)
+            .where(Venta.id > ultimo).order_by(Venta.id).limit(LOTE_RECONSTRUCCION)
+        ).all()
+        if not ventas:
+            break
+        lineas = {}
+        for venta_id, producto_id, categoria, cantidad, importe in db.session.execute(
+            select(VentaItem.venta_id, VentaItem.producto_id, func.coalesce(Producto.categoria, ''),
+                   VentaItem.cantidad, VentaItem.subtotal)
+            .outerjoin(Producto, Producto.id == VentaItem.producto_id)
+            .where(VentaItem.venta_id > ultimo, VentaItem.venta_id <= ventas[-1].id)
+        ):
+            lineas.setdefault(venta_id, []).append((producto_id, categoria, cantidad, importe))
+
+        acumulador = _Acumulador(tz)
+        for venta in ventas:
+            acumulador.agregar(venta.fecha, venta.subtotal, venta.total, venta.cliente, venta.telefono,
+                               lineas.get(venta.id, []))
+        acumulador.volcar()
+        ultimo, total_ventas = ventas[-1].id, total_ventas + len(ventas)
+
+    estado.version = ultimo
+    db.session.commit()
+    return {'ventas': total_ventas, 'ultima_venta': ultimo}
+
+def inicializar():
+    """Construye los agregados la primera vez (bases con ventas anteriores al cubo)"""
+    if db.session.get(VersionCatalogo, CLAVE_ESTADO) is None:
+        return reconstruir()
+    return None
+
+# --- Consultas ---
+
+def _totales(desde_utc, hasta_utc):
+    fila = db.session.execute(
+        select(func.coalesce(func.sum(VentasHora.ventas), 0), func.coalesce(func.sum(VentasHora.unidades), 0),
+               func.coalesce(func.sum(VentasHora.subtotal), 0), func.coalesce(func.sum(VentasHora.total), 0))
+        .where(VentasHora.hora >= desde_utc, VentasHora.hora < hasta_utc)
+    ).one()
+    ventas, unidades, subtotal, total = int(fila[0]), int(fila[1]), float(fila[2]), float(fila[3])
+    return {
+        'ventas': ventas,
+        'unidades': unidades,
+        'subtotal': round(subtotal, 2),
+        'total': round(total, 2),
+        'ticket_promedio': round(total / ventas, 2) if ventas else 0.0
+    }
+
+def ventas_hoy_subconsulta():
+    """Total vendido hoy (día local) como subconsulta escalar, para el resumen del dashboard"""
+    tz = zona()
+    inicio = _a_utc(datetime.now(tz).date(), tz)
+    return select(func.coalesce(func.sum(VentasHora.total), 0)).where(VentasHora.hora >= inicio).scalar_subquery()
+
+def clientes_subconsulta():
+    return select(func.count()).select_from(ClienteVentas).scalar_subquery()
+
+def hoy():
+    """Totales de hoy, curva por hora local y el mismo día de la semana pasada hasta la misma hora"""
+    tz = zona()
+    ahora = datetime.now(tz)
+    inicio = _a_utc(ahora.date(), tz)
+    fin = _a_utc(ahora.date() + timedelta(days=1), tz)
+    # Hasta el final de la hora en curso (las horas son la unidad del agregado)
+    corte = _hora(ahora.astimezone(timezone.utc).replace(tzinfo=None)) + timedelta(hours=1)
+
+    por_hora = [{'hora': _local(hora, tz).hour, 'ventas': int(ventas), 'total': float(total)}
+                for hora, ventas, total in db.session.execute(
+                    select(VentasHora.hora, func.sum(VentasHora.ventas), func.sum(VentasHora.total))
+                    .where(VentasHora.hora >= inicio, VentasHora.hora < fin)
+                    .group_by(VentasHora.hora).order_by(VentasHora.hora)
+                )]
+    semana = timedelta(days=7)
+    return {
+        'fecha': ahora.date().isoformat(),
+        'zona_horaria': str(tz),
+        **_totales(inicio, fin),
+        'por_hora': por_hora,
+        'semana_anterior': _totales(inicio - semana, corte - semana)
+    }
+
+def _productos_en_rango(desde, hasta):
+    """
+    (producto_id, categoria, unidades, importe) de [desde, hasta]: los meses
+    completos salen de la tabla mensual y solo los días sueltos de los bordes
+    de la diaria, así un rango de años lee meses y no días.
+    """
+    D, M = VentasDiaProducto, VentasMesProducto
+    columnas = lambda t: (t.producto_id, t.categoria, t.unidades, t.importe)
+    primer_mes = desde if desde.day == 1 else (desde.replace(day=28) + timedelta(days=4)).replace(day=1)
+    fin_meses = (hasta + timedelta(days=1)).replace(day=1)
+    if primer_mes >= fin_meses:
+        return select(*columnas(D)).where(D.fecha.between(desde, hasta)).subquery()
+    return union_all(
+        select(*columnas(M)).where(M.fecha >= primer_mes, M.fecha < fin_meses),
+        select(*columnas(D)).where(D.fecha >= desde, D.fecha < primer_mes),
+        select(*columnas(D)).where(D.fecha >= fin_meses, D.fecha <= hasta)
+    ).subquery()
+
+def top_productos(desde, hasta, categoria=None, orden='unidades', limite=10):
+    """Los más vendidos del período, por unidades o por importe"""
+    rango = _productos_en_rango(desde, hasta)
+    unidades = func.sum(rango.c.unidades).label('unidades')
+    importe = func.sum(rango.c.importe).label('importe')
+    consulta = (
+        select(rango.c.producto_id, func.max(rango.c.categoria).label('categoria'), unidades, importe)
+        .group_by(rango.c.producto_id)
+        .order_by((unidades if orden == 'unidades' else importe).desc(), rango.c.producto_id)
+        .limit(limite)
+    )
+    if categoria is not None:
+        consulta = consulta.where(rango.c.categoria == categoria)
+    filas = db.session.execute(consulta).all()
+
+    nombres = dict(db.session.execute(
+        select(Producto.id, Producto.nombre).where(Producto.id.in_([f.producto_id for f in filas]))
+    ).all())
+    return [{
+        'producto_id': fila.producto_id,
+        'nombre': nombres.get(fila.producto_id),  # None si el producto se dio de baja
+        'categoria': fila.categoria or None,
+        'unidades': int(fila.unidades),
+        'importe': float(fila.importe)
+    } for fila in filas]
+
+def mapa_calor(desde, hasta, categoria=None, medida='total'):
+    """
+    Matriz día de la semana (0 = lunes) × hora local con la `medida` sumada en el
+    período. Sin categoría lee los totales por hora; con categoría, unidades o importe.
+    """
+    tz = zona()
+    inicio, fin = _a_utc(desde, tz), _a_utc(hasta + timedelta(days=1), tz)
+    if categoria is None:
+        columna = getattr(VentasHora, medida)
+        consulta = select(VentasHora.hora, columna).where(VentasHora.hora >= inicio, VentasHora.hora < fin)
+    else:
+        columna = getattr(VentasHoraCategoria, medida)
+        consulta = select(VentasHoraCategoria.hora, columna).where(
+            VentasHoraCategoria.categoria == categoria,
+            VentasHoraCategoria.hora >= inicio, VentasHoraCategoria.hora < fin
+        )
+
+    matriz = [[0.0] * 24 for _ in range(7)]
+    for hora, valor in db.session.execute(consulta):
+        local = _local(hora, tz)
+        matriz[local.weekday()][local.hour] += float(valor)
+    return {
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'medida': medida,
+        'categoria': categoria,
+        'zona_horaria': str(tz),
+        'matriz': [[round(valor, 2) for valor in fila] for fila in matriz]
+    }
+
+def _categorias(desde_utc, hasta_utc):
+    return {categoria: {'unidades': int(unidades), 'importe': round(float(importe), 2)}
+            for categoria, unidades, importe in db.session.execute(
+                select(VentasHoraCategoria.categoria, func.sum(VentasHoraCategoria.unidades),
+                       func.sum(VentasHoraCategoria.importe))
+                .where(VentasHoraCategoria.hora >= desde_utc, VentasHoraCategoria.hora < hasta_utc)
+                .group_by(VentasHoraCategoria.categoria)
+            )}
+
+def _variacion(actual, anterior):
+    """Variación porcentual (None si el período anterior es 0)"""
+    return round((actual - anterior) / anterior * 100, 1) if anterior else None
+
+def comparar(desde, hasta, contra_desde=None, contra_hasta=None):
+    """
+    Totales y categorías de [desde, hasta] contra otro período; por defecto el
+    inmediatamente anterior de la misma cantidad de días.
+    """
+    if contra_desde is None or contra_hasta is None:
+        dias = (hasta - desde).days + 1
+        contra_hasta = desde - timedelta(days=1)
+        contra_desde = contra_hasta - timedelta(days=dias - 1)
+
+    tz = zona()
+    actual_rango = (_a_utc(desde, tz), _a_utc(hasta + timedelta(days=1), tz))
+    anterior_rango = (_a_utc(contra_desde, tz), _a_utc(contra_hasta + timedelta(days=1), tz))
+    actual, anterior = _totales(*actual_rango), _totales(*anterior_rango)
+    cat_actual, cat_anterior = _categorias(*actual_rango), _categorias(*anterior_rango)
+
+    vacio = {'unidades': 0, 'importe': 0.0}
+    return {
+        'periodo': {'desde': desde.isoformat(), 'hasta': hasta.isoformat()},
+        'contra': {'desde': contra_desde.isoformat(), 'hasta': contra_hasta.isoformat()},
+        'actual': actual,
+        'anterior': anterior,
+        'variacion': {campo: _variacion(actual[campo], anterior[campo])
+                      for campo in ('ventas', 'unidades', 'total', 'ticket_promedio')},
+        'por_categoria': [{
+            'categoria': categoria or None,
+            'actual': cat_actual.get(categoria, vacio),
+            'anterior': cat_anterior.get(categoria, vacio),
+            'variacion_importe': _variacion(cat_actual.get(categoria, vacio)['importe'],
+                                            cat_anterior.get(categoria, vacio)['importe'])
+        } for categoria in sorted(set(cat_actual) | set(cat_anterior))]
+    }
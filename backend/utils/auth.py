@@ -1,12 +1,183 @@
-from flask_jwt_extended import JWTManager
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from flask import jsonify, g
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt
 from flask_bcrypt import Bcrypt
+from sqlalchemy import select, update
+from utils.db import db
+from werkzeug.security import check_password_hash as check_werkzeug_hash
+from utils.metricas import incrementar
 bcrypt = Bcrypt()
 
+# ✅ Hashing de contraseñas fuera de los hilos de request: pool acotado con cola limitada
+_executor = None
+_cupos = None
+_tamano_pool = None  # (workers, cola) de init_bcrypt, para rearmar el pool tras un fork
+_rondas_config = 12
+_lock = threading.Lock()
+
+class HashingSaturadoError(Exception):
+    """Demasiados hashes de contraseña en espera: se rechaza enseguida (503)"""
+
+def _crear_pool():
+    global _executor, _cupos
+    workers, cola = _tamano_pool
+    _cupos = threading.BoundedSemaphore(workers + cola)
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+
 def init_bcrypt(app):
+    global _tamano_pool, _rondas_config
     bcrypt.init_app(app)
+    _rondas_config = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    with _lock:
+        if _executor is None:
+            _tamano_pool = (app.config.get('AUTH_HASH_WORKERS') or os.cpu_count() or 2,
+                            app.config.get('AUTH_HASH_COLA', 32))
+            _crear_pool()
+
+def _despues_de_fork():
+    """
+    Un worker de gunicorn hereda el pool del master pero no sus hilos: un pool que ya
+    había arrancado alguno cree tenerlo y los hashes encolados no corren nunca.
+    Cada proceso hijo arma el suyo.
+    """
+    global _lock
+    _lock = threading.Lock()
+    if _tamano_pool is not None:
+        _crear_pool()
+
+os.register_at_fork(after_in_child=_despues_de_fork)
+
+def _ejecutar(funcion, *args):
+    """Corre `funcion` en el pool de hashing; si la cola está llena no espera"""
+    if not _cupos.acquire(blocking=False):
+        incrementar('auth_hash_total', (('resultado', 'rechazado'),))
+        raise HashingSaturadoError('Servidor ocupado, reintentá en unos segundos')
+    try:
+        futuro = _executor.submit(funcion, *args)
+    except Exception:
+        _cupos.release()
+        raise
+    futuro.add_done_callback(lambda _: _cupos.release())
+    incrementar('auth_hash_total', (('resultado', 'ok'),))
+    return futuro.result()
+
+def _rondas(hash_password):
+    """'$2b$12$...' -> 12"""
+    try:
+        return int(hash_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def hashear_password(password, sincronico=False):
+    """
+    Hash bcrypt con el costo configurado (BCRYPT_LOG_ROUNDS). sincronico=True lo
+    calcula en el hilo actual, sin arrancar el pool (init_db, comandos de consola).
+    """
+    if sincronico:
+        return bcrypt.generate_password_hash(password).decode('utf-8')
+    return _ejecutar(bcrypt.generate_password_hash, password).decode('utf-8')
+
+def _verificar(hash_password, password):
+    try:
+        if hash_password.startswith('$2'):
+            return bcrypt.check_password_hash(hash_password, password)
+        # Hashes heredados de werkzeug (admin sembrado por versiones anteriores)
+        return check_werkzeug_hash(hash_password, password)
+    except ValueError:  # bcrypt: contraseña de más de 72 bytes o hash corrupto
+        return False
+
+def verificar_password(hash_password, password):
+    """
+    Retorna (valida, necesita_rehash). Hay que rehashear si el hash no es bcrypt
+    o si se generó con un costo distinto al configurado.
+    """
+    valida = _ejecutar(_verificar, hash_password, password)
+    necesita_rehash = valida and _rondas(hash_password) != _rondas_config
+    return valida, necesita_rehash
 
 jwt = JWTManager()
 
+# ✅ Revocación: {usuario_id: (token_version, vence)} por proceso; la base se consulta
+# como mucho una vez por usuario cada AUTH_REVOCACION_TTL segundos
+_versiones_token = {}
+_ttl_revocacion = 30
+
 def init_app(app):
     jwt.init_app(app)
 
+def init_autorizacion(app):
+    global _ttl_revocacion
+    _ttl_revocacion = app.config.get('AUTH_REVOCACION_TTL', 30)
+
+def claims_usuario(usuario):
+    """Claims firmados en el token: lo que hace falta para autorizar sin leer la base"""
+    return {'rol': usuario.rol, 'username': usuario.username, 'tv': usuario.token_version}
+
+def version_token(usuario_id):
+    """token_version vigente del usuario (-1 si ya no existe)"""
+    ahora = time.monotonic()
+    entrada = _versiones_token.get(usuario_id)
+    if entrada is not None and entrada[1] > ahora:
+        return entrada[0]
+
+    from models.usuario import Usuario
+    version = db.session.execute(
+        select(Usuario.token_version).where(Usuario.id == usuario_id)
+    ).scalar()
+    version = -1 if version is None else version
+    _versiones_token[usuario_id] = (version, ahora + _ttl_revocacion)
+    return version
+
+def revocar_tokens(usuario_id):
+    """
+    Invalida todos los tokens del usuario. Este proceso lo ve enseguida;
+    los demás workers, cuando vence su entrada en caché (AUTH_REVOCACION_TTL).
+    """
+    from models.usuario import Usuario
+    db.session.execute(
+        update(Usuario)
+        .where(Usuario.id == usuario_id)
+        .values(token_version=Usuario.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    _versiones_token.pop(usuario_id, None)
+
+@jwt.token_in_blocklist_loader
+def _token_revocado(jwt_header, jwt_payload):
+    # Tokens sin versión (emitidos antes de los claims de rol) obligan a loguearse de nuevo
+    if 'tv' not in jwt_payload:
+        return True
+    return jwt_payload['tv'] != version_token(int(jwt_payload['sub']))
+
+@jwt.token_verification_loader
+def _uso_valido(jwt_header, jwt_payload):
+    # Un token de uso específico (claim 'uso') solo sirve en las rutas declaradas para ese
+    # uso, y esas rutas no aceptan el token de sesión
+    return jwt_payload.get('uso') == g.get('uso_token')
+
+@jwt.token_verification_failed_loader
+def _uso_invalido(jwt_header, jwt_payload):
+    return jsonify({'error': 'Token no válido para este recurso'}), 401
+
+def rol_requerido(*roles, ubicaciones=None, uso=None):
+    """
+    Como @jwt_required(), pero además exige que el claim 'rol' esté en `roles`.
+    `ubicaciones` amplía dónde se busca el token (ej. 'query_string' para
+    EventSource, que no puede mandar headers). Con `uso` solo se aceptan
+    tokens emitidos para ese uso (claim 'uso').
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            g.uso_token = uso
+            verify_jwt_in_request(locations=ubicaciones)
+            if get_jwt().get('rol') not in roles:
+                return jsonify({'error': 'No tenés permisos para esta acción'}), 403
+            return vista(*args, **kwargs)
+        return envoltura
+    return decorador
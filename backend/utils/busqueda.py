@@ -0,0 +1,222 @@
+# backend/utils/busqueda.py - Búsqueda de productos indexada e insensible a acentos/mayúsculas
+import unicodedata
+from contextlib import contextmanager
+from sqlalchemy import func, text, table, column, bindparam
+from utils.db import db
+from utils.logs import get_logger
+
+log = get_logger('busqueda')
+
+# Tamaño mínimo de palabra que aprovecha los índices de trigramas
+MIN_TRIGRAMA = 3
+LOTE_BACKFILL = 5000
+
+_capacidades = {}
+
+def _tabla_sin_acentos():
+    """{'á': 'a', 'ñ': 'n', ...} para los caracteres latinos con acento (Latin-1 y Latin Extended-A)"""
+    tabla = {}
+    for codigo in range(0xC0, 0x180):
+        base = ''.join(c for c in unicodedata.normalize('NFKD', chr(codigo)) if not unicodedata.combining(c))
+        if base.isascii() and base:
+            tabla[codigo] = base
+    return tabla
+
+_SIN_ACENTOS = _tabla_sin_acentos()
+
+# SQL del trigger de inserción de la tabla FTS (SQLite)
+_TRIGGER_FTS_AI = (
+    "CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN "
+    "INSERT INTO productos_fts(rowid, busqueda_normalizada) VALUES (new.id, new.busqueda_normalizada); END"
+)
+
+def normalizar(texto):
+    """'Azúcar Ledesma' -> 'azucar ledesma' (sin acentos, minúsculas, espacios simples)"""
+    if not texto:
+        return ''
+    # translate cubre los acentos del español en C; NFKD solo para lo que quede
+    texto = texto.casefold().translate(_SIN_ACENTOS)
+    if not texto.isascii():
+        descompuesto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+def texto_busqueda(nombre, descripcion):
+    """Contenido de la columna busqueda_normalizada (nombre primero)"""
+    return normalizar(f"{nombre or ''} {descripcion or ''}")
+
+def _escapar_like(valor):
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _motor():
+    return db.engine.dialect.name
+
+def _trigramas_disponibles():
+    """pg_trgm instalado en PostgreSQL (se consulta una vez por proceso)"""
+    if 'pg_trgm' not in _capacidades:
+        _capacidades['pg_trgm'] = bool(db.session.execute(text(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        )).scalar())
+    return _capacidades['pg_trgm']
+
+def _fts_disponible():
+    """Tabla FTS5 con tokenizer trigram creada en SQLite"""
+    if 'fts5' not in _capacidades:
+        _capacidades['fts5'] = bool(db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        )).scalar())
+    return _capacidades['fts5']
+
+def aplicar_busqueda(query, termino, ordenar=True):
+    """
+    Filtra `query` por todas las palabras de `termino` (coincidencia por subcadena)
+    y, si ordenar=True, ordena por relevancia.
+    - PostgreSQL: LIKE sobre la columna normalizada con índice GIN gin_trgm_ops,
+      ranking con word_similarity
+    - SQLite: tabla FTS5 (tokenizer trigram), ranking con bm25
+    """
+    from models.producto import Producto
+
+    normalizado = normalizar(termino)
+    palabras = normalizado.split()
+    if not palabras:
+        return query
+
+    motor = _motor()
+    largas = [p for p in palabras if len(p) >= MIN_TRIGRAMA]
+
+    if motor == 'sqlite' and largas and _fts_disponible():
+        # Las palabras largas van al índice FTS; las cortas ("de", "x") filtran
+        # con LIKE solo el conjunto ya reducido por el índice
+        fts = table('productos_fts', column('rowid'))
+        consulta_fts = ' '.join('"%s"' % p.replace('"', '""') for p in largas)
+        query = query.join(fts, fts.c.rowid == Producto.id).filter(
+            text('productos_fts MATCH :consulta_fts').bindparams(consulta_fts=consulta_fts)
+        )
+        for palabra in palabras:
+            if len(palabra) < MIN_TRIGRAMA:
+                query = query.filter(
+                    Producto.busqueda_normalizada.like(f'%{_escapar_like(palabra)}%', escape='\\')
+                )
+        if ordenar:
+            query = query.order_by(text('bm25(productos_fts)'))
+        return query
+
+    for palabra in palabras:
+        query = query.filter(
+            Producto.busqueda_normalizada.like(f'%{_escapar_like(palabra)}%', escape='\\')
+        )
+
+    if ordenar:
+        if motor == 'postgresql' and _trigramas_disponibles():
+            query = query.order_by(func.word_similarity(normalizado, Producto.busqueda_normalizada).desc())
+        else:
+            # Sin trigramas: primero los que empiezan con el término
+            query = query.order_by(
+                Producto.busqueda_normalizada.like(f'{_escapar_like(normalizado)}%', escape='\\').desc()
+            )
+    return query
+
+@contextmanager
+def indexado_diferido():
+    """
+    Para inserts masivos en SQLite: suspende el trigger de inserción de la tabla FTS
+    y agrega todas las filas nuevas al índice con un único INSERT ... SELECT al final
+    (varias veces más rápido que el trigger fila por fila). En otros motores no hace nada.
+    """
+    if _motor() != 'sqlite' or not _fts_disponible():
+        yield
+        return
+
+    conexion = db.session.connection()
+    # pysqlite abre la transacción recién con el primer INSERT/UPDATE/DELETE: sin este BEGIN
+    # el DROP se confirma solo y, si el worker muere a mitad de la importación (timeout,
+    # SIGKILL), los productos nuevos quedan fuera de la búsqueda para siempre
+    if not conexion.connection.dbapi_connection.in_transaction:
+        conexion.exec_driver_sql('BEGIN')
+    conexion.execute(text('DROP TRIGGER IF EXISTS productos_fts_ai'))
+    # Las filas nuevas siempre reciben rowid > máximo actual
+    ultimo_id = conexion.execute(text('SELECT COALESCE(MAX(id), 0) FROM productos')).scalar()
+    try:
+        yield
+    except Exception:
+        # El rollback deshace también el DROP: el trigger vuelve solo
+        db.session.rollback()
+        raise
+
+    # Misma transacción que los inserts: el commit del llamador confirma todo junto
+    db.session.execute(text(
+        'INSERT INTO productos_fts(rowid, busqueda_normalizada) '
+        'SELECT id, busqueda_normalizada FROM productos WHERE id > :ultimo_id'
+    ), {'ultimo_id': ultimo_id})
+    db.session.execute(text(_TRIGGER_FTS_AI))
+
+def _backfill():
+    """Completa busqueda_normalizada en filas creadas antes de existir la columna"""
+    from models.producto import Producto
+    total = 0
+    while True:
+        filas = db.session.query(Producto.id, Producto.nombre, Producto.descripcion).filter(
+            Producto.busqueda_normalizada.is_(None)
+        ).limit(LOTE_BACKFILL).all()
+        if not filas:
+            break
+        db.session.execute(
+            Producto.__table__.update()
+            .where(Producto.__table__.c.id == bindparam('b_id'))
+            .values(busqueda_normalizada=bindparam('b_texto')),
+            [{'b_id': f.id, 'b_texto': texto_busqueda(f.nombre, f.descripcion)} for f in filas]
+        )
+        db.session.commit()
+        total += len(filas)
+    return total
+
+def crear_indices_busqueda():
+    """
+    Crea (idempotente) los índices de búsqueda según el motor y completa la
+    columna normalizada en filas viejas. Se llama desde init_db.
+    """
+    motor = _motor()
+    if motor == 'postgresql':
+        try:
+            db.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            db.session.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_productos_busqueda_trgm '
+                'ON productos USING gin (busqueda_normalizada gin_trgm_ops)'
+            ))
+            db.session.commit()
+        except Exception as e:
+            # Sin permisos para la extensión: la búsqueda funciona igual, sin índice
+            db.session.rollback()
+            log.warning('No se pudo crear el índice de trigramas', extra={'datos': {'error': str(e)}})
+    elif motor == 'sqlite':
+        existia = bool(db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        )).scalar())
+        if not existia:
+            # Antes de crear los triggers: un 'delete' FTS de filas sin indexar corrompe el índice
+            _backfill()
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5("
+            "busqueda_normalizada, content='productos', content_rowid='id', tokenize='trigram')"
+        ))
+        db.session.execute(text(_TRIGGER_FTS_AI))
+        db.session.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN "
+            "INSERT INTO productos_fts(productos_fts, rowid, busqueda_normalizada) "
+            "VALUES ('delete', old.id, old.busqueda_normalizada); END"
+        ))
+        db.session.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF busqueda_normalizada ON productos BEGIN "
+            "INSERT INTO productos_fts(productos_fts, rowid, busqueda_normalizada) "
+            "VALUES ('delete', old.id, old.busqueda_normalizada); "
+            "INSERT INTO productos_fts(rowid, busqueda_normalizada) VALUES (new.id, new.busqueda_normalizada); END"
+        ))
+        db.session.commit()
+        if not existia:
+            db.session.execute(text("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')"))
+            db.session.commit()
+        _capacidades.pop('fts5', None)
+        return
+
+    _backfill()
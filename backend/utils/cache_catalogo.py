@@ -0,0 +1,138 @@
+# backend/utils/cache_catalogo.py - Caché de respuestas de lectura del catálogo (versión + ETag)
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response, Response
+from sqlalchemy import select, update
+from utils.db import db
+from utils.versiones import version_actual, incrementar_version
+from utils.metricas import incrementar
+from models.version import VersionCatalogo
+
+CLAVE_VERSION = 'catalogo'
+# Período (número de ventana de CATALOGO_STOCK_SEGUNDOS) desde el que el catálogo cacheado
+# debe reflejar el último cambio de solo stock (ver invalidar_stock)
+CLAVE_STOCK = 'catalogo_stock'
+
+class CacheLRU:
+    """Caché acotada por cantidad de entradas y por bytes, con desalojo LRU"""
+
+    def __init__(self):
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+            return entrada
+
+    def put(self, clave, entrada, max_entradas, max_bytes):
+        tamano = len(entrada[0])
+        if tamano > max_bytes:
+            return
+        with self._lock:
+            anterior = self._datos.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior[0])
+            self._datos[clave] = entrada
+            self._bytes += tamano
+            while len(self._datos) > max_entradas or self._bytes > max_bytes:
+                _, desalojada = self._datos.popitem(last=False)
+                self._bytes -= len(desalojada[0])
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+_cache = CacheLRU()
+
+def invalidar_catalogo():
+    """
+    Llamar en la misma transacción que la escritura de productos: las entradas
+    de la versión anterior dejan de usarse (y salen por LRU) en todos los workers.
+    """
+    incrementar_version(CLAVE_VERSION)
+
+def _periodo():
+    return int(time.time() // max(current_app.config.get('CATALOGO_STOCK_SEGUNDOS', 5), 1))
+
+def invalidar_stock():
+    """
+    Para escrituras que solo cambian stock (ventas): en lugar de vaciar el catálogo
+    cacheado en cada venta, marca el período siguiente. La fila se escribe a lo sumo
+    una vez por período y el catálogo refleja el stock con hasta CATALOGO_STOCK_SEGUNDOS
+    de atraso (el primer cambio de un período se ve enseguida).
+    """
+    siguiente = _periodo() + 1
+    actualizadas = db.session.execute(
+        update(VersionCatalogo)
+        .where(VersionCatalogo.clave == CLAVE_STOCK, VersionCatalogo.version < siguiente)
+        .values(version=siguiente)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not actualizadas and not version_actual(CLAVE_STOCK):
+        db.session.add(VersionCatalogo(clave=CLAVE_STOCK, version=siguiente))
+
+def _versiones():
+    """(versión del catálogo, período de stock vigente) en una sola lectura"""
+    versiones = dict(db.session.execute(
+        select(VersionCatalogo.clave, VersionCatalogo.version)
+        .where(VersionCatalogo.clave.in_((CLAVE_VERSION, CLAVE_STOCK)))
+    ).all())
+    # Un período marcado a futuro cuenta desde que empieza: los cambios siguientes
+    # del mismo período comparten la entrada cacheada hasta entonces
+    return versiones.get(CLAVE_VERSION, 0), min(versiones.get(CLAVE_STOCK, 0), _periodo())
+
+def _etag(clave):
+    return hashlib.sha1(repr(clave).encode()).hexdigest()[:24]
+
+def cache_catalogo(vista):
+    """
+    Decorador para GET del catálogo. La clave es (endpoint, versión del catálogo,
+    argumentos, más el período de stock): una lectura repetida cuesta la consulta
+    de las versiones (por clave primaria) y un lookup, sin SQL del listado ni serialización. Responde 304
+    si el cliente ya tiene esa versión (If-None-Match).
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = (
+            request.endpoint,
+            *_versiones(),
+            tuple(sorted(kwargs.items())),
+            tuple(sorted(request.args.items(multi=True)))
+        )
+        etag = _etag(clave)
+
+        if request.if_none_match.contains(etag):
+            incrementar('cache_catalogo_total', (('resultado', 'no_modificado'),))
+            respuesta = Response(status=304)
+        else:
+            entrada = _cache.get(clave)
+            if entrada is not None:
+                incrementar('cache_catalogo_total', (('resultado', 'hit'),))
+            else:
+                incrementar('cache_catalogo_total', (('resultado', 'miss'),))
+                generada = make_response(vista(*args, **kwargs))
+                # Errores y 404 no se guardan
+                if generada.status_code != 200:
+                    return generada
+                entrada = (generada.get_data(), generada.mimetype)
+                _cache.put(
+                    clave, entrada,
+                    current_app.config.get('CATALOGO_CACHE_ENTRADAS', 512),
+                    current_app.config.get('CATALOGO_CACHE_BYTES', 64 * 1024 * 1024)
+                )
+            respuesta = Response(entrada[0], mimetype=entrada[1])
+
+        respuesta.set_etag(etag)
+        # Público pero siempre revalidado: tras una escritura nadie ve datos viejos
+        respuesta.cache_control.public = True
+        respuesta.cache_control.no_cache = True
+        return respuesta
+    return envoltura
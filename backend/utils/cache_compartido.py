@@ -0,0 +1,49 @@
+# backend/utils/cache_compartido.py - Caché con TTL corto compartida entre workers (en la base de datos)
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from utils.db import db
+from models.cache import CacheCompartido
+
+def obtener_compartido(clave, ttl, calcular):
+    """
+    Valor de `clave` si no venció; si venció, lo recalcula con `calcular()`.
+    Cuando vence, un solo worker gana el recálculo (UPDATE condicional sobre
+    `expira`) y los demás siguen sirviendo el valor anterior mientras tanto.
+    `calcular` debe retornar algo serializable a JSON.
+
+    La tabla se lee y escribe con conexiones propias a la primaria, fuera de la
+    sesión del request: el UPDATE condicional compara contra el `expira` vigente
+    (no el de una réplica atrasada) y refrescar la caché no cuenta como una
+    escritura del cliente (no lo fija a la primaria, ver utils/replicas.py).
+    """
+    tabla = CacheCompartido.__table__
+    ahora = datetime.utcnow()
+    with db.engine.begin() as conexion:
+        fila = conexion.execute(
+            select(tabla.c.datos, tabla.c.expira).where(tabla.c.clave == clave)
+        ).first()
+        if fila is not None:
+            if fila.expira > ahora:
+                return json.loads(fila.datos)
+            tomado = conexion.execute(
+                update(tabla)
+                .where(tabla.c.clave == clave, tabla.c.expira == fila.expira)
+                .values(expira=ahora + timedelta(seconds=ttl))
+            ).rowcount
+            if not tomado:
+                return json.loads(fila.datos)
+
+    datos = calcular()
+    valores = {'datos': json.dumps(datos), 'expira': datetime.utcnow() + timedelta(seconds=ttl)}
+    try:
+        with db.engine.begin() as conexion:
+            if fila is None:
+                conexion.execute(insert(tabla).values(clave=clave, **valores))
+            else:
+                conexion.execute(update(tabla).where(tabla.c.clave == clave).values(**valores))
+    except IntegrityError:
+        # Otro worker creó la fila al mismo tiempo: su valor es igual de fresco
+        pass
+    return datos
@@ -0,0 +1,36 @@
+# backend/utils/categorias.py - Caché del catálogo de categorías con invalidación por versión
+from sqlalchemy import func
+from utils.db import db
+from models.producto import Producto
+from utils.versiones import version_actual, incrementar_version
+
+CLAVE_VERSION = 'categorias'
+
+# Caché por proceso: tupla (version, {categoria: cantidad}) reemplazada atómicamente
+_cache = (None, None)
+
+def conteos_por_categoria():
+    """
+    {categoria: cantidad de productos}. Se recalcula con un único GROUP BY solo
+    cuando la versión compartida cambió (otro worker o este escribió productos).
+    """
+    global _cache
+    version = version_actual(CLAVE_VERSION)
+    version_cache, conteos = _cache
+    if version_cache == version and conteos is not None:
+        return conteos
+
+    filas = db.session.query(Producto.categoria, func.count(Producto.id)).group_by(Producto.categoria).all()
+    conteos = {categoria: total for categoria, total in sorted(filas, key=lambda f: f[0] or '') if categoria}
+    _cache = (version, conteos)
+    return conteos
+
+def obtener_categorias():
+    """Lista de categorías con al menos un producto"""
+    return list(conteos_por_categoria())
+
+def invalidar_categorias():
+    """Llamar en la misma transacción que la escritura de productos"""
+    global _cache
+    incrementar_version(CLAVE_VERSION)
+    _cache = (None, None)
@@ -1,25 +1,100 @@
 # backend/utils/db.py
 from flask_sqlalchemy import SQLAlchemy
+from utils.replicas import SesionEnrutada
 import os
 
-# Instancia global de SQLAlchemy
-db = SQLAlchemy()
+# Instancia global de SQLAlchemy (lecturas marcadas a réplicas, ver utils/replicas.py)
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
+
+def agregar_columnas_faltantes():
+    """
+    create_all no modifica tablas existentes: agrega las columnas nuevas de los
+    modelos (siempre nullable, con su server_default si tienen) y los índices
+    que falten a bases ya creadas.
+    """
+    from sqlalchemy import inspect, text
+    inspector = inspect(db.engine)
+    tablas_existentes = set(inspector.get_table_names())
+    
+    for tabla in db.metadata.sorted_tables:
+        if tabla.name not in tablas_existentes:
+            continue
+        columnas = {c['name'] for c in inspector.get_columns(tabla.name)}
+        nuevas = [col for col in tabla.columns if col.name not in columnas]
+        for col in nuevas:
+            tipo = col.type.compile(dialect=db.engine.dialect)
+            if col.server_default is not None:
+                tipo += f' DEFAULT {col.server_default.arg}'
+            db.session.execute(text(f'ALTER TABLE {tabla.name} ADD COLUMN {col.name} {tipo}'))
+            print(f"✅ Columna {tabla.name}.{col.name} agregada")
+        db.session.commit()
+        
+        # También índices nuevos sobre columnas que ya existían
+        indices_existentes = {i['name'] for i in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            if indice.name not in indices_existentes:
+                indice.create(db.engine)
+                print(f"✅ Índice {indice.name} creado")
+
+# Claves foráneas que se sacaron de los modelos: (tabla, tabla referida)
+FK_OBSOLETAS = (
+    ('venta_items', 'productos'),  # las ventas de un producto dado de baja se conservan
+)
+
+def quitar_claves_foraneas_obsoletas():
+    """
+    create_all tampoco borra restricciones: quita de bases existentes las FK que
+    ya no están en los modelos (SQLite no las aplica, no hace falta tocarlo)
+    """
+    from sqlalchemy import inspect, text
+    if db.engine.dialect.name == 'sqlite':
+        return
+    inspector = inspect(db.engine)
+    tablas_existentes = set(inspector.get_table_names())
+    for tabla, referida in FK_OBSOLETAS:
+        if tabla not in tablas_existentes:
+            continue
+        for fk in inspector.get_foreign_keys(tabla):
+            if fk['referred_table'] == referida and fk.get('name'):
+                db.session.execute(text(f'ALTER TABLE {tabla} DROP CONSTRAINT {fk["name"]}'))
+                print(f"✅ Restricción {tabla}.{fk['name']} eliminada")
+    db.session.commit()
 
 def init_db():
     """Inicializar base de datos y crear tablas"""
     try:
         # Crear todas las tablas
         db.create_all()
+        agregar_columnas_faltantes()
+        quitar_claves_foraneas_obsoletas()
+        
+        # Índices de búsqueda de productos (trigramas en PostgreSQL, FTS5 en SQLite)
+        from utils.busqueda import crear_indices_busqueda
+        crear_indices_busqueda()
+        
+        # Libro de stock: movimiento 'inicial' para los productos cargados antes del libro
+        from utils.movimientos import inicializar_libro
+        inicializar_libro()
+        
+        # Agregados de ventas: se construyen una vez desde el historial existente
+        from utils.analitica import inicializar
+        inicializar()
+        
+        # Resumen de vencimientos: entero la primera vez, después solo lo pendiente
+        from utils.vencimientos import refrescar
+        refrescar()
         
         # Crear usuario admin por defecto si no existe
         from models.usuario import Usuario
-        from werkzeug.security import generate_password_hash
+        from utils.auth import hashear_password
         
         admin_user = Usuario.query.filter_by(username='admin').first()
         if not admin_user:
             admin_user = Usuario(
                 username='admin',
-                password_hash=generate_password_hash('admin123'),
+                # ✅ bcrypt, igual que /register; sincrónico: init_db corre en el master de
+                #   gunicorn antes del fork y no debe dejar hilos de hashing andando
+                password=hashear_password('admin123', sincronico=True),
                 rol='admin'
             )
             db.session.add(admin_user)
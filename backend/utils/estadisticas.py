@@ -0,0 +1,42 @@
+# backend/utils/estadisticas.py - Resumen del dashboard en una sola consulta agregada
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, func, case
+from utils.db import db
+from models.producto import Producto
+from utils.analitica import ventas_hoy_subconsulta, clientes_subconsulta
+
+def _contar_si(condicion):
+    return func.coalesce(func.sum(case((condicion, 1), else_=0)), 0)
+
+def calcular_resumen(dias_vencimiento=7):
+    """
+    Todas las cifras del dashboard en un único round-trip: agregados condicionales
+    sobre productos + subconsultas escalares sobre los agregados de ventas
+    (total de hoy en la zona de la tienda y clientes identificados).
+    Stock bajo = stock_actual <= stock_minimo de cada producto.
+    """
+    hoy = date.today()
+
+    fila = db.session.execute(select(
+        func.count(Producto.id).label('total_productos'),
+        _contar_si(Producto.stock_actual <= Producto.stock_minimo).label('stock_bajo'),
+        _contar_si(Producto.stock_actual <= 0).label('sin_stock'),
+        func.coalesce(func.sum(Producto.precio * Producto.stock_actual), 0).label('valor_inventario'),
+        _contar_si(Producto.fecha_vencimiento.between(hoy, hoy + timedelta(days=dias_vencimiento))).label('por_vencer'),
+        _contar_si(Producto.fecha_vencimiento < hoy).label('vencidos'),
+        ventas_hoy_subconsulta().label('ventas_hoy'),
+        clientes_subconsulta().label('total_clientes')
+    )).one()
+
+    return {
+        'ventas_hoy': float(fila.ventas_hoy),
+        'total_productos': fila.total_productos,
+        'stock_bajo': int(fila.stock_bajo),
+        'sin_stock': int(fila.sin_stock),
+        'valor_inventario': float(fila.valor_inventario),
+        'por_vencer': int(fila.por_vencer),
+        'vencidos': int(fila.vencidos),
+        'dias_vencimiento': dias_vencimiento,
+        'total_clientes': fila.total_clientes,
+        'fecha_actualizacion': datetime.now().isoformat()
+    }
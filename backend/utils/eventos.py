@@ -0,0 +1,207 @@
+# backend/utils/eventos.py - Eventos en vivo (SSE): un hub por proceso con fan-out y coalescencia
+#
+# Un solo hilo por proceso mira el contador de sincronización de productos (el
+# mismo que alimenta el POS, ver utils/sync_pos.py) y publica lo que cambió desde
+# su vuelta anterior: los cambios de cualquier worker llegan a todos los clientes.
+# Cada mensaje se serializa una vez y queda en un buffer circular; los clientes
+# esperan sobre una Condition y leen desde su última posición, así publicar
+# cuesta lo mismo con 1 o con 500 conexiones. Una ráfaga de escrituras dentro
+# de la misma vuelta sale como un único mensaje por tipo.
+import threading
+import time
+from collections import deque
+from sqlalchemy import select, func
+from utils.db import db
+from utils.logs import get_logger
+from utils.metricas import incrementar
+from utils.serializacion import dumps
+from utils.versiones import version_actual
+from utils.sync_pos import CLAVE_VERSION as CLAVE_SYNC
+from models.producto import Producto, ProductoEliminado
+from models.venta import Venta
+
+log = get_logger('eventos')
+
+# Más cambios que esto en una vuelta: el evento pide recargar en lugar de listarlos
+MAX_PRODUCTOS = 200
+# Mensajes que se conservan; un cliente más atrasado recibe 'resync'
+BUFFER = 256
+RETRY_MS = 3000
+
+def _mensaje(secuencia, tipo, datos):
+    return f'id: {secuencia}\nevent: {tipo}\ndata: '.encode() + dumps(datos) + b'\n\n'
+
+class _Hub:
+    def __init__(self, app):
+        self.app = app
+        self.intervalo = app.config.get('EVENTOS_INTERVALO', 1.0)
+        self.ventana = app.config.get('EVENTOS_VENTANA', 0.25)
+        self.ttl_estadisticas = app.config.get('ESTADISTICAS_TTL', 30)
+        self.condicion = threading.Condition()
+        self.mensajes = deque(maxlen=BUFFER)  # (secuencia, bytes)
+        self.secuencia = 0
+        self.clientes = 0
+        self.hilo = None
+        self.despertar = threading.Event()
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        self.version = None
+        self.ultima_venta = 0
+        self.estadisticas = None
+        self.estadisticas_hasta = 0
+
+    def publicar(self, tipo, datos):
+        with self.condicion:
+            self.secuencia += 1
+            self.mensajes.append((self.secuencia, _mensaje(self.secuencia, tipo, datos)))
+            self.condicion.notify_all()
+        incrementar('eventos_publicados_total', (('tipo', tipo),))
+
+    def desde(self, posicion):
+        """Mensajes posteriores a `posicion` (llamar con la condición tomada); None si ya salieron del buffer"""
+        if self.secuencia == posicion:
+            return []
+        if self.mensajes[0][0] > posicion + 1:
+            return None
+        return [datos for secuencia, datos in self.mensajes if secuencia > posicion]
+
+    def _bucle(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self._revisar()
+            except Exception:
+                log.exception('Error revisando cambios para eventos')
+
+            if self.despertar.wait(self.intervalo):
+                # Una escritura de este proceso: esperar un poco más junta el resto de la ráfaga
+                time.sleep(self.ventana)
+                self.despertar.clear()
+            with self.condicion:
+                if self.clientes == 0:
+                    self.hilo = None
+                    self._reiniciar_estado()
+                    return
+
+    def _revisar(self):
+        version = version_actual(CLAVE_SYNC)
+        if self.version is None:
+            # Primera vuelta: punto de partida, lo anterior ya lo cargaron los clientes al abrir
+            self.version = version
+            self.ultima_venta = db.session.execute(select(func.max(Venta.id))).scalar() or 0
+            return
+
+        ahora = time.monotonic()
+        if version > self.version:
+            self.publicar('productos', self._productos(self.version, version))
+            ventas = self._ventas()
+            if ventas is not None:
+                self.publicar('ventas', ventas)
+            self.version = version
+            # El resumen del dashboard está cacheado: seguirlo hasta que refleje el cambio
+            self.estadisticas_hasta = ahora + self.ttl_estadisticas + self.intervalo
+
+        if ahora < self.estadisticas_hasta:
+            from routes.estadisticas_routes import resumen_cacheado
+            resumen = resumen_cacheado()
+            if resumen != self.estadisticas:
+                self.estadisticas = resumen
+                self.publicar('estadisticas', resumen)
+
+    def _productos(self, desde, hasta):
+        """Ids y stock de lo modificado en (desde, hasta] y las bajas; 'recargar' si son demasiados"""
+        cambios = db.session.execute(
+            select(Producto.id, Producto.stock_actual)
+            .where(Producto.version_sync > desde, Producto.version_sync <= hasta)
+            .order_by(Producto.id).limit(MAX_PRODUCTOS + 1)
+        ).all()
+        eliminados = list(db.session.execute(
+            select(ProductoEliminado.producto_id)
+            .where(ProductoEliminado.version_sync > desde, ProductoEliminado.version_sync <= hasta)
+            .order_by(ProductoEliminado.producto_id).limit(MAX_PRODUCTOS + 1)
+        ).scalars())
+        if len(cambios) > MAX_PRODUCTOS or len(eliminados) > MAX_PRODUCTOS:
+            return {'version': hasta, 'recargar': True, 'productos': [], 'eliminados': []}
+        return {
+            'version': hasta,
+            'recargar': False,
+            'productos': [{'id': id_, 'stock_actual': stock} for id_, stock in cambios],
+            'eliminados': eliminados
+        }
+
+    def _ventas(self):
+        # Toda venta marca sus productos: solo se busca cuando el contador avanzó
+        cantidad, total, ultima = db.session.execute(
+            select(func.count(Venta.id), func.sum(Venta.total), func.max(Venta.id))
+            .where(Venta.id > self.ultima_venta)
+        ).one()
+        if not cantidad:
+            return None
+        self.ultima_venta = ultima
+        return {'cantidad': cantidad, 'total': float(total), 'ultima_id': ultima}
+
+_hub = None
+_lock = threading.Lock()
+
+def suscribir(app):
+    """
+    Registra un cliente y arranca el hilo del hub si hace falta. Retorna la
+    posición desde la que lee el cliente, o None si se llegó al máximo.
+    Cada suscripción aceptada se cierra con desuscribir().
+    """
+    global _hub
+    with _lock:
+        if _hub is None:
+            _hub = _Hub(app)
+    hub = _hub
+    with hub.condicion:
+        if hub.clientes >= app.config.get('EVENTOS_MAX_CLIENTES', 64):
+            incrementar('eventos_conexiones_total', (('resultado', 'rechazada'),))
+            return None
+        hub.clientes += 1
+        posicion = hub.secuencia
+        if hub.hilo is None:
+            hub.hilo = threading.Thread(target=hub._bucle, name='eventos', daemon=True)
+            hub.hilo.start()
+    incrementar('eventos_conexiones_total', (('resultado', 'aceptada'),))
+    return posicion
+
+def flujo(posicion, latido=15, duracion_max=300):
+    """
+    Cuerpo text/event-stream de una conexión. Cierra después de `duracion_max`
+    segundos: el navegador reconecta solo y el token se vuelve a verificar.
+    El latido mantiene viva la conexión en los proxies y detecta clientes caídos.
+    """
+    hub = _hub
+    fin = time.monotonic() + duracion_max
+    yield f'retry: {RETRY_MS}\n\n'.encode()
+    while True:
+        restante = fin - time.monotonic()
+        if restante <= 0:
+            return
+        with hub.condicion:
+            hub.condicion.wait_for(lambda: hub.secuencia > posicion, timeout=min(latido, restante))
+            pendientes = hub.desde(posicion)
+            posicion = hub.secuencia
+        if pendientes is None:
+            # Se perdió parte de lo publicado: el cliente recarga lo que está mostrando
+            yield _mensaje(posicion, 'resync', {})
+        elif pendientes:
+            yield b''.join(pendientes)
+        else:
+            yield b': latido\n\n'
+
+def desuscribir():
+    """Libera el lugar del cliente (al cerrarse la respuesta, aunque el flujo no haya empezado)"""
+    with _hub.condicion:
+        _hub.clientes -= 1
+
+def notificar():
+    """
+    Llamar después del commit de una escritura de productos, stock o ventas:
+    los clientes de este proceso reciben el cambio sin esperar la próxima vuelta
+    (los de otros workers, en su próxima vuelta de EVENTOS_INTERVALO).
+    """
+    if _hub is not None and _hub.hilo is not None:
+        _hub.despertar.set()
@@ -0,0 +1,74 @@
+# backend/utils/exportacion.py - Exportación del catálogo en streaming (NDJSON / CSV / JSON)
+import csv
+import io
+import json
+from models.producto import Producto
+
+FORMATOS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+LOTE = 1000  # filas por fetch del cursor y por chunk enviado al cliente
+
+COLUMNAS = ('id', 'codigo', 'nombre', 'descripcion', 'precio', 'stock_minimo', 'stock_actual',
+            'fecha_vencimiento', 'categoria', 'imagen_url')
+
+def _a_dict(fila):
+    """Tupla de columnas -> mismo formato que Producto.to_dict() (sin variantes de imagen)"""
+    d = dict(zip(COLUMNAS, fila))
+    d['precio'] = float(d['precio'])
+    d['fecha_vencimiento'] = str(d['fecha_vencimiento']) if d['fecha_vencimiento'] else None
+    return d
+
+def filas(query):
+    """
+    Itera los productos de `query` como dicts en orden de id, de a LOTE filas:
+    yield_per usa un cursor del lado del servidor en PostgreSQL, así la memoria
+    no depende del tamaño del catálogo (ni se cargan entidades del ORM).
+    """
+    consulta = (query.order_by(None).order_by(Producto.id)
+                .with_entities(*[getattr(Producto, c) for c in COLUMNAS])
+                .execution_options(yield_per=LOTE))
+    for fila in consulta:
+        yield _a_dict(fila)
+
+def generar_ndjson(query):
+    buffer = []
+    for producto in filas(query):
+        buffer.append(json.dumps(producto, ensure_ascii=False))
+        if len(buffer) >= LOTE:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+def generar_csv(query):
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(COLUMNAS)
+    pendientes = 0
+    for producto in filas(query):
+        escritor.writerow([producto[c] for c in COLUMNAS])
+        pendientes += 1
+        if pendientes >= LOTE:
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+            pendientes = 0
+    yield salida.getvalue()
+
+def generar_documento_json(query, extra):
+    """
+    Un único documento JSON {**extra, "productos": [...], "total_en_db": n} emitido
+    por partes: mismo formato que antes sin armarlo entero en memoria.
+    """
+    cabecera = json.dumps(extra, ensure_ascii=False)[:-1]
+    yield cabecera + (', ' if extra else '') + '"productos": ['
+    total = 0
+    buffer = []
+    for producto in filas(query):
+        buffer.append(json.dumps(producto, ensure_ascii=False))
+        total += 1
+        if len(buffer) >= LOTE:
+            yield (',' if total > len(buffer) else '') + ','.join(buffer)
+            buffer = []
+    if buffer:
+        yield (',' if total > len(buffer) else '') + ','.join(buffer)
+    yield f'], "total_en_db": {total}}}'
@@ -0,0 +1,134 @@
+# backend/utils/imagenes.py - Variantes de imágenes (miniatura / media / grande + WebP) en segundo plano
+import importlib.util
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update
+from utils.db import db
+from utils.logs import get_logger
+from utils.metricas import incrementar
+from utils.cache_catalogo import invalidar_catalogo
+
+log = get_logger('imagenes')
+
+# Lado mayor en píxeles de cada variante; el original queda intacto
+TAMANOS = {'thumb': 160, 'media': 480, 'grande': 1600}
+CALIDAD_JPEG = 82
+CALIDAD_WEBP = 78
+
+_executor = None
+_cupos = None
+_lock = threading.Lock()
+
+def _ruta_local(carpeta, url):
+    """'/uploads/abc.jpg' -> <UPLOAD_FOLDER>/abc.jpg"""
+    return os.path.join(carpeta, url.rsplit('/', 1)[-1])
+
+def _guardar(imagen, ruta, formato):
+    if formato == 'JPEG':
+        imagen.convert('RGB').save(ruta, 'JPEG', quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    elif formato == 'PNG':
+        imagen.save(ruta, 'PNG', optimize=True)
+    else:
+        imagen.save(ruta, 'WEBP', quality=CALIDAD_WEBP, method=4)
+
+def generar_variantes(carpeta, imagen_url):
+    """
+    Genera las variantes de una imagen subida y retorna
+    {'thumb': {'url': ..., 'webp': ..., 'ancho': ..., 'alto': ...}, 'media': {...}, 'grande': {...}}.
+    Se conserva la transparencia (PNG) si el original la tiene; si no, JPEG.
+    """
+    from PIL import Image, ImageOps  # diferido: solo lo cargan los workers que procesan imágenes
+    base = imagen_url.rsplit('.', 1)[0]
+    with Image.open(_ruta_local(carpeta, imagen_url)) as original:
+        original.seek(0)  # GIF animados: primer cuadro
+        imagen = ImageOps.exif_transpose(original)
+        con_alfa = imagen.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagen.info
+        imagen = imagen.convert('RGBA' if con_alfa else 'RGB')
+
+    formato, extension = ('PNG', 'png') if con_alfa else ('JPEG', 'jpg')
+    variantes = {}
+    # De mayor a menor: cada reducción parte de la anterior, mucho más barata que desde el original
+    for nombre, lado in sorted(TAMANOS.items(), key=lambda t: -t[1]):
+        if max(imagen.size) > lado:
+            imagen = imagen.copy()
+            imagen.thumbnail((lado, lado), Image.LANCZOS)
+        url = f'{base}.{nombre}.{extension}'
+        webp = f'{base}.{nombre}.webp'
+        _guardar(imagen, _ruta_local(carpeta, url), formato)
+        _guardar(imagen, _ruta_local(carpeta, webp), 'WEBP')
+        variantes[nombre] = {'url': url, 'webp': webp, 'ancho': imagen.width, 'alto': imagen.height}
+    return variantes
+
+def _archivos(imagen_url, imagenes):
+    urls = [imagen_url] if imagen_url else []
+    for variante in (imagenes or {}).values():
+        urls.extend((variante['url'], variante['webp']))
+    return urls
+
+def eliminar_imagen(carpeta, imagen_url, imagenes=None):
+    """Borra del disco el original y todas sus variantes"""
+    for url in _archivos(imagen_url, imagenes):
+        ruta = _ruta_local(carpeta, url)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+def _procesar(app, producto_id, imagen_url):
+    from models.producto import Producto
+    carpeta = app.config['UPLOAD_FOLDER']
+    try:
+        variantes = generar_variantes(carpeta, imagen_url)
+        with app.app_context():
+            # Solo si el producto sigue teniendo esta imagen (pudo cambiarse o borrarse mientras tanto)
+            result = db.session.execute(
+                update(Producto)
+                .where(Producto.id == producto_id, Producto.imagen_url == imagen_url)
+                .values(imagenes=variantes)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                invalidar_catalogo()
+            db.session.commit()
+        if result.rowcount == 0:
+            eliminar_imagen(carpeta, None, variantes)
+            incrementar('imagenes_procesadas_total', (('resultado', 'descartada'),))
+            return
+        incrementar('imagenes_procesadas_total', (('resultado', 'ok'),))
+        log.info('Variantes de imagen generadas', extra={'datos': {'producto_id': producto_id, 'imagen': imagen_url}})
+    except Exception:
+        incrementar('imagenes_procesadas_total', (('resultado', 'error'),))
+        log.exception('Error procesando imagen', extra={'datos': {'producto_id': producto_id, 'imagen': imagen_url}})
+    finally:
+        _cupos.release()
+
+def _iniciar(app):
+    global _executor, _cupos
+    with _lock:
+        if _executor is None:
+            workers = app.config.get('IMAGEN_WORKERS', 2)
+            _cupos = threading.BoundedSemaphore(workers + app.config.get('IMAGEN_COLA', 64))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='imagenes')
+
+def _despues_de_fork():
+    """Los hilos del pool no pasan al proceso hijo: cada worker arma el suyo al primer uso"""
+    global _executor, _cupos, _lock
+    _executor, _cupos, _lock = None, None, threading.Lock()
+
+os.register_at_fork(after_in_child=_despues_de_fork)
+
+def encolar_variantes(app, producto_id, imagen_url):
+    """
+    Encola la generación de variantes fuera del hilo del request.
+    La cola es acotada: si está llena la imagen queda sin variantes
+    (el frontend usa el original) en lugar de acumular trabajo sin límite.
+    """
+    if importlib.util.find_spec('PIL') is None:  # Sin Pillow se sirven solo los originales
+        log.warning('Pillow no está instalado: no se generan variantes de imagen')
+        return False
+    _iniciar(app)
+    if not _cupos.acquire(blocking=False):
+        incrementar('imagenes_procesadas_total', (('resultado', 'rechazada'),))
+        log.warning('Cola de imágenes llena', extra={'datos': {'producto_id': producto_id}})
+        return False
+    _executor.submit(_procesar, app, producto_id, imagen_url)
+    return True
@@ -0,0 +1,290 @@
+# backend/utils/importacion.py - Importación masiva de productos (CSV / NDJSON) en streaming
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, insert, update, bindparam
+from utils.db import db
+from utils.busqueda import texto_busqueda, indexado_diferido
+from utils.categorias import invalidar_categorias
+from utils.cache_catalogo import invalidar_catalogo
+from utils.sync_pos import marcar_modificados
+from utils.movimientos import registrar_movimientos
+from utils.eventos import notificar
+from utils.logs import get_logger
+from models.producto import Producto
+
+log = get_logger('importacion')
+
+FORMATOS = {'csv', 'ndjson'}
+TAMANO_LOTE = 5000
+MAX_ERRORES_REPORTADOS = 1000
+LOTE_IN = 900  # por debajo del límite de parámetros de SQLite
+
+# Columnas que se escriben; `codigo` es la clave del upsert
+COLUMNAS = ('codigo', 'nombre', 'descripcion', 'precio', 'stock_minimo', 'stock_actual',
+            'fecha_vencimiento', 'categoria', 'imagen_url', 'busqueda_normalizada')
+
+class ImportacionError(ValueError):
+    """Fila inválida o archivo ilegible"""
+
+def detectar_formato(nombre_archivo=None, content_type=None):
+    """'csv' o 'ndjson' según la extensión o el Content-Type"""
+    nombre = (nombre_archivo or '').lower()
+    tipo = (content_type or '').lower()
+    if nombre.endswith(('.ndjson', '.jsonl')) or 'ndjson' in tipo or 'jsonl' in tipo:
+        return 'ndjson'
+    if nombre.endswith('.csv') or 'csv' in tipo:
+        return 'csv'
+    raise ImportacionError('Formato no reconocido: usar .csv o .ndjson')
+
+def leer_filas(stream, formato):
+    """
+    Genera (numero_de_fila, dict | None, error | None) leyendo el stream binario
+    de a una línea: nunca se carga el archivo completo en memoria.
+    """
+    if formato == 'csv':
+        texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        for numero, fila in enumerate(csv.DictReader(texto), start=1):
+            yield numero, fila, None
+        return
+
+    for numero, linea in enumerate(stream, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError as e:
+            yield numero, None, f'JSON inválido: {e}'
+            continue
+        if not isinstance(fila, dict):
+            yield numero, None, 'Cada línea debe ser un objeto JSON'
+            continue
+        yield numero, fila, None
+
+def _texto(valor, campo, maximo, requerido=False):
+    texto = str(valor).strip() if valor is not None else ''
+    if requerido and not texto:
+        raise ImportacionError(f'{campo} es requerido')
+    if len(texto) > maximo:
+        raise ImportacionError(f'{campo} supera {maximo} caracteres')
+    return texto
+
+def _entero(valor, campo):
+    if valor in (None, ''):
+        return 0
+    try:
+        numero = int(str(valor).strip())
+    except ValueError:
+        raise ImportacionError(f'{campo} debe ser un entero')
+    if numero < 0:
+        raise ImportacionError(f'{campo} no puede ser negativo')
+    return numero
+
+def validar_fila(fila):
+    """Normaliza una fila cruda -> dict listo para insertar (o ImportacionError)"""
+    nombre = _texto(fila.get('nombre'), 'nombre', 150, requerido=True)
+    descripcion = _texto(fila.get('descripcion'), 'descripcion', 255)
+
+    try:
+        precio = Decimal(str(fila.get('precio', '')).strip())
+    except InvalidOperation:
+        raise ImportacionError('precio es requerido y debe ser numérico')
+    if not precio.is_finite() or precio < 0 or precio >= 10 ** 8:
+        raise ImportacionError('precio inválido')
+
+    fecha = fila.get('fecha_vencimiento') or None
+    if fecha:
+        fecha = str(fecha).strip()
+        try:
+            if len(fecha) != 10:
+                raise ValueError(fecha)
+            fecha = date.fromisoformat(fecha)  # mucho más rápido que strptime
+        except ValueError:
+            raise ImportacionError('fecha_vencimiento debe tener formato YYYY-MM-DD')
+
+    return {
+        'codigo': _texto(fila.get('codigo'), 'codigo', 64) or None,
+        'nombre': nombre,
+        'descripcion': descripcion,
+        'precio': precio.quantize(Decimal('0.01')),
+        'stock_minimo': _entero(fila.get('stock_minimo'), 'stock_minimo'),
+        'stock_actual': _entero(fila.get('stock_actual'), 'stock_actual'),
+        'fecha_vencimiento': fecha,
+        'categoria': _texto(fila.get('categoria'), 'categoria', 50) or 'general',
+        'imagen_url': _texto(fila.get('imagen_url'), 'imagen_url', 2048) or None,
+        'busqueda_normalizada': texto_busqueda(nombre, descripcion)
+    }
+
+def _deduplicar(filas):
+    """Dentro de un lote, la última fila de cada código gana (ON CONFLICT no admite repetidos)"""
+    por_codigo, sin_codigo = {}, []
+    for fila in filas:
+        if fila['codigo']:
+            por_codigo[fila['codigo']] = fila
+        else:
+            sin_codigo.append(fila)
+    return sin_codigo + list(por_codigo.values())
+
+def _upsert_postgresql(filas, existentes=None):
+    """
+    COPY a una tabla temporal y un único INSERT ... ON CONFLICT por lote (decide solo
+    qué filas existen). Retorna (ids insertados, cantidad actualizada).
+    """
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(
+        'CREATE TEMP TABLE IF NOT EXISTS productos_import ('
+        'codigo varchar(64), nombre varchar(150), descripcion varchar(255), precio numeric(10, 2), '
+        'stock_minimo integer, stock_actual integer, fecha_vencimiento date, categoria varchar(50), '
+        'imagen_url text, busqueda_normalizada text) ON COMMIT DELETE ROWS'
+    )
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow([fila[c] for c in COLUMNAS])
+    buffer.seek(0)
+    columnas = ', '.join(COLUMNAS)
+    cursor.copy_expert(f'COPY productos_import ({columnas}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+    actualizar = ', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNAS if c != 'codigo')
+    cursor.execute(
+        f'INSERT INTO productos ({columnas}) SELECT {columnas} FROM productos_import '
+        f'ON CONFLICT (codigo) DO UPDATE SET {actualizar} '
+        'RETURNING id, (xmax = 0)'
+    )
+    nuevos = [id_ for id_, nuevo in cursor.fetchall() if nuevo]
+    cursor.close()
+    return nuevos, len(filas) - len(nuevos)
+
+def _upsert_generico(filas, existentes):
+    """
+    executemany: un INSERT para los códigos nuevos y un UPDATE para los `existentes`.
+    Retorna (ids insertados, cantidad actualizada).
+    """
+    nuevas = [f for f in filas if f['codigo'] not in existentes]
+    a_actualizar = [f for f in filas if f['codigo'] in existentes]
+
+    tabla = Producto.__table__
+    nuevos = []
+    if nuevas:
+        # insert Core (sin la maquinaria de bulk del ORM): executemany directo, con los ids generados
+        nuevos = list(db.session.execute(insert(tabla).returning(tabla.c.id), nuevas).scalars())
+    if a_actualizar:
+        db.session.execute(
+            update(tabla).where(tabla.c.codigo == bindparam('b_codigo'))
+            .values({c: bindparam(f'b_{c}') for c in COLUMNAS if c != 'codigo'}),
+            [{f'b_{c}': f[c] for c in COLUMNAS} for f in a_actualizar]
+        )
+    return nuevos, len(a_actualizar)
+
+def _en_tandas(ids):
+    ids = sorted(ids)
+    for i in range(0, len(ids), LOTE_IN):
+        yield ids[i:i + LOTE_IN]
+
+def marcar_sincronizacion(ids):
+    """Una versión de sincronización del POS para todo el lote (ver utils/sync_pos.py)"""
+    version = None
+    for tanda in _en_tandas(ids):
+        version = marcar_modificados(Producto.id.in_(tanda), version=version)
+
+def bloquear_existentes(codigos):
+    """
+    {codigo: (id, stock_actual)} de los productos existentes, bloqueados hasta el
+    commit del lote: una venta no puede cambiar el stock entre esta lectura y el
+    upsert (si no, quedaría contada en su 'venta' y otra vez en la diferencia).
+    Se bloquean por id ascendente, el mismo orden que las ventas.
+    """
+    conexion = db.session.connection()
+    if db.engine.dialect.name == 'sqlite' and not conexion.connection.dbapi_connection.in_transaction:
+        # SQLite no tiene FOR UPDATE y pysqlite no abre transacción para un SELECT:
+        # tomar ya el lock de escritura de la base
+        conexion.exec_driver_sql('BEGIN IMMEDIATE')
+    ids = []
+    for i in range(0, len(codigos), LOTE_IN):
+        ids.extend(db.session.execute(
+            select(Producto.id).where(Producto.codigo.in_(codigos[i:i + LOTE_IN]))
+        ).scalars())
+    stock = {}
+    for tanda in _en_tandas(ids):
+        stock.update((codigo, (id_, actual)) for id_, codigo, actual in db.session.execute(
+            select(Producto.id, Producto.codigo, Producto.stock_actual)
+            .where(Producto.id.in_(tanda)).order_by(Producto.id).with_for_update()
+        ))
+    return stock
+
+def movimientos_importacion(nuevos, antes):
+    """
+    Movimientos del libro de stock para un lote ya volcado: el stock completo de
+    cada alta (`nuevos`, los ids que devolvió el upsert) y la diferencia contra
+    `antes` ({codigo: (id, stock)}, de bloquear_existentes) de cada actualización.
+    """
+    anterior = {id_: actual for id_, actual in antes.values()}
+    filas = []
+    for tanda in _en_tandas(list(nuevos) + list(anterior)):
+        for id_, actual in db.session.execute(
+            select(Producto.id, Producto.stock_actual).where(Producto.id.in_(tanda))
+        ):
+            filas.append({'producto_id': id_, 'tipo': 'importacion', 'cantidad': actual - anterior.get(id_, 0)})
+    return filas
+
+def importar_productos(stream, formato, tamano_lote=TAMANO_LOTE, usuario_id=None):
+    """
+    Importa productos desde un stream binario CSV/NDJSON con commit por lote.
+    Las filas inválidas no frenan la importación: se reportan con su número.
+    """
+    if formato not in FORMATOS:
+        raise ImportacionError(f'Formato inválido: {formato}')
+
+    upsert = _upsert_postgresql if db.engine.dialect.name == 'postgresql' else _upsert_generico
+    resumen = {'procesadas': 0, 'insertadas': 0, 'actualizadas': 0, 'con_error': 0, 'errores': []}
+    lote = []
+
+    def volcar():
+        filas = _deduplicar(lote)
+        antes = bloquear_existentes([f['codigo'] for f in filas if f['codigo']])
+        with indexado_diferido():
+            nuevos, actualizadas = upsert(filas, antes)
+        # Solo los ids de este lote: no los productos que otras transacciones den de alta mientras tanto
+        marcar_sincronizacion(nuevos + [id_ for id_, _ in antes.values()])
+        registrar_movimientos(movimientos_importacion(nuevos, antes), usuario_id)
+        db.session.commit()
+        resumen['insertadas'] += len(nuevos)
+        resumen['actualizadas'] += actualizadas
+        lote.clear()
+
+    try:
+        for numero, fila, error in leer_filas(stream, formato):
+            resumen['procesadas'] += 1
+            if error is None:
+                try:
+                    lote.append(validar_fila(fila))
+                except ImportacionError as e:
+                    error = str(e)
+            if error is not None:
+                resumen['con_error'] += 1
+                if len(resumen['errores']) < MAX_ERRORES_REPORTADOS:
+                    resumen['errores'].append({'fila': numero, 'error': error})
+                continue
+            if len(lote) >= tamano_lote:
+                volcar()
+        if lote:
+            volcar()
+    except UnicodeDecodeError:
+        db.session.rollback()
+        raise ImportacionError('El archivo debe estar codificado en UTF-8')
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if resumen['insertadas'] or resumen['actualizadas']:
+            invalidar_categorias()
+            invalidar_catalogo()
+            db.session.commit()
+            notificar()
+
+    log.info('Importación de productos', extra={'datos': {k: v for k, v in resumen.items() if k != 'errores'}})
+    return resumen
@@ -0,0 +1,136 @@
+# backend/utils/logs.py - Logging estructurado (JSON) sin bloquear el hilo del request
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+RAIZ = 'supermercado'
+
+_listener = None
+
+def get_logger(modulo):
+    """Logger hijo de 'supermercado' (ej: get_logger('productos'))"""
+    return logging.getLogger(f'{RAIZ}.{modulo}')
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento; los campos de extra={'datos': {...}} se agregan al objeto"""
+
+    def format(self, record):
+        evento = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        datos = getattr(record, 'datos', None)
+        if isinstance(datos, dict):
+            evento.update(datos)
+        if record.exc_text:
+            evento['exc'] = record.exc_text
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+class MuestreoDebug(logging.Filter):
+    """Deja pasar solo una fracción de los eventos DEBUG (alto volumen)"""
+
+    def __init__(self, tasa):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.tasa >= 1:
+            return True
+        return random.random() < self.tasa
+
+class ColaSinBloqueo(QueueHandler):
+    """Encola sin esperar nunca: si la cola está llena el evento se descarta y se cuenta"""
+
+    descartados = 0
+
+    def prepare(self, record):
+        # Igual que QueueHandler.prepare pero deja la traza en exc_text (campo 'exc' del JSON)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            ColaSinBloqueo.descartados += 1
+
+def _niveles_por_modulo(especificacion):
+    """'productos=DEBUG,auth=WARNING' -> {'productos': 'DEBUG', 'auth': 'WARNING'}"""
+    niveles = {}
+    for parte in (especificacion or '').split(','):
+        if '=' in parte:
+            modulo, nivel = parte.split('=', 1)
+            niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+def init_logging(app):
+    """
+    Configura el logger 'supermercado': los requests solo encolan el registro y
+    un hilo de fondo (QueueListener) formatea y escribe. Idempotente por proceso.
+    """
+    global _listener
+
+    raiz = logging.getLogger(RAIZ)
+    raiz.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    for modulo, nivel in _niveles_por_modulo(app.config.get('LOG_LEVELS')).items():
+        get_logger(modulo).setLevel(nivel)
+
+    if _listener is not None:
+        return
+
+    destino = logging.StreamHandler(sys.stdout)
+    destino.setFormatter(JsonFormatter())
+    handlers = [destino]
+    if app.config.get('LOG_FILE'):
+        archivo = logging.FileHandler(app.config['LOG_FILE'], encoding='utf-8')
+        archivo.setFormatter(JsonFormatter())
+        handlers.append(archivo)
+
+    cola = queue.Queue(maxsize=app.config.get('LOG_QUEUE_SIZE', 10000))
+    encolador = ColaSinBloqueo(cola)
+    encolador.addFilter(MuestreoDebug(app.config.get('LOG_DEBUG_SAMPLE', 0.01)))
+
+    raiz.addHandler(encolador)
+    raiz.propagate = False
+
+    _listener = QueueListener(cola, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+def _reiniciar_tras_fork():
+    """
+    En un worker recién forkeado (gunicorn con preload) el hilo del listener no
+    existe: cola nueva (la heredada pudo quedar con su lock tomado) y listener nuevo.
+    """
+    global _listener
+    if _listener is None:
+        return
+    cola = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in logging.getLogger(RAIZ).handlers:
+        if isinstance(handler, ColaSinBloqueo):
+            handler.queue = cola
+    _listener = QueueListener(cola, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+def detener_logging():
+    """Vacía la cola y detiene el hilo de fondo (se registra con atexit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,213 @@
+# backend/utils/metricas.py - Métricas de latencia, SQL y pool en formato Prometheus
+#
+# Cada hilo escribe en su propio "shard" sin locks; los shards se suman recién
+# cuando se consulta /api/metrics, así el costo por request es un par de sumas.
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+from sqlalchemy import event
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_ESPERA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+AYUDA = {
+    'http_request_duration_seconds': ('histogram', 'Latencia de requests por blueprint/endpoint'),
+    'db_queries_per_request': ('histogram', 'Sentencias SQL ejecutadas por request'),
+    'db_time_per_request_seconds': ('histogram', 'Tiempo total en SQL por request'),
+    'db_query_duration_seconds': ('histogram', 'Duración de cada sentencia SQL'),
+    'db_pool_checkout_wait_seconds': ('histogram', 'Espera para obtener una conexión del pool'),
+    'http_requests_total': ('counter', 'Requests atendidos'),
+    'cache_catalogo_total': ('counter', 'Lecturas del catálogo por resultado de la caché (hit/miss/no_modificado)'),
+    'auth_hash_total': ('counter', 'Hashes de contraseña enviados al pool (ok) o rechazados con la cola llena'),
+    'imagenes_procesadas_total': ('counter', 'Variantes de imágenes generadas en segundo plano por resultado'),
+    'eventos_publicados_total': ('counter', 'Mensajes de eventos en vivo (SSE) publicados por tipo'),
+    'eventos_conexiones_total': ('counter', 'Conexiones de eventos en vivo aceptadas o rechazadas'),
+}
+
+class _Shard:
+    """Acumuladores de un hilo: {(metrica, etiquetas): [buckets, suma, cantidad]} y contadores"""
+    __slots__ = ('hilo', 'histogramas', 'contadores')
+
+    def __init__(self):
+        self.hilo = threading.current_thread()
+        self.histogramas = {}
+        self.contadores = {}
+
+_local = threading.local()
+_shards = []
+_retirados = _Shard()  # datos de hilos que ya terminaron
+_lock = threading.Lock()
+_buckets = {}
+_engines = {}
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _lock:
+            _shards.append(shard)
+    return shard
+
+def observar(metrica, etiquetas, valor, buckets):
+    """Agrega `valor` al histograma `metrica` (sin locks: el shard es del hilo actual)"""
+    if metrica not in _buckets:
+        _buckets[metrica] = buckets
+    histogramas = _shard().histogramas
+    clave = (metrica, etiquetas)
+    datos = histogramas.get(clave)
+    if datos is None:
+        datos = histogramas[clave] = [[0] * (len(buckets) + 1), 0.0, 0]
+    datos[0][bisect_left(buckets, valor)] += 1
+    datos[1] += valor
+    datos[2] += 1
+
+def incrementar(metrica, etiquetas, valor=1):
+    contadores = _shard().contadores
+    clave = (metrica, etiquetas)
+    contadores[clave] = contadores.get(clave, 0) + valor
+
+def _fusionar(destino, origen):
+    for clave, (cuentas, suma, cantidad) in list(origen.histogramas.items()):
+        datos = destino.histogramas.get(clave)
+        if datos is None:
+            destino.histogramas[clave] = [list(cuentas), suma, cantidad]
+        else:
+            datos[0] = [a + b for a, b in zip(datos[0], cuentas)]
+            datos[1] += suma
+            datos[2] += cantidad
+    for clave, valor in list(origen.contadores.items()):
+        destino.contadores[clave] = destino.contadores.get(clave, 0) + valor
+
+def _agregar():
+    """Suma todos los shards; los de hilos muertos se pliegan en _retirados"""
+    with _lock:
+        vivos = []
+        for shard in _shards:
+            if shard.hilo.is_alive():
+                vivos.append(shard)
+            else:
+                _fusionar(_retirados, shard)
+        _shards[:] = vivos
+        total = _Shard()
+        _fusionar(total, _retirados)
+        for shard in vivos:
+            _fusionar(total, shard)
+    return total
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pares) + '}'
+
+def _formato_le(limite):
+    return repr(float(limite)) if limite != float('inf') else '+Inf'
+
+def render_prometheus():
+    """Texto en formato de exposición de Prometheus (text/plain; version=0.0.4)"""
+    total = _agregar()
+    lineas = []
+    declaradas = set()
+
+    def cabecera(metrica):
+        if metrica not in declaradas:
+            declaradas.add(metrica)
+            tipo, ayuda = AYUDA.get(metrica, ('untyped', metrica))
+            lineas.append(f'# HELP {metrica} {ayuda}')
+            lineas.append(f'# TYPE {metrica} {tipo}')
+
+    for (metrica, etiquetas), (cuentas, suma, cantidad) in sorted(total.histogramas.items()):
+        cabecera(metrica)
+        acumulado = 0
+        limites = list(_buckets.get(metrica, ())) + [float('inf')]
+        for limite, cuenta in zip(limites, cuentas):
+            acumulado += cuenta
+            lineas.append(f'{metrica}_bucket{_etiquetas(etiquetas + (("le", _formato_le(limite)),))} {acumulado}')
+        lineas.append(f'{metrica}_sum{_etiquetas(etiquetas)} {suma}')
+        lineas.append(f'{metrica}_count{_etiquetas(etiquetas)} {cantidad}')
+
+    for (metrica, etiquetas), valor in sorted(total.contadores.items()):
+        cabecera(metrica)
+        lineas.append(f'{metrica}{_etiquetas(etiquetas)} {valor}')
+
+    # Gauges del pool: se leen en el momento del scrape, del pool vigente del engine
+    # (engine.dispose() lo reemplaza, p. ej. en cada worker después del fork)
+    for nombre, engine in sorted(_engines.items()):
+        pool = engine.pool
+        etiquetas = (('bind', nombre),)
+        en_uso = pool.checkedout() if hasattr(pool, 'checkedout') else 0
+        capacidad = (pool.size() + max(getattr(pool, '_max_overflow', 0), 0)) if hasattr(pool, 'size') else 0
+        for metrica, valor, ayuda in (
+            ('db_pool_connections_in_use', en_uso, 'Conexiones prestadas'),
+            ('db_pool_size', pool.size() if hasattr(pool, 'size') else 0, 'Tamaño base del pool'),
+            ('db_pool_overflow', max(pool.overflow(), 0) if hasattr(pool, 'overflow') else 0, 'Conexiones por encima del tamaño base'),
+            ('db_pool_saturation', round(en_uso / capacidad, 4) if capacidad else 0, 'Fracción del pool en uso'),
+        ):
+            if metrica not in declaradas:
+                declaradas.add(metrica)
+                lineas.append(f'# HELP {metrica} {ayuda}')
+                lineas.append(f'# TYPE {metrica} gauge')
+            lineas.append(f'{metrica}{_etiquetas(etiquetas)} {valor}')
+
+    return '\n'.join(lineas) + '\n'
+
+def _instrumentar_engine(nombre, engine):
+    """Eventos de SQLAlchemy: duración por sentencia y conteo por request; espera del pool"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metricas_inicio', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info['_metricas_inicio'].pop()
+        actual = getattr(_local, 'request', None)
+        if actual is not None:
+            actual[0] += 1
+            actual[1] += duracion
+        observar('db_query_duration_seconds', (('bind', nombre),), duracion, BUCKETS_LATENCIA)
+
+    # Engine.raw_connection es el punto donde un request espera si el pool está agotado.
+    # Se envuelve el engine y no el pool: engine.dispose() cambia el pool (post_fork
+    # en gunicorn.conf.py) y la medición tiene que seguir al pool nuevo
+    conectar = engine.raw_connection
+
+    def raw_connection_medido():
+        inicio = time.perf_counter()
+        try:
+            return conectar()
+        finally:
+            observar('db_pool_checkout_wait_seconds', (('bind', nombre),), time.perf_counter() - inicio, BUCKETS_ESPERA)
+
+    engine.raw_connection = raw_connection_medido
+    _engines[nombre] = engine
+
+def init_metricas(app, db):
+    """Registra los hooks de Flask y los eventos de los engines de Flask-SQLAlchemy"""
+
+    @app.before_request
+    def _iniciar():
+        g._metricas_inicio = time.perf_counter()
+        _local.request = [0, 0.0]
+
+    @app.after_request
+    def _registrar(response):
+        inicio = g.pop('_metricas_inicio', None)
+        sql = getattr(_local, 'request', None)
+        _local.request = None
+        if inicio is None:
+            return response
+
+        endpoint = request.endpoint or 'sin_ruta'
+        etiquetas = (('blueprint', request.blueprint or ''), ('endpoint', endpoint), ('method', request.method))
+        observar('http_request_duration_seconds', etiquetas, time.perf_counter() - inicio, BUCKETS_LATENCIA)
+        incrementar('http_requests_total', etiquetas + (('status', response.status_code),))
+        if sql is not None:
+            observar('db_queries_per_request', etiquetas, sql[0], BUCKETS_QUERIES)
+            observar('db_time_per_request_seconds', etiquetas, sql[1], BUCKETS_LATENCIA)
+        return response
+
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            _instrumentar_engine(bind or 'default', engine)
@@ -0,0 +1,194 @@
+# backend/utils/movimientos.py - Libro de movimientos de stock y snapshots para consultas históricas
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, func, and_, literal, exists
+from utils.db import db
+from utils.cache_catalogo import invalidar_catalogo
+from utils.sync_pos import marcar_modificados
+from utils.eventos import notificar
+from models.producto import Producto
+from models.movimiento import MovimientoStock, SnapshotStock
+from models.version import VersionCatalogo
+
+TIPOS = {'inicial', 'venta', 'ingreso', 'ajuste', 'merma', 'importacion', 'baja'}
+# Los que se cargan a mano desde /api/stock/movimientos
+TIPOS_MANUALES = {'ingreso', 'ajuste', 'merma'}
+# Fila de versiones_catalogo que serializa la toma de snapshots
+CLAVE_SNAPSHOT = 'snapshot_stock'
+# El corte de un snapshot queda este margen en el pasado: un movimiento de una
+# transacción todavía abierta (fecha anterior al corte, commit posterior) no se pierde
+MARGEN_SNAPSHOT = timedelta(minutes=5)
+
+class MovimientoError(ValueError):
+    """Movimiento inválido (400)"""
+
+class StockNegativoError(MovimientoError):
+    """El movimiento dejaría el stock en negativo (409)"""
+
+def registrar_movimientos(filas, usuario_id=None):
+    """
+    Agrega movimientos al libro con un único INSERT (executemany), en la
+    transacción de quien modificó el stock. `filas`: dicts con producto_id,
+    tipo, cantidad y opcionalmente referencia. Las cantidades 0 se omiten.
+    """
+    fecha = datetime.utcnow()
+    valores = [{
+        'producto_id': fila['producto_id'],
+        'tipo': fila['tipo'],
+        'cantidad': fila['cantidad'],
+        'referencia': fila.get('referencia'),
+        'usuario_id': usuario_id,
+        'fecha': fecha
+    } for fila in filas if fila['cantidad']]
+    if valores:
+        db.session.execute(insert(MovimientoStock), valores)
+    return len(valores)
+
+def aplicar_movimiento(producto_id, tipo, cantidad=None, stock_contado=None, referencia=None, usuario_id=None):
+    """
+    Movimiento manual: ingreso (suma), merma (resta) o ajuste (cantidad con signo,
+    o `stock_contado` de un conteo físico). Actualiza el stock con un UPDATE
+    condicional y deja el movimiento en la misma transacción.
+    Retorna (movimiento, stock_resultante); un conteo igual al stock actual no
+    escribe nada (como registrar_movimientos con cantidad 0) y retorna (None, stock).
+    """
+    if tipo not in TIPOS_MANUALES:
+        raise MovimientoError(f'tipo debe ser uno de {sorted(TIPOS_MANUALES)}')
+
+    if tipo == 'ajuste' and stock_contado is not None:
+        if stock_contado < 0:
+            raise MovimientoError('stock_contado no puede ser negativo')
+        actual = db.session.execute(
+            select(Producto.stock_actual).where(Producto.id == producto_id).with_for_update()
+        ).scalar()
+        if actual is None:
+            raise MovimientoError(f'Producto {producto_id} no encontrado')
+        cantidad = stock_contado - actual
+        if cantidad == 0:
+            db.session.commit()  # libera el lock de la fila
+            return None, actual
+    else:
+        if cantidad is None or cantidad == 0:
+            raise MovimientoError('cantidad debe ser un entero distinto de 0')
+        if tipo in ('ingreso', 'merma'):
+            if cantidad < 0:
+                raise MovimientoError(f'La cantidad de un {tipo} va en positivo')
+            cantidad = cantidad if tipo == 'ingreso' else -cantidad
+
+    stock = db.session.execute(
+        update(Producto)
+        .where(Producto.id == producto_id, Producto.stock_actual + cantidad >= 0)
+        .values(stock_actual=Producto.stock_actual + cantidad)
+        .returning(Producto.stock_actual)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if stock is None:
+        if db.session.get(Producto, producto_id) is None:
+            raise MovimientoError(f'Producto {producto_id} no encontrado')
+        raise StockNegativoError('El movimiento dejaría el stock en negativo')
+
+    movimiento = MovimientoStock(producto_id=producto_id, tipo=tipo, cantidad=cantidad,
+                                 referencia=referencia, usuario_id=usuario_id)
+    db.session.add(movimiento)
+    marcar_modificados(Producto.id == producto_id)
+    invalidar_catalogo()
+    db.session.flush()
+    movimiento_dict = movimiento.to_dict()
+    db.session.commit()
+    notificar()
+    return movimiento_dict, stock
+
+def listar_movimientos(producto_id=None, desde=None, hasta=None, limite=200):
+    """Movimientos más recientes primero"""
+    consulta = select(MovimientoStock).order_by(MovimientoStock.fecha.desc(), MovimientoStock.id.desc()).limit(limite)
+    if producto_id is not None:
+        consulta = consulta.where(MovimientoStock.producto_id == producto_id)
+    if desde is not None:
+        consulta = consulta.where(MovimientoStock.fecha >= desde)
+    if hasta is not None:
+        consulta = consulta.where(MovimientoStock.fecha <= hasta)
+    return [m.to_dict() for m in db.session.execute(consulta).scalars()]
+
+def stock_en(momento, producto_ids=None):
+    """
+    {producto_id: stock} al `momento` (UTC): el último snapshot de cada producto
+    más los movimientos posteriores al último corte. Cada corte guarda a todos los
+    productos con actividad desde el anterior, así que la cola a sumar es solo
+    la de un período entre snapshots, nunca el historial completo.
+    """
+    S, M = SnapshotStock, MovimientoStock
+    piso = db.session.execute(select(func.max(S.fecha)).where(S.fecha <= momento)).scalar()
+
+    stock = {}
+    if piso is not None:
+        ultimo = select(S.producto_id, func.max(S.fecha).label('fecha')).where(S.fecha <= piso)
+        if producto_ids is not None:
+            ultimo = ultimo.where(S.producto_id.in_(producto_ids))
+        ultimo = ultimo.group_by(S.producto_id).subquery()
+        stock.update(db.session.execute(
+            select(S.producto_id, S.stock)
+            .join(ultimo, and_(S.producto_id == ultimo.c.producto_id, S.fecha == ultimo.c.fecha))
+        ).all())
+
+    cola = select(M.producto_id, func.sum(M.cantidad)).where(M.fecha <= momento).group_by(M.producto_id)
+    if piso is not None:
+        cola = cola.where(M.fecha > piso)
+    if producto_ids is not None:
+        cola = cola.where(M.producto_id.in_(producto_ids))
+    for producto_id, cantidad in db.session.execute(cola).all():
+        stock[producto_id] = stock.get(producto_id, 0) + int(cantidad)
+    return stock
+
+def inicializar_libro():
+    """
+    Movimiento 'inicial' con el stock actual para los productos que todavía no
+    tienen ninguno (bases anteriores al libro, cargas masivas fuera de la API).
+    """
+    sin_movimientos = ~exists().where(MovimientoStock.producto_id == Producto.id)
+    result = db.session.execute(insert(MovimientoStock).from_select(
+        ['producto_id', 'tipo', 'cantidad', 'fecha'],
+        select(Producto.id, literal('inicial'), Producto.stock_actual, literal(datetime.utcnow()))
+        .where(sin_movimientos, Producto.stock_actual != 0)
+    ))
+    db.session.commit()
+    return result.rowcount
+
+def tomar_snapshot(corte=None):
+    """
+    Snapshot de los productos con movimientos desde el snapshot anterior:
+    stock al corte = snapshot previo del producto + movimientos en el intervalo.
+    Un único INSERT ... SELECT; los productos sin actividad conservan su snapshot.
+    """
+    corte = corte or datetime.utcnow() - MARGEN_SNAPSHOT
+
+    # Serializar: dos snapshots simultáneos contarían el mismo intervalo dos veces
+    estado = db.session.execute(
+        select(VersionCatalogo).where(VersionCatalogo.clave == CLAVE_SNAPSHOT).with_for_update()
+    ).scalar()
+    if estado is None:
+        estado = VersionCatalogo(clave=CLAVE_SNAPSHOT, version=0)
+        db.session.add(estado)
+        db.session.flush()
+
+    S, M = SnapshotStock, MovimientoStock
+    anterior = db.session.execute(select(func.max(S.fecha))).scalar()
+    if anterior is not None and corte <= anterior:
+        db.session.rollback()
+        return {'productos': 0, 'corte': anterior.isoformat()}
+
+    previo = (
+        select(S.stock).where(S.producto_id == M.producto_id)
+        .order_by(S.fecha.desc()).limit(1)
+        .correlate(M).scalar_subquery()
+    )
+    intervalo = select(
+        M.producto_id,
+        literal(corte, db.DateTime),
+        func.coalesce(previo, 0) + func.sum(M.cantidad)
+    ).where(M.fecha <= corte).group_by(M.producto_id)
+    if anterior is not None:
+        intervalo = intervalo.where(M.fecha > anterior)
+
+    result = db.session.execute(insert(S).from_select(['producto_id', 'fecha', 'stock'], intervalo))
+    estado.version += 1
+    db.session.commit()
+    return {'productos': result.rowcount, 'corte': corte.isoformat()}
@@ -0,0 +1,69 @@
+# backend/utils/paginacion.py - Paginación por cursor (keyset) y conteos baratos
+import base64
+import json
+from sqlalchemy import text
+from utils.db import db
+
+MODOS_CONTEO = {'exact', 'estimated', 'none'}
+
+class CursorInvalidoError(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+def codificar_cursor(ultimo_id):
+    """Cursor opaco para el cliente a partir del último id devuelto"""
+    payload = json.dumps({'id': ultimo_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Inverso de codificar_cursor -> último id visto"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise CursorInvalidoError('Cursor inválido')
+
+def paginar_keyset(query, columna_id, after, per_page):
+    """
+    Página siguiente a `after` usando búsqueda por índice (id > after ORDER BY id LIMIT n)
+    en lugar de OFFSET. Retorna (items, next_cursor).
+    """
+    if after is not None:
+        query = query.filter(columna_id > after)
+
+    # Pedimos una fila extra para saber si hay más páginas sin contar
+    items = query.order_by(columna_id).limit(per_page + 1).all()
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, codificar_cursor(items[-1].id)
+    return items, None
+
+def contar(query, modo='exact', filtrado=True):
+    """
+    Total de filas según el modo:
+    - exact: COUNT(*) real
+    - estimated: estadísticas del planner de PostgreSQL (exact en otros motores)
+    - none: no cuenta (None)
+    """
+    if modo == 'none':
+        return None
+
+    if modo == 'estimated' and db.engine.dialect.name == 'postgresql':
+        if not filtrado:
+            # Sin filtros: reltuples de pg_class, mantenido por ANALYZE/autovacuum
+            estimado = db.session.execute(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = 'productos'::regclass"
+            )).scalar()
+            if estimado is not None and estimado >= 0:
+                return int(estimado)
+        else:
+            # Con filtros: filas estimadas por el plan de la consulta
+            compilado = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+            plan = db.session.connection().exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compilado.string}', compilado.params
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+    return query.order_by(None).count()
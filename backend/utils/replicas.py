@@ -0,0 +1,83 @@
+# backend/utils/replicas.py - Lecturas a réplicas, escrituras a la primaria
+import random
+import time
+from functools import wraps
+from flask import g, request, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+
+PREFIJO_BIND = 'replica_'
+# Después de escribir, el cliente lee de la primaria hasta este timestamp (read-your-writes).
+# Va en una cookie y en un header de respuesta que el cliente reenvía: el frontend llama a
+# la API desde otro origen sin credenciales, así que la cookie no le llega (ver services/api.js)
+COOKIE_PRIMARIA = 'leer_primaria_hasta'
+HEADER_PRIMARIA = 'X-Leer-Primaria-Hasta'
+
+_segundos_primaria = 5
+
+def _es_lectura(clause):
+    return (clause is not None and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None)
+
+def _replica(engines):
+    """Réplica elegida para este request (la misma para todas sus consultas)"""
+    if '_replica' not in g:
+        claves = [clave for clave in engines if clave and clave.startswith(PREFIJO_BIND)]
+        g._replica = random.choice(claves) if claves else None
+    return engines[g._replica] if g._replica else None
+
+class SesionEnrutada(Session):
+    """
+    Session de Flask-SQLAlchemy que manda los SELECT de los endpoints marcados
+    con @solo_lectura a una réplica. Todo lo demás (flush, INSERT/UPDATE/DELETE,
+    FOR UPDATE, SQL textual) va a la primaria, y después de una escritura el
+    resto del request también lee de la primaria.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g._escribio = True
+            elif g.get('_leer_replica') and not g.get('_escribio') and _es_lectura(clause):
+                replica = _replica(self._db.engines)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _leer_primaria_hasta():
+    hasta = 0
+    for valor in (request.cookies.get(COOKIE_PRIMARIA), request.headers.get(HEADER_PRIMARIA)):
+        try:
+            hasta = max(hasta, float(valor or 0))
+        except ValueError:
+            pass
+    return hasta
+
+def solo_lectura(vista):
+    """Endpoint de solo lectura: sus SELECT pueden ir a una réplica"""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        g._leer_replica = _leer_primaria_hasta() < time.time()
+        return vista(*args, **kwargs)
+    return envoltura
+
+def _marcar_escritura(response):
+    if has_request_context() and g.get('_escribio'):
+        hasta = str(time.time() + _segundos_primaria)
+        response.headers[HEADER_PRIMARIA] = hasta
+        # Cross-site (frontend en otro dominio) solo funciona con SameSite=None + Secure
+        response.set_cookie(
+            COOKIE_PRIMARIA,
+            hasta,
+            max_age=_segundos_primaria,
+            httponly=True,
+            secure=request.is_secure,
+            samesite='None' if request.is_secure else 'Lax'
+        )
+    return response
+
+def init_replicas(app, db):
+    """Activa la marca de read-your-writes (cookie + header) si hay réplicas configuradas"""
+    global _segundos_primaria
+    _segundos_primaria = app.config.get('REPLICA_SEGUNDOS_PRIMARIA', 5)
+    if any(clave.startswith(PREFIJO_BIND) for clave in app.config.get('SQLALCHEMY_BINDS') or {}):
+        app.after_request(_marcar_escritura)
@@ -0,0 +1,62 @@
+# backend/utils/serializacion.py - Proyección de columnas (?fields=) y JSON rápido para el catálogo
+import json
+from flask import Response
+from models.producto import Producto
+
+try:
+    import orjson  # Opcional: serializa varias veces más rápido que json de la stdlib
+except ImportError:
+    orjson = None
+
+def _fecha(valor):
+    return str(valor)
+
+# Campos públicos de un producto (mismo orden y formato que Producto.to_dict())
+CAMPOS = ('id', 'codigo', 'nombre', 'descripcion', 'precio', 'stock_minimo', 'stock_actual',
+          'fecha_vencimiento', 'categoria', 'imagen_url', 'imagenes')
+# Conversión de valores que el JSON no representa tal cual (Numeric -> float, Date -> 'YYYY-MM-DD')
+CONVERSORES = {'precio': float, 'fecha_vencimiento': _fecha}
+
+class CamposInvalidosError(ValueError):
+    """?fields= pidió un campo que no existe"""
+
+def parsear_campos(valor):
+    """
+    'nombre,precio' -> ('id', 'nombre', 'precio'). Sin valor retorna todos los campos.
+    El id se incluye siempre: es la clave del producto y el cursor de la paginación.
+    """
+    if not valor:
+        return CAMPOS
+    pedidos = [campo.strip() for campo in valor.split(',') if campo.strip()]
+    desconocidos = sorted(set(pedidos) - set(CAMPOS))
+    if desconocidos:
+        raise CamposInvalidosError(f'Campos desconocidos: {", ".join(desconocidos)}. Válidos: {", ".join(CAMPOS)}')
+    # Orden canónico y sin duplicados: la misma proyección da la misma consulta
+    return tuple(campo for campo in CAMPOS if campo == 'id' or campo in pedidos)
+
+def proyectar(query, campos):
+    """SELECT solo de las columnas pedidas: las filas son tuplas, sin entidades del ORM"""
+    return query.with_entities(*[getattr(Producto, campo) for campo in campos])
+
+def filas_a_dicts(filas, campos):
+    """Filas de proyectar() -> dicts con el formato de Producto.to_dict()"""
+    conversiones = [(campo, CONVERSORES[campo]) for campo in campos if campo in CONVERSORES]
+    resultado = []
+    for fila in filas:
+        producto = dict(zip(campos, fila))
+        for campo, convertir in conversiones:
+            valor = producto[campo]
+            if valor is not None:
+                producto[campo] = convertir(valor)
+        resultado.append(producto)
+    return resultado
+
+def dumps(datos):
+    """JSON compacto en bytes UTF-8 (orjson si está instalado)"""
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def respuesta_json(datos, status=200):
+    """Equivalente a jsonify() pero con el serializador rápido"""
+    return Response(dumps(datos), status=status, mimetype='application/json')
@@ -0,0 +1,124 @@
+# backend/utils/sync_pos.py - Feed del catálogo para las cajas: snapshot columnar + deltas por versión
+from sqlalchemy import select, update
+from utils.db import db
+from utils.versiones import version_actual, incrementar_version
+from utils.serializacion import dumps
+from models.producto import Producto, ProductoEliminado
+
+CLAVE_VERSION = 'sync_productos'
+# Lo que necesita una caja para vender; el resto del producto no viaja
+COLUMNAS = ('id', 'codigo', 'nombre', 'precio', 'stock_actual', 'categoria')
+
+# Último snapshot completo serializado: (version, bytes). Lo piden todas las cajas al abrir
+_snapshot = (None, None)
+
+def marcar_modificados(*condiciones, version=None):
+    """
+    Asigna una nueva versión de sincronización a los productos que cumplen
+    `condiciones` (o `version`, para marcar en varias tandas con la misma).
+    Llamar después de escribir los productos y antes del commit: el contador
+    queda bloqueado hasta el commit, así las versiones se hacen visibles en
+    orden y un delta nunca saltea cambios confirmados más tarde.
+    """
+    if version is None:
+        version = incrementar_version(CLAVE_VERSION)
+    db.session.execute(
+        update(Producto).where(*condiciones).values(version_sync=version)
+        .execution_options(synchronize_session=False)
+    )
+    return version
+
+def marcar_confirmados(productos_ids):
+    """
+    Para escrituras calientes (ventas): llamar después del commit que cambió los
+    productos. Los marca en una transacción propia y corta, así la venta no
+    retiene el contador mientras tiene bloqueados sus productos y las cajas
+    venden en paralelo. Ningún cambio se pierde: la versión que toma es mayor
+    que cualquiera que un delta haya podido leer antes de este commit.
+    """
+    ids = sorted(productos_ids)
+    # Mismo orden de locks que las demás escrituras: productos -> contador
+    db.session.execute(select(Producto.id).where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update())
+    version = marcar_modificados(Producto.id.in_(ids))
+    db.session.commit()
+    return version
+
+def registrar_baja(producto_id):
+    """Deja constancia de la baja para el próximo delta (misma transacción que el DELETE)"""
+    version = incrementar_version(CLAVE_VERSION)
+    db.session.merge(ProductoEliminado(producto_id=producto_id, version_sync=version))
+    return version
+
+def _columnar(filas):
+    """
+    Filas -> {columna: [valores]} con las categorías como índices a una lista aparte:
+    sin repetir nombres de claves ni de categorías por cada producto.
+    """
+    categorias, indices = [], {}
+    productos = {columna: [] for columna in COLUMNAS}
+    for id_, codigo, nombre, precio, stock_actual, categoria in filas:
+        productos['id'].append(id_)
+        productos['codigo'].append(codigo)
+        productos['nombre'].append(nombre)
+        productos['precio'].append(float(precio))
+        productos['stock_actual'].append(stock_actual)
+        if categoria not in indices:
+            indices[categoria] = len(categorias)
+            categorias.append(categoria)
+        productos['categoria'].append(indices[categoria])
+    return productos, categorias
+
+def _consulta(since=None):
+    consulta = select(*[getattr(Producto, columna) for columna in COLUMNAS]).order_by(Producto.id)
+    if since is not None:
+        consulta = consulta.where(Producto.version_sync > since)
+    return db.session.execute(consulta)
+
+def feed_catalogo(since=None):
+    """
+    JSON (bytes) del catálogo para el POS:
+    - sin `since`: snapshot completo ('completo': true)
+    - con `since`: solo los productos modificados y los ids dados de baja desde esa versión
+    La versión se lee antes que las filas: un cambio confirmado en el medio
+    se reenvía en el próximo delta en lugar de perderse.
+    """
+    global _snapshot
+    version = version_actual(CLAVE_VERSION)
+
+    if since is None:
+        version_cache, datos = _snapshot
+        if version_cache == version:
+            return datos
+        productos, categorias = _columnar(_consulta())
+        datos = dumps({
+            'version': version,
+            'completo': True,
+            'columnas': COLUMNAS,
+            'categorias': categorias,
+            'productos': productos,
+            'eliminados': []
+        })
+        _snapshot = (version, datos)
+        return datos
+
+    if since >= version:
+        # Nada nuevo (o una réplica atrasada respecto de lo que la caja ya vio)
+        productos, categorias, eliminados = _columnar([])[0], [], []
+        version = since
+    else:
+        productos, categorias = _columnar(_consulta(since))
+        modificados = set(productos['id'])
+        eliminados = [producto_id for producto_id in db.session.execute(
+            select(ProductoEliminado.producto_id)
+            .where(ProductoEliminado.version_sync > since)
+            .order_by(ProductoEliminado.producto_id)
+        ).scalars() if producto_id not in modificados]  # id reutilizado por un alta posterior
+
+    return dumps({
+        'version': version,
+        'completo': False,
+        'columnas': COLUMNAS,
+        'categorias': categorias,
+        'productos': productos,
+        'eliminados': eliminados
+    })
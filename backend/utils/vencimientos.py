@@ -0,0 +1,207 @@
+# backend/utils/vencimientos.py - Vencimientos: consultas por rango y resumen precalculado por día
+from datetime import date, timedelta
+from sqlalchemy import select, delete, insert, func, case, or_
+from utils.db import db
+from utils.versiones import version_actual
+from utils.sync_pos import CLAVE_VERSION as CLAVE_SYNC
+from models.producto import Producto, ProductoEliminado
+from models.version import VersionCatalogo
+from models.vencimiento import ResumenVencimiento, VencimientoProducto
+
+# Última versión de sincronización de productos ya volcada al resumen
+CLAVE_REFRESCO = 'vencimientos'
+ESTADOS = {'por_vencer', 'vencidos'}
+CAMPOS = ('productos', 'con_stock', 'unidades', 'valor')
+LOTE_IN = 900  # por debajo del límite de parámetros de SQLite
+
+def _rango(estado, dias, hoy):
+    """Condición sobre fecha_vencimiento: un rango del índice, nunca toda la tabla"""
+    if estado == 'vencidos':
+        return Producto.fecha_vencimiento < hoy
+    return Producto.fecha_vencimiento.between(hoy, hoy + timedelta(days=dias))
+
+def listar(estado='por_vencer', dias=7, categoria=None, limite=200, con_stock=True):
+    """Productos vencidos o por vencer en `dias`, los más urgentes primero"""
+    hoy = date.today()
+    consulta = (
+        select(Producto.id, Producto.codigo, Producto.nombre, Producto.categoria,
+               Producto.fecha_vencimiento, Producto.stock_actual, Producto.precio)
+        .where(_rango(estado, dias, hoy))
+        .order_by(Producto.fecha_vencimiento, Producto.id)
+        .limit(limite)
+    )
+    if categoria:
+        consulta = consulta.where(Producto.categoria == categoria)
+    if con_stock:
+        consulta = consulta.where(Producto.stock_actual > 0)
+
+    return [{
+        'id': fila.id,
+        'codigo': fila.codigo,
+        'nombre': fila.nombre,
+        'categoria': fila.categoria,
+        'fecha_vencimiento': fila.fecha_vencimiento.isoformat(),
+        'dias_restantes': (fila.fecha_vencimiento - hoy).days,
+        'stock_actual': fila.stock_actual,
+        'valor': float(fila.precio * fila.stock_actual)
+    } for fila in db.session.execute(consulta)]
+
+def _sumas(nombre, condicion):
+    """SUM condicional de cada campo del resumen, etiquetado '<nombre>_<campo>'"""
+    return [func.coalesce(func.sum(case((condicion, getattr(ResumenVencimiento, campo)), else_=0)), 0)
+            .label(f'{nombre}_{campo}') for campo in CAMPOS]
+
+def _totales(fila, nombre=None):
+    prefijo = f'{nombre}_' if nombre else ''
+    valores = {campo: getattr(fila, prefijo + campo) or 0 for campo in CAMPOS}
+    return {
+        'productos': int(valores['productos']),
+        'con_stock': int(valores['con_stock']),
+        'unidades': int(valores['unidades']),
+        'valor': float(valores['valor'])
+    }
+
+def _vencidos_y_por_vencer(fila):
+    return {'vencidos': _totales(fila, 'vencidos'), 'por_vencer': _totales(fila, 'por_vencer')}
+
+def resumen(dias=7):
+    """
+    Vencidos / por vencer en total, por categoría y por día, leídos del resumen
+    precalculado (una fila por día y categoría, no una por producto).
+    """
+    hoy = date.today()
+    limite = hoy + timedelta(days=dias)
+    R = ResumenVencimiento
+    por_vencer = R.fecha.between(hoy, limite)
+    columnas = _sumas('vencidos', R.fecha < hoy) + _sumas('por_vencer', por_vencer)
+
+    total = db.session.execute(select(*columnas).where(R.fecha <= limite)).one()
+    categorias = db.session.execute(
+        select(R.categoria, *columnas).where(R.fecha <= limite).group_by(R.categoria).order_by(R.categoria)
+    ).all()
+    por_dia = db.session.execute(
+        select(R.fecha, *[func.sum(getattr(R, campo)).label(campo) for campo in CAMPOS])
+        .where(por_vencer).group_by(R.fecha).order_by(R.fecha)
+    ).all()
+
+    return {
+        **_vencidos_y_por_vencer(total),
+        'por_categoria': [{'categoria': fila.categoria or None, **_vencidos_y_por_vencer(fila)}
+                          for fila in categorias],
+        'por_dia': [{'fecha': fila.fecha.isoformat(), **_totales(fila)} for fila in por_dia],
+        'dias': dias,
+        # Cambios de productos que todavía no llegaron al resumen (los vuelca el refresco nocturno)
+        'cambios_pendientes': _cambios_pendientes(limite)
+    }
+
+def _cambios_pendientes(limite):
+    """
+    Algún producto que está (o estaba al último refresco) en el resumen hasta `limite`
+    cambió o se dio de baja después del refresco. Las ventas de productos sin
+    vencimiento cercano no cuentan: no cambian nada de lo que muestra el resumen.
+    """
+    desde = version_actual(CLAVE_REFRESCO)
+    if version_actual(CLAVE_SYNC) <= desde:
+        return False
+    # Por el índice de version_sync: solo lo modificado desde el refresco
+    modificado = (
+        select(Producto.id)
+        .outerjoin(VencimientoProducto, VencimientoProducto.producto_id == Producto.id)
+        .where(Producto.version_sync > desde,
+               or_(Producto.fecha_vencimiento <= limite, VencimientoProducto.fecha <= limite))
+        .exists()
+    )
+    baja = (
+        select(ProductoEliminado.producto_id)
+        .join(VencimientoProducto, VencimientoProducto.producto_id == ProductoEliminado.producto_id)
+        .where(ProductoEliminado.version_sync > desde, VencimientoProducto.fecha <= limite)
+        .exists()
+    )
+    return bool(db.session.execute(select(or_(modificado, baja))).scalar())
+
+def _agregado(condicion):
+    """Filas del resumen (fecha, categoría, sumas) calculadas desde productos"""
+    con_stock = Producto.stock_actual > 0
+    return (
+        select(
+            Producto.fecha_vencimiento,
+            func.coalesce(Producto.categoria, ''),
+            func.count(Producto.id),
+            func.sum(case((con_stock, 1), else_=0)),
+            func.sum(case((con_stock, Producto.stock_actual), else_=0)),
+            func.sum(case((con_stock, Producto.precio * Producto.stock_actual), else_=0))
+        )
+        .where(condicion)
+        .group_by(Producto.fecha_vencimiento, func.coalesce(Producto.categoria, ''))
+    )
+
+def _insertar_resumen(condicion):
+    db.session.execute(insert(ResumenVencimiento).from_select(
+        ['fecha', 'categoria', *CAMPOS], _agregado(condicion)
+    ))
+
+def _insertar_fechas(condicion):
+    db.session.execute(insert(VencimientoProducto).from_select(
+        ['producto_id', 'fecha'],
+        select(Producto.id, Producto.fecha_vencimiento).where(condicion, Producto.fecha_vencimiento.isnot(None))
+    ))
+
+def _en_tandas(valores):
+    valores = sorted(valores)
+    for i in range(0, len(valores), LOTE_IN):
+        yield valores[i:i + LOTE_IN]
+
+def refrescar(completo=False):
+    """
+    Actualiza el resumen de vencimientos. Incremental: solo los productos con
+    cambios (o bajas) desde el último refresco, según la versión de sincronización
+    de utils/sync_pos.py, y solo los días donde estaban o están ahora.
+    El primer refresco (o completo=True) lo reconstruye entero.
+    """
+    # Se lee antes que los productos: lo confirmado después queda para el próximo refresco
+    hasta = version_actual(CLAVE_SYNC)
+
+    # La fila de estado serializa los refrescos (cron + endpoint al mismo tiempo)
+    estado = db.session.execute(
+        select(VersionCatalogo).where(VersionCatalogo.clave == CLAVE_REFRESCO).with_for_update()
+    ).scalar()
+    if estado is None:
+        estado = VersionCatalogo(clave=CLAVE_REFRESCO, version=0)
+        db.session.add(estado)
+        completo = True
+
+    if completo:
+        db.session.execute(delete(ResumenVencimiento))
+        db.session.execute(delete(VencimientoProducto))
+        _insertar_fechas(Producto.fecha_vencimiento.isnot(None))
+        _insertar_resumen(Producto.fecha_vencimiento.isnot(None))
+        estado.version = hasta
+        db.session.commit()
+        return {'modo': 'completo', 'version': hasta}
+
+    desde = estado.version
+    ids = set(db.session.execute(select(Producto.id).where(Producto.version_sync > desde)).scalars())
+    ids.update(db.session.execute(
+        select(ProductoEliminado.producto_id).where(ProductoEliminado.version_sync > desde)
+    ).scalars())
+
+    fechas = set()
+    for tanda in _en_tandas(ids):
+        # Día anterior de cada producto (pudo cambiar de fecha o darse de baja) y día actual
+        fechas.update(db.session.execute(
+            select(VencimientoProducto.fecha).where(VencimientoProducto.producto_id.in_(tanda))
+        ).scalars())
+        fechas.update(db.session.execute(
+            select(Producto.fecha_vencimiento)
+            .where(Producto.id.in_(tanda), Producto.fecha_vencimiento.isnot(None))
+        ).scalars())
+        db.session.execute(delete(VencimientoProducto).where(VencimientoProducto.producto_id.in_(tanda)))
+        _insertar_fechas(Producto.id.in_(tanda))
+
+    for tanda in _en_tandas(fechas):
+        db.session.execute(delete(ResumenVencimiento).where(ResumenVencimiento.fecha.in_(tanda)))
+        _insertar_resumen(Producto.fecha_vencimiento.in_(tanda))
+
+    estado.version = max(desde, hasta)
+    db.session.commit()
+    return {'modo': 'incremental', 'version': estado.version, 'productos': len(ids), 'dias': len(fechas)}
@@ -0,0 +1,405 @@
+# backend/utils/ventas.py - Registro transaccional de ventas
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import select, update, case
+from sqlalchemy.exc import IntegrityError
+from utils.db import db
+from utils.cache_catalogo import invalidar_stock
+from utils.sync_pos import marcar_confirmados
+from utils.movimientos import registrar_movimientos
+from utils.eventos import notificar
+from utils.analitica import registrar_ventas
+from utils.logs import get_logger
+from models.producto import Producto
+from models.venta import Venta, VentaItem
+
+log = get_logger('ventas')
+
+# Mismo IVA que aplica el POS en el frontend
+IVA = Decimal('0.21')
+CENTAVOS = Decimal('0.01')
+METODOS_PAGO = {'efectivo', 'tarjeta', 'transferencia'}
+LARGO_CLAVE = 64
+LOTE_IN = 900  # por debajo del límite de parámetros de SQLite
+# Reloj de la caja adelantado que todavía se acepta en la fecha de una venta offline
+TOLERANCIA_RELOJ = timedelta(minutes=5)
+
+class VentaError(Exception):
+    """Error de validación de una venta (400)"""
+
+class VentaDuplicadaError(VentaError):
+    """La clave de idempotencia ya corresponde a una venta registrada (200, no se repite)"""
+
+    def __init__(self, venta):
+        super().__init__('La venta ya estaba registrada')
+        self.venta = venta
+
+class StockInsuficienteError(VentaError):
+    """Una o más líneas del carrito superan el stock disponible (409)"""
+
+    def __init__(self, faltantes):
+        super().__init__('Stock insuficiente para uno o más productos')
+        self.faltantes = faltantes
+
+def _redondear(valor):
+    return Decimal(valor).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+def _monto_recibido(valor):
+    """Monto que entrega el cliente: número finito, redondeado a centavos"""
+    try:
+        monto = _redondear(str(valor))
+    except (InvalidOperation, TypeError, ValueError):
+        raise VentaError(f'montoRecibido inválido: {valor}')
+    if not monto.is_finite():
+        raise VentaError(f'montoRecibido inválido: {valor}')
+    return monto
+
+def agrupar_items(productos):
+    """Agrupa las líneas del carrito por producto -> {producto_id: cantidad} ordenado por id"""
+    if not productos:
+        raise VentaError('La venta no tiene productos')
+
+    cantidades = {}
+    for item in productos:
+        try:
+            producto_id = int(item['id'])
+            cantidad = int(item['cantidad'])
+        except (KeyError, TypeError, ValueError):
+            raise VentaError('Cada producto necesita id y cantidad numéricos')
+        if cantidad <= 0:
+            raise VentaError(f'Cantidad inválida para el producto {producto_id}')
+        cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+
+    # Orden estable por id: todas las cajas bloquean filas en el mismo orden
+    return dict(sorted(cantidades.items()))
+
+def descontar_stock(cantidades):
+    """
+    Descuenta el stock de todo el carrito con un único UPDATE condicional.
+    Retorna {producto_id: precio} o lanza StockInsuficienteError sin tocar nada.
+    """
+    ids = list(cantidades)
+
+    # Bloquear las filas en orden de id para que dos cajas con SKUs
+    # compartidos nunca se esperen en orden cruzado (sin deadlocks en PostgreSQL)
+    db.session.execute(
+        select(Producto.id).where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update()
+    )
+
+    cantidad = case(cantidades, value=Producto.id)
+    result = db.session.execute(
+        update(Producto)
+        .where(Producto.id.in_(ids), Producto.stock_actual >= cantidad)
+        .values(stock_actual=Producto.stock_actual - cantidad)
+        .returning(Producto.id, Producto.precio)
+        .execution_options(synchronize_session=False)
+    )
+    precios = dict(result.all())
+
+    if len(precios) != len(ids):
+        # Reportar solo las líneas que fallaron, con el stock real disponible
+        pendientes = [pid for pid in ids if pid not in precios]
+        disponibles = dict(db.session.execute(
+            select(Producto.id, Producto.stock_actual).where(Producto.id.in_(pendientes))
+        ).all())
+        faltantes = [{
+            'id': pid,
+            'solicitado': cantidades[pid],
+            'disponible': disponibles.get(pid),
+            'motivo': 'stock_insuficiente' if pid in disponibles else 'no_existe'
+        } for pid in pendientes]
+        raise StockInsuficienteError(faltantes)
+
+    return precios
+
+def validar_clave(clave, requerida=False):
+    """Clave de idempotencia generada por la caja (uuid), o None"""
+    if clave is None or clave == '':
+        if requerida:
+            raise VentaError('Cada venta del lote necesita su clave')
+        return None
+    if not isinstance(clave, str) or len(clave) > LARGO_CLAVE:
+        raise VentaError(f'La clave debe ser un texto de hasta {LARGO_CLAVE} caracteres')
+    return clave
+
+def _fecha_offline(valor, max_dias):
+    """Fecha en que la caja hizo la venta (ISO 8601) -> datetime UTC naive, como Venta.fecha"""
+    if valor is None:
+        return None
+    try:
+        fecha = datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise VentaError(f'Fecha inválida: {valor}')
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    ahora = datetime.utcnow()
+    if fecha > ahora + TOLERANCIA_RELOJ or fecha < ahora - timedelta(days=max_dias):
+        raise VentaError('Fecha de la venta fuera del rango aceptado')
+    return fecha
+
+def preparar_venta(data):
+    """Validaciones que no necesitan la base: método de pago y carrito agrupado"""
+    metodo_pago = data.get('metodoPago', 'efectivo')
+    if metodo_pago not in METODOS_PAGO:
+        raise VentaError(f'Método de pago inválido: {metodo_pago}')
+    return metodo_pago, agrupar_items(data.get('productos'))
+
+def precios_caja(productos):
+    """{producto_id: precio} que cobró la caja; se ignoran las líneas sin un precio válido"""
+    precios = {}
+    for item in productos or []:
+        try:
+            producto_id = int(item['id'])
+            precio = _redondear(str(item['precio']))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            continue
+        if precio.is_finite() and precio >= 0:
+            precios.setdefault(producto_id, precio)
+    return precios
+
+def armar_venta(data, metodo_pago, cantidades, precios, usuario_id=None, clave=None, fecha=None, offline=False):
+    """
+    Venta con sus items a partir de los precios de la base (sin agregarla a la sesión).
+    offline=True (ventas del lote): el cliente ya pagó en la caja, así que se registran
+    los precios que cobró la caja y el monto recibido no se rechaza por insuficiente.
+    """
+    cobrados = precios_caja(data.get('productos')) if offline else {}
+    items = []
+    subtotal = Decimal('0')
+    for producto_id, cantidad in cantidades.items():
+        precio = cobrados.get(producto_id)
+        if precio is None:
+            precio = _redondear(precios[producto_id])
+        linea = precio * cantidad
+        subtotal += linea
+        items.append(VentaItem(
+            producto_id=producto_id,
+            cantidad=cantidad,
+            precio_unitario=precio,
+            subtotal=linea
+        ))
+
+    impuestos = _redondear(subtotal * IVA)
+    total = subtotal + impuestos
+
+    monto_recibido = total
+    if metodo_pago == 'efectivo' and data.get('montoRecibido') is not None:
+        monto_recibido = _monto_recibido(data['montoRecibido'])
+        if monto_recibido < total and not offline:
+            raise VentaError('El monto recibido es insuficiente')
+
+    return Venta(
+        fecha=fecha or datetime.utcnow(),
+        cliente=data.get('cliente') or 'Cliente General',
+        telefono=data.get('telefono', ''),
+        metodo_pago=metodo_pago,
+        subtotal=subtotal,
+        impuestos=impuestos,
+        total=total,
+        monto_recibido=monto_recibido,
+        cambio=max(monto_recibido - total, Decimal('0')),
+        usuario_id=usuario_id,
+        clave_idempotencia=clave,
+        items=items
+    )
+
+def _diferencias_precio(venta, precios):
+    """Líneas de una venta offline cobradas a un precio distinto del actual de la base"""
+    diferencias = []
+    for item in venta.items:
+        actual = _redondear(precios[item.producto_id])
+        if item.precio_unitario != actual:
+            diferencias.append({'id': item.producto_id, 'precio_caja': float(item.precio_unitario),
+                                'precio_actual': float(actual)})
+    return diferencias
+
+def _ventas_existentes(claves):
+    """{clave: venta_id} de las claves que ya se registraron"""
+    existentes = {}
+    claves = list(claves)
+    for i in range(0, len(claves), LOTE_IN):
+        existentes.update(db.session.execute(
+            select(Venta.clave_idempotencia, Venta.id)
+            .where(Venta.clave_idempotencia.in_(claves[i:i + LOTE_IN]))
+        ).all())
+    return existentes
+
+def _movimientos(venta):
+    """Una salida del libro de stock por cada línea de la venta"""
+    return [{'producto_id': item.producto_id, 'tipo': 'venta', 'cantidad': -item.cantidad,
+             'referencia': f'venta:{venta.id}'} for item in venta.items]
+
+def _confirmar(productos_ids):
+    """Commit de la venta (o del lote) y aviso a catálogo y cajas del stock nuevo"""
+    db.session.commit()
+
+    # Stock nuevo para las demás cajas, en una transacción aparte: el contador de
+    # sincronización no queda bloqueado durante la venta (ver marcar_confirmados).
+    # La venta ya está registrada: si esto falla, se loguea y el POS recibe el stock
+    # con el próximo cambio del producto
+    try:
+        marcar_confirmados(productos_ids)
+    except Exception:
+        log.exception('Error marcando productos vendidos para sincronizar')
+        db.session.rollback()
+
+    # Solo cambió stock: el catálogo cacheado se renueva a lo sumo una vez cada
+    # CATALOGO_STOCK_SEGUNDOS (ver invalidar_stock), no en cada venta. Igual que
+    # arriba, un fallo acá no convierte en error una venta ya registrada
+    try:
+        invalidar_stock()
+        db.session.commit()
+    except Exception:
+        log.exception('Error marcando el stock del catálogo')
+        db.session.rollback()
+    notificar()
+
+def registrar_venta(data, usuario_id=None, clave=None):
+    """
+    Registra una venta completa en una sola transacción.
+    Los precios y totales se calculan en el servidor a partir de la base de datos.
+    Con `clave`, un reintento de la misma venta lanza VentaDuplicadaError con la ya registrada.
+    Retorna el diccionario de la venta ya confirmada.
+    """
+    clave = validar_clave(clave)
+    if clave is not None:
+        existente = db.session.execute(select(Venta).where(Venta.clave_idempotencia == clave)).scalar()
+        if existente is not None:
+            raise VentaDuplicadaError(existente.to_dict())
+
+    metodo_pago, cantidades = preparar_venta(data)
+    precios = descontar_stock(cantidades)
+    venta = armar_venta(data, metodo_pago, cantidades, precios, usuario_id, clave)
+    db.session.add(venta)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # Otro envío con la misma clave ganó la carrera
+        db.session.rollback()
+        if clave is None:
+            raise
+        existente = db.session.execute(select(Venta).where(Venta.clave_idempotencia == clave)).scalar()
+        if existente is None:
+            raise
+        raise VentaDuplicadaError(existente.to_dict())
+
+    registrar_movimientos(_movimientos(venta), usuario_id)
+    registrar_ventas([venta])
+
+    # Serializar antes del commit evita recargar venta e items después
+    venta_dict = venta.to_dict()
+    _confirmar(cantidades)
+    return venta_dict
+
+def _aplicar_lote(pendientes, usuario_id):
+    """
+    Descuenta stock y arma las ventas de `pendientes` [(indice, data, metodo, cantidades, clave, fecha)].
+    Primero intenta todo el lote con un único UPDATE; si alguna venta no entra
+    (stock o monto), repite venta por venta con un SAVEPOINT cada una.
+    Retorna ([(indice, venta, diferencias_de_precio)], {indice: error}).
+    """
+    if not pendientes:
+        return [], {}
+
+    total = {}
+    for _, _, _, cantidades, _, _ in pendientes:
+        for producto_id, cantidad in cantidades.items():
+            total[producto_id] = total.get(producto_id, 0) + cantidad
+    try:
+        with db.session.begin_nested():
+            precios = descontar_stock(dict(sorted(total.items())))
+            ventas = [(indice, armar_venta(data, metodo, cantidades, precios, usuario_id, clave, fecha, offline=True))
+                      for indice, data, metodo, cantidades, clave, fecha in pendientes]
+        return [(indice, venta, _diferencias_precio(venta, precios)) for indice, venta in ventas], {}
+    except VentaError:
+        pass
+
+    ventas, errores = [], {}
+    for indice, data, metodo, cantidades, clave, fecha in pendientes:
+        try:
+            with db.session.begin_nested():
+                precios = descontar_stock(cantidades)
+                venta = armar_venta(data, metodo, cantidades, precios, usuario_id, clave, fecha, offline=True)
+                ventas.append((indice, venta, _diferencias_precio(venta, precios)))
+        except VentaError as e:
+            errores[indice] = e
+    return ventas, errores
+
+def registrar_lote(lote, usuario_id=None, max_dias=7, reintentos=1):
+    """
+    Registra ventas hechas sin conexión en una sola transacción.
+    Cada venta trae su `clave`: las ya registradas (de un envío anterior o
+    repetidas en el lote) se informan como duplicadas y no descuentan stock
+    otra vez. Una venta inválida o sin stock se rechaza sin afectar al resto.
+    Cada venta se registra con los precios que cobró la caja; los que ya no
+    coinciden con la base se informan en 'diferencias_precio', sin rechazarla.
+    Retorna un resultado por venta, en el mismo orden del lote.
+    """
+    resultados = [None] * len(lote)
+    pendientes = []
+    primera = {}  # clave -> índice de su primera aparición en el lote
+
+    existentes = _ventas_existentes({
+        venta['clave'] for venta in lote
+        if isinstance(venta, dict) and isinstance(venta.get('clave'), str)
+    })
+    for indice, data in enumerate(lote):
+        clave = data.get('clave') if isinstance(data, dict) else None
+        try:
+            if not isinstance(data, dict):
+                raise VentaError('Cada venta del lote debe ser un objeto')
+            clave = validar_clave(clave, requerida=True)
+            if clave in existentes:
+                resultados[indice] = {'clave': clave, 'estado': 'duplicada', 'venta_id': existentes[clave]}
+                continue
+            if clave in primera:
+                resultados[indice] = {'clave': clave, 'estado': 'duplicada', 'duplica': primera[clave]}
+                continue
+            primera[clave] = indice
+            metodo, cantidades = preparar_venta(data)
+            pendientes.append((indice, data, metodo, cantidades, clave, _fecha_offline(data.get('fecha'), max_dias)))
+        except VentaError as e:
+            resultados[indice] = {'clave': clave, 'estado': 'rechazada', 'error': str(e)}
+
+    ventas, errores = _aplicar_lote(pendientes, usuario_id)
+    db.session.add_all(venta for _, venta, _ in ventas)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # Un envío concurrente del mismo lote registró alguna clave: reintentar ve cuáles
+        db.session.rollback()
+        if reintentos <= 0:
+            raise
+        return registrar_lote(lote, usuario_id, max_dias, reintentos - 1)
+
+    registrar_movimientos([fila for _, venta, _ in ventas for fila in _movimientos(venta)], usuario_id)
+    registrar_ventas([venta for _, venta, _ in ventas])
+
+    productos_ids = set()
+    for indice, venta, diferencias in ventas:
+        productos_ids.update(item.producto_id for item in venta.items)
+        resultados[indice] = {'clave': venta.clave_idempotencia, 'estado': 'registrada',
+                              'venta_id': venta.id, 'total': float(venta.total)}
+        if diferencias:
+            resultados[indice]['diferencias_precio'] = diferencias
+            log.warning('Venta offline con precios desactualizados',
+                        extra={'datos': {'venta_id': venta.id, 'diferencias': diferencias}})
+    for indice, error in errores.items():
+        resultados[indice] = {'clave': lote[indice]['clave'], 'estado': 'rechazada', 'error': str(error)}
+        if isinstance(error, StockInsuficienteError):
+            resultados[indice]['faltantes'] = error.faltantes
+
+    if ventas:
+        _confirmar(productos_ids)
+    else:
+        db.session.rollback()
+
+    # Duplicadas dentro del mismo lote: el id de la venta que sí se registró
+    for resultado in resultados:
+        if 'duplica' in resultado:
+            original = resultados[resultado.pop('duplica')]
+            if original['estado'] == 'registrada':
+                resultado['venta_id'] = original['venta_id']
+            else:
+                resultado.update(estado='rechazada', error=original['error'])
+    return resultados
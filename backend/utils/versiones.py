@@ -0,0 +1,29 @@
+# backend/utils/versiones.py - Contadores de versión compartidos para invalidar cachés
+from sqlalchemy import select, update
+from utils.db import db
+from models.version import VersionCatalogo
+
+def version_actual(clave):
+    """Versión vigente de `clave` (lectura por clave primaria, 0 si no existe)"""
+    version = db.session.execute(
+        select(VersionCatalogo.version).where(VersionCatalogo.clave == clave)
+    ).scalar()
+    return version or 0
+
+def incrementar_version(clave):
+    """
+    Incrementa la versión dentro de la transacción actual: los demás workers
+    ven el cambio recién cuando la escritura que lo provocó hace commit.
+    Retorna la nueva versión.
+    """
+    version = db.session.execute(
+        update(VersionCatalogo)
+        .where(VersionCatalogo.clave == clave)
+        .values(version=VersionCatalogo.version + 1)
+        .returning(VersionCatalogo.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if version is None:
+        db.session.add(VersionCatalogo(clave=clave, version=1))
+        version = 1
+    return version
@@ -0,0 +1,10 @@
+# backend/wsgi.py - Punto de entrada de producción
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app    # servidor multi-worker
+#
+# `gunicorn app:app` (deploys viejos de Railway/Render) es equivalente: gunicorn
+# lee gunicorn.conf.py del directorio actual aunque no se pase -c.
+# Al arrancar, el master pone el esquema al día una vez (tablas, columnas,
+# índices, admin; ver on_starting en gunicorn.conf.py). Crear la app no toca
+# la base ni imprime nada: con preload_app los workers la heredan por fork.
+from app import app  # noqa: F401
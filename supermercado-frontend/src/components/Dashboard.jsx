@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
+import { API_ENDPOINTS, suscribirEventos } from "../services/api";
 import { 
   ShoppingCart, 
   Package, 
@@ -30,15 +31,26 @@ function Dashboard() {
   const [error, setError] = useState(null);
   const [ultimaActualizacion, setUltimaActualizacion] = useState(new Date());
 
-  // Cargar estadísticas al montar el componente
+  // Cargar estadísticas al montar el componente; después las empuja el servidor
   useEffect(() => {
     cargarEstadisticas();
     
-    // Actualizar cada 5 minutos
-    const interval = setInterval(cargarEstadisticas, 5 * 60 * 1000);
-    return () => clearInterval(interval);
+    return suscribirEventos({
+      estadisticas: aplicarResumen,
+      resync: cargarEstadisticas
+    });
   }, []);
 
+  const aplicarResumen = (data) => {
+    setEstadisticas({
+      ventasHoy: data.ventas_hoy || 0,
+      totalProductos: data.total_productos || 0,
+      stockBajo: data.stock_bajo || 0,
+      totalClientes: data.total_clientes || 0
+    });
+    setUltimaActualizacion(new Date());
+  };
+
   const cargarEstadisticas = async () => {
     try {
       setLoading(true);
@@ -47,24 +59,10 @@ function Dashboard() {
       const token = localStorage.getItem('token');
       const headers = { Authorization: `Bearer ${token}` };
 
-      // Realizar todas las consultas en paralelo con manejo de errores individual
-      const resultados = await Promise.allSettled([
-        axios.get('http://localhost:5000/api/estadisticas/ventas-hoy', { headers }),
-        axios.get('http://localhost:5000/api/estadisticas/productos', { headers }),
-        axios.get('http://localhost:5000/api/estadisticas/stock-bajo', { headers }),
-        axios.get('http://localhost:5000/api/estadisticas/clientes', { headers })
-      ]);
+      // Un solo request: el backend calcula todo en una consulta y lo cachea
+      const { data } = await axios.get(`${API_ENDPOINTS.estadisticas}/resumen`, { headers });
 
-      const [ventasResult, productosResult, stockBajoResult, clientesResult] = resultados;
-
-      setEstadisticas({
-        ventasHoy: ventasResult.status === 'fulfilled' ? (ventasResult.value.data.total || 0) : 0,
-        totalProductos: productosResult.status === 'fulfilled' ? (productosResult.value.data.total || 0) : 0,
-        stockBajo: stockBajoResult.status === 'fulfilled' ? (stockBajoResult.value.data.total || 0) : 0,
-        totalClientes: clientesResult.status === 'fulfilled' ? (clientesResult.value.data.total || 0) : 0
-      });
-      
-      setUltimaActualizacion(new Date());
+      aplicarResumen(data);
     } catch (error) {
       console.error('Error al cargar estadísticas:', error);
       setError('Error al cargar las estadísticas');
@@ -1,6 +1,29 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Search, ShoppingCart, Trash2, Plus, Minus, Receipt, CreditCard, DollarSign, Scan, User, Calculator } from 'lucide-react';
 import axios from 'axios';
+import { API_ENDPOINTS, suscribirEventos } from '../services/api';
+
+// Los cambios del catálogo llegan por eventos en vivo; esto es el respaldo
+// (y el reintento de las ventas pendientes) si el canal no está disponible
+const INTERVALO_SYNC_MS = 60000;
+// Ventas hechas sin conexión, en localStorage hasta que el backend las confirme
+const COLA_OFFLINE = 'ventasPendientes';
+const VENTAS_RECHAZADAS = 'ventasRechazadas';
+const MAX_VENTAS_POR_LOTE = 500;
+
+const leerLista = (clave) => JSON.parse(localStorage.getItem(clave) || '[]');
+const guardarLista = (clave, lista) => localStorage.setItem(clave, JSON.stringify(lista));
+
+// Respuesta columnar del backend -> lista de productos como los usa el POS
+const desdeColumnas = ({ productos, categorias }) =>
+  productos.id.map((id, i) => ({
+    id,
+    codigo: productos.codigo[i],
+    nombre: productos.nombre[i],
+    precio: productos.precio[i],
+    stock: productos.stock_actual[i],
+    categoria: categorias[productos.categoria[i]]
+  }));
 
 function POS() {
   const [productos, setProductos] = useState([]);
@@ -12,21 +35,87 @@ function POS() {
   const [mostrarPago, setMostrarPago] = useState(false);
   const [ventaCompleta, setVentaCompleta] = useState(false);
   const [loading, setLoading] = useState(false);
+  const [ventasPendientes, setVentasPendientes] = useState(() => leerLista(COLA_OFFLINE).length);
+  // Versión del catálogo que ya tiene esta caja (null = falta el snapshot)
+  const versionCatalogo = useRef(null);
+  const enviandoPendientes = useRef(false);
 
-  // Cargar productos al montar el componente
+  // Snapshot al montar y después solo los cambios, periódicamente
   useEffect(() => {
-    cargarProductos();
+    const sincronizar = () => enviarPendientes().finally(sincronizarCatalogo);
+    sincronizar();
+    const intervalo = setInterval(sincronizar, INTERVALO_SYNC_MS);
+    window.addEventListener('online', sincronizar);
+    // Otro cajero vendió o se editó un producto: pedir el delta enseguida
+    const cerrarEventos = suscribirEventos({
+      productos: ({ version }) => {
+        if (versionCatalogo.current !== null && version > versionCatalogo.current) sincronizarCatalogo();
+      },
+      resync: sincronizarCatalogo
+    });
+    return () => {
+      clearInterval(intervalo);
+      window.removeEventListener('online', sincronizar);
+      cerrarEventos();
+    };
   }, []);
 
-  const cargarProductos = async () => {
+  // Envía las ventas guardadas sin conexión en lotes; la clave de cada una evita duplicarlas
+  const enviarPendientes = async () => {
+    if (enviandoPendientes.current || !leerLista(COLA_OFFLINE).length) return;
+    enviandoPendientes.current = true;
     try {
       const token = localStorage.getItem('token');
-      const response = await axios.get('http://localhost:5000/api/productos', {
+      let cola = leerLista(COLA_OFFLINE);
+      while (cola.length) {
+        const lote = cola.slice(0, MAX_VENTAS_POR_LOTE);
+        const { data } = await axios.post(`${API_ENDPOINTS.ventas}/lote`, { ventas: lote }, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        const resueltas = new Set(data.resultados.map(r => r.clave));
+        const rechazadas = data.resultados.filter(r => r.estado === 'rechazada');
+        if (rechazadas.length) {
+          // No se reintentan: quedan guardadas para revisarlas a mano
+          guardarLista(VENTAS_RECHAZADAS, [...leerLista(VENTAS_RECHAZADAS), ...rechazadas.map(r => ({
+            ...lote.find(v => v.clave === r.clave), error: r.error
+          }))]);
+          alert(`${rechazadas.length} venta(s) sin conexión fueron rechazadas: ${rechazadas[0].error}`);
+        }
+        // Releer: pudieron encolarse ventas nuevas mientras se enviaba el lote
+        cola = leerLista(COLA_OFFLINE).filter(v => !resueltas.has(v.clave));
+        guardarLista(COLA_OFFLINE, cola);
+        setVentasPendientes(cola.length);
+      }
+    } catch (error) {
+      console.error('Ventas pendientes sin enviar:', error);
+    } finally {
+      enviandoPendientes.current = false;
+    }
+  };
+
+  const sincronizarCatalogo = async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const params = versionCatalogo.current === null ? {} : { since: versionCatalogo.current };
+      const { data } = await axios.get(API_ENDPOINTS.posCatalogo, {
+        params,
         headers: { Authorization: `Bearer ${token}` }
       });
-      setProductos(response.data);
+      const recibidos = desdeColumnas(data);
+
+      if (data.completo) {
+        setProductos(recibidos);
+      } else if (recibidos.length || data.eliminados.length) {
+        setProductos(actuales => {
+          const porId = new Map(actuales.map(p => [p.id, p]));
+          data.eliminados.forEach(id => porId.delete(id));
+          recibidos.forEach(p => porId.set(p.id, p));
+          return [...porId.values()].sort((a, b) => a.id - b.id);
+        });
+      }
+      versionCatalogo.current = data.version;
     } catch (error) {
-      console.error('Error al cargar productos:', error);
+      console.error('Error al sincronizar el catálogo:', error);
     }
   };
 
@@ -95,37 +184,53 @@ function POS() {
     }
 
     setLoading(true);
+    // Clave única de esta venta: reenviarla (o subirla después en un lote) no la duplica
+    const ventaData = {
+      clave: crypto.randomUUID(),
+      fecha: new Date().toISOString(),
+      cliente: cliente.nombre || 'Cliente General',
+      telefono: cliente.telefono || '',
+      productos: carrito.map(item => ({
+        id: item.id,
+        cantidad: item.cantidad,
+        precio: item.precio,
+        subtotal: item.subtotal
+      })),
+      subtotal,
+      impuestos,
+      total,
+      metodoPago,
+      montoRecibido: metodoPago === 'efectivo' ? parseFloat(montoRecibido) : total,
+      cambio: metodoPago === 'efectivo' ? cambio : 0
+    };
+
     try {
       const token = localStorage.getItem('token');
-      const ventaData = {
-        cliente: cliente.nombre || 'Cliente General',
-        telefono: cliente.telefono || '',
-        productos: carrito.map(item => ({
-          id: item.id,
-          cantidad: item.cantidad,
-          precio: item.precio,
-          subtotal: item.subtotal
-        })),
-        subtotal,
-        impuestos,
-        total,
-        metodoPago,
-        montoRecibido: metodoPago === 'efectivo' ? parseFloat(montoRecibido) : total,
-        cambio: metodoPago === 'efectivo' ? cambio : 0
-      };
-
-      await axios.post('http://localhost:5000/api/ventas', ventaData, {
-        headers: { Authorization: `Bearer ${token}` }
+      await axios.post(API_ENDPOINTS.ventas, ventaData, {
+        headers: { Authorization: `Bearer ${token}`, 'Idempotency-Key': ventaData.clave }
       });
 
       setVentaCompleta(true);
+      // El stock cambió: traer el delta sin esperar al próximo intervalo
+      sincronizarCatalogo();
       setTimeout(() => {
         limpiarVenta();
       }, 3000);
 
     } catch (error) {
       console.error('Error al procesar venta:', error);
-      alert('Error al procesar la venta');
+      if (!error.response || error.response.status >= 500) {
+        // Sin conexión o backend caído: la venta se guarda y se envía al reconectar
+        const cola = [...leerLista(COLA_OFFLINE), ventaData];
+        guardarLista(COLA_OFFLINE, cola);
+        setVentasPendientes(cola.length);
+        setVentaCompleta(true);
+        setTimeout(() => {
+          limpiarVenta();
+        }, 3000);
+      } else {
+        alert(`Error al procesar la venta: ${error.response.data?.error || error.message}`);
+      }
     } finally {
       setLoading(false);
     }
@@ -139,7 +244,6 @@ function POS() {
     setMostrarPago(false);
     setVentaCompleta(false);
     setBusqueda('');
-    cargarProductos(); // Recargar para actualizar stock
   };
 
   if (ventaCompleta) {
@@ -150,6 +254,9 @@ function POS() {
             <Receipt className="w-8 h-8 text-green-600" />
           </div>
           <h2 className="text-2xl font-bold text-green-800 mb-2">¡Venta Exitosa!</h2>
+          {ventasPendientes > 0 && (
+            <p className="text-sm text-amber-600 mb-2">Sin conexión: la venta se enviará al reconectar</p>
+          )}
           <p className="text-gray-600 mb-4">Total: ${total.toFixed(2)}</p>
           {metodoPago === 'efectivo' && cambio > 0 && (
             <p className="text-lg font-semibold text-blue-600">Cambio: ${cambio.toFixed(2)}</p>
@@ -172,6 +279,11 @@ function POS() {
               <ShoppingCart className="w-6 h-6 text-blue-600" />
               Punto de Venta
             </h1>
+            {ventasPendientes > 0 && (
+              <div className="text-sm font-medium text-amber-600">
+                {ventasPendientes} venta(s) pendiente(s) de enviar
+              </div>
+            )}
             <div className="text-sm text-gray-500">
               {new Date().toLocaleDateString('es-ES', { 
                 weekday: 'long', 
@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
-import { API_BASE_URL } from "../services/api";
+import { API_BASE_URL, getProductImage, suscribirEventos } from "../services/api";
 import { 
   Plus, 
   Edit3, 
@@ -63,9 +63,9 @@ const Admin = () => {
     return found || { value: categoriaValue, label: categoriaValue, color: 'bg-gray-100 text-gray-800' };
   };
 
-  const cargarProductos = async () => {
+  const cargarProductos = async (mostrarCarga = true) => {
     try {
-      setLoading(true);
+      if (mostrarCarga) setLoading(true);
       const params = new URLSearchParams({
         page: currentPage,
         per_page: 10,
@@ -93,6 +93,36 @@ const Admin = () => {
     cargarProductos();
   }, [currentPage, busqueda, categoriaFiltro]);
 
+  // El handler de eventos se registra una vez: lee la página actual desde refs
+  const productosRef = useRef([]);
+  productosRef.current = productos;
+  const recargarRef = useRef(null);
+  recargarRef.current = () => cargarProductos(false);
+
+  const reemplazarProducto = (producto) => {
+    setProductos(actuales => actuales.map(p => (p.id === producto.id ? producto : p)));
+  };
+
+  // Cambios hechos desde otras pantallas (otros admins, ventas del POS) sin recargar todo
+  useEffect(() => suscribirEventos({
+    productos: ({ recargar, productos: cambiados, eliminados }) => {
+      const visibles = new Set(productosRef.current.map(p => p.id));
+      if (recargar || eliminados.some(id => visibles.has(id))) {
+        recargarRef.current();
+        return;
+      }
+      cambiados.filter(({ id }) => visibles.has(id)).forEach(async ({ id }) => {
+        try {
+          const { data } = await axios.get(`${API_BASE_URL}/productos/${id}`);
+          reemplazarProducto(data);
+        } catch (error) {
+          console.error('Error actualizando producto:', error);
+        }
+      });
+    },
+    resync: () => recargarRef.current()
+  }), []);
+
   const mostrarMensaje = (texto, tipo = 'success') => {
     setMensaje(texto);
     setTipoMensaje(tipo);
@@ -112,7 +142,7 @@ const Admin = () => {
         fecha_vencimiento: producto.fecha_vencimiento || '',
         imagen: null
       });
-      setPreviewImage(getImageUrl(producto.imagen_url));
+      setPreviewImage(getProductImage(producto, 'media').src);
     } else {
       setEditingProduct(null);
       setFormData({
@@ -203,7 +233,7 @@ const Admin = () => {
       });
 
       if (editingProduct) {
-        await axios.put(
+        const { data } = await axios.put(
           `${API_BASE_URL}/productos/${editingProduct.id}`,
           formDataToSend,
           {
@@ -214,6 +244,7 @@ const Admin = () => {
           }
         );
         mostrarMensaje('Producto actualizado exitosamente');
+        reemplazarProducto(data.producto);
       } else {
         await axios.post(
           `${API_BASE_URL}/productos/`,
@@ -226,10 +257,10 @@ const Admin = () => {
           }
         );
         mostrarMensaje('Producto creado exitosamente');
+        cargarProductos();
       }
 
       cerrarModal();
-      cargarProductos();
     } catch (error) {
       console.error('Error guardando producto:', error);
       mostrarMensaje('Error al guardar producto', 'error');
@@ -246,7 +277,8 @@ const Admin = () => {
         }
       });
       mostrarMensaje('Producto eliminado exitosamente');
-      cargarProductos();
+      // Sin spinner: la página se rellena con el producto siguiente
+      cargarProductos(false);
     } catch (error) {
       console.error('Error eliminando producto:', error);
       mostrarMensaje('Error al eliminar producto', 'error');
@@ -384,7 +416,7 @@ const Admin = () => {
                     <td className="px-6 py-4 whitespace-nowrap">
                       {producto.imagen_url ? (
                         <img
-                          src={getImageUrl(producto.imagen_url)}
+                          src={getProductImage(producto, 'thumb').src}
                           alt={producto.nombre}
                           className="h-12 w-12 object-cover rounded-lg"
                         />
@@ -1,7 +1,7 @@
 // frontend/src/components/ProductosPublic.jsx - Versión con mejor debugging
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { API_BASE_URL, getImageUrl } from '../services/api.js';
+import { API_BASE_URL, getProductImage } from '../services/api.js';
 import { 
   Search, 
   Filter, 
@@ -237,16 +237,22 @@ const ProductosPublic = () => {
                 {/* Imagen del producto */}
                 <div className="aspect-w-1 aspect-h-1 w-full overflow-hidden rounded-t-lg bg-gray-200">
                   {producto.imagen_url ? (
-                    <img
-                      src={getImageUrl(producto.imagen_url)}
-                      alt={producto.nombre}
-                      className="h-48 w-full object-cover object-center"
-                      onError={(e) => {
-                        console.warn('Error cargando imagen:', producto.imagen_url);
-                        e.target.style.display = 'none';
-                        e.target.nextSibling.style.display = 'flex';
-                      }}
-                    />
+                    <picture>
+                      {getProductImage(producto, 'media').webp && (
+                        <source srcSet={getProductImage(producto, 'media').webp} type="image/webp" />
+                      )}
+                      <img
+                        src={getProductImage(producto, 'media').src}
+                        alt={producto.nombre}
+                        loading="lazy"
+                        className="h-48 w-full object-cover object-center"
+                        onError={(e) => {
+                          console.warn('Error cargando imagen:', producto.imagen_url);
+                          e.target.style.display = 'none';
+                          e.target.parentNode.nextSibling.style.display = 'flex';
+                        }}
+                      />
+                    </picture>
                   ) : null}
                   <div 
                     className="h-48 w-full bg-gray-200 flex items-center justify-center"
@@ -45,9 +45,18 @@ export const API_ENDPOINTS = {
   // Productos
   productos: `${API_BASE_URL}/productos`,
   
+  // Ventas (y /ventas/lote para las guardadas sin conexión)
+  ventas: `${API_BASE_URL}/ventas`,
+  
+  // Catálogo del POS (snapshot + deltas con ?since=)
+  posCatalogo: `${API_BASE_URL}/pos/catalogo`,
+  
   // Estadísticas
   estadisticas: `${API_BASE_URL}/estadisticas`,
   
+  // Eventos en vivo (SSE): productos, ventas y estadísticas
+  eventos: `${API_BASE_URL}/eventos`,
+  
   // Upload
   upload: `${API_BASE_URL}/upload`,
   
@@ -69,6 +78,102 @@ export const getImageUrl = (imagePath) => {
   return `${baseUrl}${imagePath}`;
 };
 
+// Variante de la imagen de un producto según el tamaño a mostrar ('thumb', 'media', 'grande').
+// Mientras el backend genera las variantes se usa el original.
+export const getProductImage = (producto, tamano = 'media') => {
+  const variante = producto?.imagenes?.[tamano];
+  if (!variante) {
+    return { src: getImageUrl(producto?.imagen_url), webp: null };
+  }
+  return { src: getImageUrl(variante.url), webp: getImageUrl(variante.webp) };
+};
+
+// Suscripción a los eventos en vivo. `handlers`: { productos, ventas, estadisticas, resync }.
+// EventSource no puede mandar headers y el token viaja en ?jwt=: no se usa el de sesión
+// sino uno corto de POST /eventos/token, pedido de nuevo en cada conexión. Como en la
+// desconexión se pueden haber perdido eventos, al reconectar se llama a `resync`.
+// Retorna la función que cierra la conexión.
+const REINTENTO_EVENTOS_MS = 3000;
+const REINTENTO_EVENTOS_MAX_MS = 60000;
+
+export const suscribirEventos = (handlers) => {
+  if (!localStorage.getItem('token') || typeof EventSource === 'undefined') return () => {};
+  
+  let fuente = null;
+  let temporizador = null;
+  let cerrado = false;
+  let desconectado = false;
+  let espera = REINTENTO_EVENTOS_MS;
+  
+  const reintentar = () => {
+    if (cerrado) return;
+    temporizador = setTimeout(conectar, espera);
+    espera = Math.min(espera * 2, REINTENTO_EVENTOS_MAX_MS);
+  };
+  
+  const conectar = async () => {
+    let token;
+    try {
+      const { data } = await axios.post(`${API_ENDPOINTS.eventos}/token`, null, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+      });
+      token = data.token;
+    } catch (error) {
+      // Sin sesión válida no se reintenta: la pantalla sigue con su carga inicial
+      if (![401, 403, 422].includes(error.response?.status)) reintentar();
+      return;
+    }
+    if (cerrado) return;
+    
+    fuente = new EventSource(`${API_ENDPOINTS.eventos}?jwt=${encodeURIComponent(token)}`);
+    fuente.onopen = () => {
+      if (desconectado) handlers.resync?.();
+      desconectado = false;
+      espera = REINTENTO_EVENTOS_MS;
+    };
+    fuente.onerror = () => {
+      // El token ya venció para cuando el navegador reconecte solo: cerrar y pedir otro
+      desconectado = true;
+      fuente.close();
+      reintentar();
+    };
+    Object.entries(handlers).forEach(([tipo, handler]) => {
+      fuente.addEventListener(tipo, (evento) => handler(JSON.parse(evento.data)));
+    });
+  };
+  
+  conectar();
+  return () => {
+    cerrado = true;
+    clearTimeout(temporizador);
+    fuente?.close();
+  };
+};
+
+// Read-your-writes con réplicas: después de una escritura el backend responde
+// X-Leer-Primaria-Hasta y, hasta ese momento, los pedidos lo reenvían para leer
+// de la primaria. Va por header porque las llamadas cross-origin no mandan cookies.
+const HEADER_PRIMARIA = 'X-Leer-Primaria-Hasta';
+let leerPrimariaHasta = 0;
+
+const instalarLecturaPrimaria = (instancia) => {
+  instancia.interceptors.request.use((config) => {
+    const url = `${config.baseURL || ''}${config.url || ''}`;
+    if (url.startsWith(API_BASE_URL) && leerPrimariaHasta > Date.now() / 1000) {
+      config.headers[HEADER_PRIMARIA] = String(leerPrimariaHasta);
+    }
+    return config;
+  });
+  instancia.interceptors.response.use((response) => {
+    const hasta = parseFloat(response.headers?.[HEADER_PRIMARIA.toLowerCase()]);
+    if (hasta > leerPrimariaHasta) leerPrimariaHasta = hasta;
+    return response;
+  });
+};
+
+// Los componentes usan axios directamente: se instala en la instancia por defecto
+instalarLecturaPrimaria(axios);
+
 // Configuración para axios - ✅ MEJORADA para debugging
 export const createApiClient = () => {
   const client = axios.create({
@@ -100,6 +205,8 @@ export const createApiClient = () => {
     }
   );
   
+  instalarLecturaPrimaria(client);
+  
   // Interceptor para manejar respuestas
   client.interceptors.response.use(
     (response) => {